@@ -0,0 +1,77 @@
+"""피드백 평가로 생긴 시스템 프롬프트 조정 사항 관리
+
+조정 사항은 대화별로 DB에 저장하고, 거의 같은 내용은 하나로 합치며,
+토큰 예산 안에서 최근 것만 남겨 요청마다 붙는 프롬프트 크기가 일정 수준에서 멈추도록 합니다.
+"""
+import re
+from difflib import SequenceMatcher
+
+from context_window import count_tokens
+
+# 조정 사항 섹션의 토큰 예산과 최대 개수
+ADJUSTMENT_TOKEN_BUDGET = 300
+MAX_ADJUSTMENTS = 12
+
+# 이 이상 비슷하면 같은 조정 사항으로 봄
+SIMILARITY_THRESHOLD = 0.85
+
+# 불릿 등 줄마다 붙는 고정 토큰
+BULLET_OVERHEAD_TOKENS = 2
+
+ADJUSTMENTS_HEADER = "[Feedback Adjustments]\nApply these adjustments requested through the learner's feedback (most recent last):\n"
+
+BULLET_PATTERN = re.compile(r"^(?:[-*•]|\d+[.)])\s*")
+
+
+def split_adjustment(adjustment):
+    """suggested_adjustment를 불릿 표시를 뗀 줄 목록으로 나눕니다."""
+    lines = []
+    for line in str(adjustment).splitlines():
+        line = BULLET_PATTERN.sub("", line.strip()).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def normalize(text):
+    """비교용으로 공백, 대소문자, 문장 부호 차이를 없앱니다."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split()).casefold()
+
+
+def is_similar(a, b, threshold=SIMILARITY_THRESHOLD):
+    """두 조정 사항이 (거의) 같은 내용인지 확인합니다."""
+    a, b = normalize(a), normalize(b)
+    return a == b or SequenceMatcher(None, a, b).ratio() >= threshold
+
+
+def merge_adjustments(existing, lines, budget=ADJUSTMENT_TOKEN_BUDGET, max_items=MAX_ADJUSTMENTS):
+    """기존 조정 사항에 새 줄을 합친 목록을 반환합니다. 각 항목은 {"content", "hits"}입니다.
+
+    비슷한 조정 사항은 새 표현으로 바꾸어 최신 위치로 옮기고 hits를 늘리며,
+    토큰 예산과 최대 개수를 넘으면 오래된 것부터 버립니다.
+    """
+    merged = list(existing)
+    for line in lines:
+        hits = 1
+        for i, item in enumerate(merged):
+            if is_similar(item["content"], line):
+                hits += merged.pop(i)["hits"]
+                break
+        merged.append({"content": line, "hits": hits})
+
+    kept = []
+    used = 0
+    for item in reversed(merged[-max_items:]):
+        tokens = count_tokens(item["content"]) + BULLET_OVERHEAD_TOKENS
+        if kept and used + tokens > budget:
+            break
+        kept.append(item)
+        used += tokens
+    return kept[::-1]
+
+
+def render_section(adjustments):
+    """시스템 프롬프트 뒤에 붙일 조정 사항 섹션을 만듭니다. 없으면 빈 문자열"""
+    if not adjustments:
+        return ""
+    return ADJUSTMENTS_HEADER + "\n".join(f"- {item['content']}" for item in adjustments)
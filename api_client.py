@@ -0,0 +1,101 @@
+import hashlib
+import threading
+import time
+from openai import AsyncOpenAI, OpenAI, DefaultAsyncHttpxClient
+
+# 검증 결과 유지 시간 (초)
+VALID_KEY_TTL = 600
+INVALID_KEY_TTL = 30
+
+# (키 해시, base_url)별 공유 클라이언트와 검증 결과 (valid, 만료 시각)
+_clients = {}
+_async_clients = {}
+_validations = {}
+_http_client = None
+_lock = threading.Lock()
+
+# 클라이언트 생성 함수 (로컬 대체 서버 등으로 교체 가능)
+client_factory = OpenAI
+async_client_factory = AsyncOpenAI
+
+
+def hash_api_key(api_key):
+    """API 키 원문 대신 캐시 키로 사용할 해시를 반환합니다."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _server_options(base_url):
+    """base_url이 있을 때만 넘겨 클라이언트 생성 함수의 기본 주소를 유지합니다."""
+    return {"base_url": base_url} if base_url else {}
+
+
+def get_http_client():
+    """모든 비동기 클라이언트(API 키, 서버와 무관)가 함께 쓰는 HTTP 연결 풀을 반환합니다.
+
+    연결 수 제한과 시간 제한은 openai 기본값을 따릅니다. 튜터 엔진의 이벤트 루프에서만 사용해야 합니다.
+    """
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = DefaultAsyncHttpxClient()
+        return _http_client
+
+
+def get_client(api_key, base_url=None):
+    """API 키와 서버 주소별로 하나의 클라이언트를 만들어 재사용합니다."""
+    key = (hash_api_key(api_key), base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = client_factory(api_key=api_key, **_server_options(base_url))
+        return client
+
+
+def get_async_client(api_key, base_url=None):
+    """API 키와 서버 주소별로 하나의 비동기 클라이언트를 만들어 재사용합니다.
+
+    연결 풀은 get_http_client()를 공유합니다. 튜터 엔진의 이벤트 루프에서만 사용해야 합니다.
+    """
+    key = (hash_api_key(api_key), base_url)
+    http_client = get_http_client()
+    with _lock:
+        client = _async_clients.get(key)
+        if client is None:
+            client = _async_clients[key] = async_client_factory(
+                api_key=api_key, http_client=http_client, **_server_options(base_url)
+            )
+        return client
+
+
+def validate_api_key(api_key, base_url=None):
+    """OpenAI(호환) API 키의 유효성을 검증하며, 결과는 TTL 동안 캐시합니다."""
+    key = (hash_api_key(api_key), base_url)
+    now = time.monotonic()
+    with _lock:
+        cached = _validations.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+
+    try:
+        # 간단한 API 호출로 키 유효성 검증
+        get_client(api_key, base_url).models.list()
+        valid = True
+    except Exception:
+        valid = False
+
+    ttl = VALID_KEY_TTL if valid else INVALID_KEY_TTL
+    with _lock:
+        _validations[key] = (valid, now + ttl)
+        if not valid:
+            # 잘못된 키의 클라이언트는 보관하지 않음
+            _clients.pop(key, None)
+            _async_clients.pop(key, None)
+    return valid
+
+
+def clear_cache():
+    """캐시된 클라이언트와 검증 결과를 모두 비웁니다."""
+    with _lock:
+        _clients.clear()
+        _async_clients.clear()
+        _validations.clear()
@@ -0,0 +1,105 @@
+"""메시지 본문 조각 저장(내용 주소 방식)과 본문을 그대로 저장하던 방식 비교 벤치마크
+
+ADDIE 시스템 프롬프트와 메시지가 있는 합성 세션을 두 방식으로 저장해
+DB 크기, 저장 중 파일에 쓴 바이트 수 (/proc/self/io의 wchar), 대화 첫 페이지 조회 지연 시간을 비교합니다.
+조회는 같은 대화를 반복하는 경우 (warm)와 매번 다른 대화를 여는 경우 (cold)를 따로 잽니다.
+
+    python benchmarks/bench_blobs.py --sessions 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from database import Database  # noqa: E402
+from prompts import system_prompt  # noqa: E402
+from sidebar import MESSAGE_PAGE_SIZE  # noqa: E402
+
+WORDS = (
+    "learning memory working long-term cognitive load schema practice feedback example "
+    "attention retrieval transfer design analysis evaluation objective assessment 학습 기억 설계 평가"
+).split()
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def written_bytes():
+    """지금까지 이 프로세스가 write 호출로 쓴 바이트 수 (Linux 외에서는 None)"""
+    try:
+        with open("/proc/self/io") as file:
+            return next(int(line.split()[1]) for line in file if line.startswith("wchar:"))
+    except OSError:
+        return None
+
+
+def populate(db, sessions, messages, seed=0):
+    """세션마다 ADDIE 시스템 프롬프트 (분석/설계는 세션마다 다름)와 대화 메시지를 저장합니다."""
+    rng = random.Random(seed)
+    for _ in range(sessions):
+        conversation_id = db.create_conversation(" ".join(rng.choices(WORDS, k=4)))
+        db.save_message(conversation_id, "system", system_prompt.format(
+            analysis_content=" ".join(rng.choices(WORDS, k=120)),
+            design_content=" ".join(rng.choices(WORDS, k=120)),
+        ))
+        for j in range(messages):
+            db.save_message(conversation_id, ("user", "assistant")[j % 2], " ".join(rng.choices(WORDS, k=60)))
+    db.flush()
+
+
+def time_pages(db, conversation_ids):
+    """대화마다 첫 페이지 조회 지연 시간 (초) 목록 (정렬됨)"""
+    latencies = []
+    for conversation_id in conversation_ids:
+        start = time.perf_counter()
+        db.get_messages_page(conversation_id, limit=MESSAGE_PAGE_SIZE)
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def run(path, sessions, messages, repeat):
+    db = Database(path)
+    before = written_bytes()
+    started = time.perf_counter()
+    populate(db, sessions, messages)
+    db.checkpoint()
+    elapsed = time.perf_counter() - started
+    written = written_bytes() - before if before is not None else None
+    stats = db.storage_stats()
+    rng = random.Random(1)
+    warm = time_pages(db, [1] * repeat)
+    cold = time_pages(db, [rng.randint(1, sessions) for _ in range(repeat)])
+    db.close()
+    return stats, written, elapsed, warm, cold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=5000)
+    parser.add_argument("--messages", type=int, default=10, help="세션마다 시스템 프롬프트 뒤의 메시지 수")
+    parser.add_argument("--repeat", type=int, default=500, help="조회 반복 횟수")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'db MB':>8} {'written MB':>11} {'save s':>7} {'blobs':>7} "
+          f"{'warm p50 ms':>12} {'cold p50 ms':>12} {'cold p95 ms':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, roles in (("inline", ()), ("blobs", database.BLOB_ROLES)):
+            database.BLOB_ROLES = roles
+            stats, written, elapsed, warm, cold = run(
+                os.path.join(tmp, f"{name}.db"), args.sessions, args.messages, args.repeat
+            )
+            written = f"{written / 1e6:>11.1f}" if written is not None else f"{'-':>11}"
+            print(f"{name:<10} {stats['file_bytes'] / 1e6:>8.1f} {written} {elapsed:>7.1f} {stats['blobs']:>7} "
+                  f"{percentile(warm, 0.5) * 1000:>12.3f} {percentile(cold, 0.5) * 1000:>12.3f} "
+                  f"{percentile(cold, 0.95) * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Database 연결 방식별 처리량 비교 벤치마크
+
+호출마다 연결을 여는 기존 방식과 풀링된 WAL 연결을 비교하고,
+자주 쓰는 쿼리가 인덱스를 사용하는지 실행 계획으로 확인합니다.
+
+    python benchmarks/bench_database.py --threads 8 --ops 500
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, HOT_QUERIES  # noqa: E402
+
+
+LEGACY_SCHEMA = """
+CREATE TABLE conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id INTEGER,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class PerCallDatabase:
+    """호출마다 sqlite3.connect 하던 기존 동작을 재현합니다."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.executescript(LEGACY_SCHEMA)
+        conn.close()
+
+    def create_conversation(self, title):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute('INSERT INTO conversations (title) VALUES (?)', (title,))
+        conn.commit()
+        conn.close()
+        return c.lastrowid
+
+    def save_message(self, conversation_id, role, content):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute('INSERT INTO messages (conversation_id, role, content) VALUES (?, ?, ?)',
+                  (conversation_id, role, content))
+        c.execute('UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                  (conversation_id,))
+        conn.commit()
+        conn.close()
+
+    def get_messages(self, conversation_id):
+        conn = sqlite3.connect(self.db_path)
+        c = conn.cursor()
+        c.execute('SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY created_at',
+                  (conversation_id,))
+        rows = c.fetchall()
+        conn.close()
+        return rows
+
+    def flush(self):
+        """save_message가 바로 커밋하므로 남은 쓰기가 없습니다."""
+
+
+def run(db, conversation_ids, ops):
+    """스레드별로 저장/조회를 번갈아 수행하고 (ops/sec, 오류 수)를 반환합니다.
+
+    Database.save_message는 쓰기 대기열에 넣기만 하므로, 대기 중인 메시지가
+    모두 커밋될 때까지를 측정 시간에 포함합니다.
+    """
+    errors = []
+
+    def worker(conversation_id):
+        for i in range(ops):
+            try:
+                if i % 2:
+                    db.get_messages(conversation_id)
+                else:
+                    db.save_message(conversation_id, "user", f"message {i}")
+            except sqlite3.OperationalError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(cid,)) for cid in conversation_ids]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    db.flush()
+    elapsed = time.perf_counter() - start
+    return len(conversation_ids) * ops / elapsed, len(errors)
+
+
+def check_query_plans(db):
+    """각 쿼리의 실행 계획을 출력하고 인덱스 미사용 쿼리 목록을 반환합니다."""
+    failures = []
+    with db._conn() as conn:
+        for name, sql, params in HOT_QUERIES:
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            # SEARCH는 인덱스나 rowid로 찾고, SCAN은 인덱스 순서로 읽을 때만 허용
+            uses_index = not any(step.startswith("SCAN") and "INDEX" not in step for step in plan)
+            uses_index = uses_index and not any("TEMP B-TREE" in step for step in plan)
+            print(f"{name:>30}: {'; '.join(plan)}")
+            if not uses_index:
+                failures.append(name)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (("per-call", PerCallDatabase), ("pooled", Database)):
+            path = os.path.join(tmp, f"{name}.db")
+            db = factory(path)
+            conversation_ids = [db.create_conversation(f"bench {i}") for i in range(args.threads)]
+            ops_per_sec, errors = run(db, conversation_ids, args.ops)
+            print(f"{name:>9}: {ops_per_sec:10.1f} ops/sec  ({errors} locked errors)")
+
+        failures = check_query_plans(Database(os.path.join(tmp, "pooled.db")))
+        if failures:
+            sys.exit(f"full scan in: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""대화 보관과 공간 회수 전후의 DB 크기, 조회 지연 시간, 복원 지연 시간 벤치마크
+
+ADDIE 시스템 프롬프트와 메시지가 있는 합성 대화를 넣고 일부를 오래된 대화로 만든 뒤,
+maintenance.run_maintenance 전후의 DB 크기와 자주 쓰는 조회의 지연 시간을 비교하고
+보관된 대화를 열 때 드는 복원 시간을 잽니다.
+
+    python benchmarks/bench_maintenance.py --conversations 5000 --idle-ratio 0.8
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import maintenance  # noqa: E402
+from database import Database  # noqa: E402
+from prompts import system_prompt  # noqa: E402
+
+MESSAGES_PER_CONVERSATION = 20
+WORDS = (
+    "learning memory working long-term cognitive load schema practice feedback example "
+    "attention retrieval transfer design analysis evaluation objective assessment 학습 기억 설계 평가"
+).split()
+
+IDLE_UPDATED_AT = "2020-01-01 00:00:00"
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def populate(db, conversations, idle_ratio, seed=0):
+    """합성 대화를 넣고 idle_ratio만큼을 오래된 대화로 만듭니다."""
+    rng = random.Random(seed)
+    for i in range(conversations):
+        conversation_id = db.create_conversation(" ".join(rng.choices(WORDS, k=4)))
+        db.save_message(conversation_id, "system", system_prompt.format(
+            analysis_content=" ".join(rng.choices(WORDS, k=300)),
+            design_content=" ".join(rng.choices(WORDS, k=300)),
+        ))
+        for j in range(MESSAGES_PER_CONVERSATION):
+            db.save_message(conversation_id, ("user", "assistant")[j % 2], " ".join(rng.choices(WORDS, k=80)))
+    db.flush()
+    with db._conn() as conn:
+        conn.execute('UPDATE conversations SET updated_at = ? WHERE id <= ?',
+                     (IDLE_UPDATED_AT, int(conversations * idle_ratio)))
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=5000)
+    parser.add_argument("--idle-ratio", type=float, default=0.8, help="보관 대상이 되는 오래된 대화 비율")
+    parser.add_argument("--repeat", type=int, default=50, help="조회 반복 횟수")
+    parser.add_argument("--restores", type=int, default=50, help="복원 지연 시간 측정 횟수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        populate(db, args.conversations, args.idle_ratio)
+        db.checkpoint()
+        stats_before, latency_before = db.storage_stats(), maintenance.measure(db, args.repeat)
+
+        started = time.perf_counter()
+        result = maintenance.run_maintenance(db, maintenance.load_policy({"archive_after_days": 30}))
+        print(f"{result} ({time.perf_counter() - started:.1f}s)\n")
+        maintenance.print_report(stats_before, db.storage_stats(), latency_before, maintenance.measure(db, args.repeat))
+
+        # 보관된 대화를 열 때: 복원 후 첫 페이지 조회
+        restores = []
+        for conversation_id in range(1, min(args.restores, result["archived"]) + 1):
+            start = time.perf_counter()
+            db.restore_conversation(conversation_id)
+            db.get_messages_page(conversation_id, limit=50)
+            restores.append((time.perf_counter() - start) * 1000)
+        restores.sort()
+        if restores:
+            print(f"\n{'open archived':<24} {percentile(restores, 0.5):>14.2f} (p50 ms) "
+                  f"{percentile(restores, 0.95):>10.2f} (p95 ms)")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
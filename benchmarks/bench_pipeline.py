@@ -0,0 +1,188 @@
+"""튜터 파이프라인 단계별 지연 시간, CPU 시간, 메모리 할당 벤치마크
+
+별도 프로세스로 띄운 로컬 OpenAI 호환 서버(mock_openai.py)에 연결하므로 네트워크 없이 실행되며,
+서버 쪽 CPU 사용량은 측정에 포함되지 않습니다. 지연/생성 속도를 0으로 두면 앱 자체의 오버헤드만 측정합니다.
+
+    python benchmarks/bench_pipeline.py --iterations 50
+    python benchmarks/bench_pipeline.py --latency 0.3 --tokens-per-sec 80 --json results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import AsyncOpenAI, OpenAI  # noqa: E402
+
+import api_client  # noqa: E402
+from bench_streaming import CountingPlaceholder  # noqa: E402
+from database import Database  # noqa: E402
+from llm_backend import Router  # noqa: E402
+from sidebar import format_conversations, HISTORY_PAGE_SIZE, MESSAGE_PAGE_SIZE  # noqa: E402
+from streaming import StreamRenderer  # noqa: E402
+from tutor_engine import TutorEngine  # noqa: E402
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_openai.py")
+
+QUESTION = "Explain the difference between working memory and long-term memory"
+FEEDBACK = "This is too hard, can you use easier examples?"
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+class Stage:
+    """단계 하나의 측정 결과"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.cpu_seconds = 0.0
+        self.peak_bytes = 0
+
+    def summary(self):
+        values = sorted(self.latencies)
+        return {
+            "stage": self.name,
+            "n": len(values),
+            "p50_ms": percentile(values, 0.5) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "cpu_ms": self.cpu_seconds / len(values) * 1000,
+            "peak_kb": self.peak_bytes / 1024,
+        }
+
+
+async def _call(func, i):
+    result = func(i)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+async def measure(name, func, iterations):
+    """func(i)를 반복 실행해 지연 시간과 CPU 시간을 재고, 한 번 더 실행해 최대 할당량을 잽니다."""
+    stage = Stage(name)
+    for i in range(iterations):
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        await _call(func, i)
+        stage.latencies.append(time.perf_counter() - start)
+        stage.cpu_seconds += time.process_time() - cpu_start
+
+    # 추적 오버헤드가 지연 시간에 섞이지 않도록 할당량은 별도 실행으로 측정
+    tracemalloc.start()
+    try:
+        await _call(func, iterations)
+        stage.peak_bytes = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return stage
+
+
+def start_mock_server(args):
+    """대체 서버 프로세스를 시작하고 (프로세스, base_url)을 반환합니다."""
+    process = subprocess.Popen(
+        [
+            sys.executable, MOCK_SERVER,
+            "--port", "0",
+            "--latency", str(args.latency),
+            "--tokens-per-sec", str(args.tokens_per_sec),
+            "--chunk-chars", str(args.chunk_chars),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    return process, process.stdout.readline().strip()
+
+
+async def run_stages(db, iterations):
+    api_key = "sk-bench"
+    engine = TutorEngine(Router.single(api_client.get_async_client(api_key)), db)
+    # 요청마다 입력을 달리해 LLM 캐시 적중 없이 실제 요청 경로를 측정
+    stages = [
+        await measure("validate_key", lambda i: api_client.validate_api_key(f"sk-bench-{i}"), iterations),
+        await measure("intent", lambda i: engine.classify_intent(f"{QUESTION} #{i}"), iterations),
+        await measure("framework", lambda i: engine.request_framework(f"{QUESTION} #{i}"), iterations),
+        await measure("feedback", lambda i: engine.analyze_feedback(QUESTION, f"{FEEDBACK} #{i}"), iterations),
+    ]
+
+    # 스트리밍: 대화 준비는 측정에서 제외하고 응답 생성과 렌더링 루프만 측정
+    sessions = []
+    for i in range(iterations + 1):
+        session = engine.session()
+        await session.ensure_conversation(f"{QUESTION} #{i}")
+        await session.add_message("system", "You are a tutor.")
+        await session.add_message("user", QUESTION)
+        sessions.append(session)
+
+    async def stream(i):
+        renderer = StreamRenderer(CountingPlaceholder())
+        async for delta in sessions[i].stream_reply():
+            renderer.feed(delta)
+        renderer.finish()
+
+    stages.append(await measure("stream_render", stream, iterations))
+
+    conversation_id = sessions[0].conversation_id
+    stages += [
+        await measure("db_create_conversation", lambda i: db.create_conversation(f"bench {i}"), iterations),
+        await measure("db_save_message", lambda i: db.save_message(conversation_id, "user", f"{QUESTION} #{i}"),
+                      iterations),
+        await measure("db_messages_page", lambda i: db.get_messages_page(conversation_id, limit=MESSAGE_PAGE_SIZE),
+                      iterations),
+        await measure(
+            "sidebar_history",
+            lambda i: format_conversations(db.get_conversations_page(limit=HISTORY_PAGE_SIZE)[0]),
+            iterations,
+        ),
+    ]
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.0, help="대체 서버의 첫 응답 지연 (초)")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="대체 서버의 생성 속도 (0이면 지연 없음)")
+    parser.add_argument("--chunk-chars", type=int, default=4, help="스트리밍 청크당 글자 수")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로")
+    args = parser.parse_args()
+
+    process, base_url = start_mock_server(args)
+    try:
+        api_client.client_factory = partial(OpenAI, base_url=base_url, max_retries=0)
+        api_client.async_client_factory = partial(AsyncOpenAI, base_url=base_url, max_retries=0)
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, "bench.db"))
+            # 단계마다 출력되는 로그는 결과 표만 보이도록 숨김
+            with contextlib.redirect_stdout(io.StringIO()):
+                stages = asyncio.run(run_stages(db, args.iterations))
+            db.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+    results = [stage.summary() for stage in stages]
+    print(f"{'stage':<24} {'n':>4} {'p50 ms':>9} {'p95 ms':>9} {'cpu ms':>9} {'peak KB':>9}")
+    for r in results:
+        print(f"{r['stage']:<24} {r['n']:>4} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['cpu_ms']:>9.2f} {r['peak_kb']:>9.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"options": vars(args), "stages": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
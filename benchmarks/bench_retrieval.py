@@ -0,0 +1,69 @@
+"""참조 문서 전체 삽입과 청크 검색 방식의 프롬프트 크기/시간 비교 벤치마크
+
+    python benchmarks/bench_retrieval.py --copies 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import PyPDF2  # noqa: E402
+
+from database import Database  # noqa: E402
+from retrieval import TOP_K, format_reference, get_index, retrieve, split_into_chunks  # noqa: E402
+
+PDF_PATH = os.path.join(ROOT, "ADDIE_Model_All_Stages_Detailed_Concepts_with_References.pdf")
+
+QUERIES = (
+    "Explain how to write measurable learning objectives",
+    "What is the difference between formative and summative evaluation?",
+    "I want to learn about Gagne's nine events of instruction",
+    "인간공학에서 작업 부하 측정 방법을 배우고 싶어요",
+)
+
+
+def estimate_tokens(chars):
+    """대략적인 토큰 수 (영문 기준 4자당 1토큰)"""
+    return chars // 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=1,
+                        help="참조 문서를 여러 개 추가한 상황을 흉내 내기 위해 PDF를 복제할 횟수")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    with open(PDF_PATH, "rb") as file:
+        pages = [page.extract_text() or "" for page in PyPDF2.PdfReader(file).pages]
+
+    full_document = "".join(pages) * args.copies
+    print(f"full document : {len(full_document):8d} chars  ~{estimate_tokens(len(full_document)):6d} tokens per prompt")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+
+        start = time.perf_counter()
+        for copy in range(args.copies):
+            db.save_reference_chunks(f"copy-{copy}", split_into_chunks(pages))
+        get_index(db)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"index build   : {build_ms:8.2f} ms for {len(db.get_reference_chunks())} chunks")
+
+        sizes = []
+        start = time.perf_counter()
+        for query in QUERIES:
+            sizes.append(len(format_reference(retrieve(db, query, args.k))))
+        query_ms = (time.perf_counter() - start) * 1000 / len(QUERIES)
+        average = sum(sizes) // len(sizes)
+        print(f"top-{args.k} chunks  : {average:8d} chars  ~{estimate_tokens(average):6d} tokens per prompt")
+        print(f"query         : {query_ms:8.3f} ms per query")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""대화 기록 전문 검색 (FTS5) 지연 시간 벤치마크
+
+합성한 대화와 메시지를 색인과 함께 넣은 뒤 드문 단어, 흔한 단어, 여러 단어, 접두어, 조사가 붙은 단어 검색의
+Database.search 지연 시간 분위수를 재고, 같은 단어를 LIKE로 찾는 검색과 비교합니다.
+(LIKE는 결과 수만큼 찾으면 멈추므로 드물거나 없는 단어에서 전체 검색 비용이 드러남)
+
+    python benchmarks/bench_search.py --messages 1000000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+MESSAGES_PER_CONVERSATION = 20
+WORDS_PER_MESSAGE = 30
+INSERT_BATCH = 20000
+
+# 드문 단어로 쓰는 합성 단어 수와 음절
+TAIL_WORDS = 20000
+SYLLABLES = "ka ko ri mo ne sa tu be lo fi gra ter pon dul mix ve ra zu ni ho".split()
+
+# 흔한 단어가 앞에 오도록 정렬한 어휘 (뒤에 합성 단어를 붙여 지프 분포로 뽑음)
+DOMAIN_WORDS = (
+    "the of and to learning memory 학습 기억 is in 작업 설계 cognitive load model 분석 "
+    "attention 주의 example 예시 design instruction 교수 evaluation 평가 feedback 피드백 "
+    "working long-term schema 스키마 capacity 용량 retrieval 인출 practice 연습 transfer 전이 "
+    "motivation 동기 objective 목표 assessment 측정 ergonomics 인간공학 fitts hick 반응시간 "
+    "workload 작업부하 usability 사용성 interface 인터페이스 error 오류 signal detection 신호탐지 "
+    "anthropometry 인체측정 vigilance 경계 situation awareness 상황인식 automation 자동화 "
+    "chloroplasts 미분방정식은 미분방정식을"
+).split()
+
+# (이름, 검색어)
+QUERIES = (
+    ("common word", "learning"),
+    ("common korean", "학습"),
+    ("two words", "working memory"),
+    ("mid word", "vigilance"),
+    ("mid korean", "상황인식"),
+    ("prefix", "ergo"),
+    ("long prefix", "chloroplast"),
+    ("korean stem", "미분방정식"),
+    ("no match", "quaternion"),
+    ("long no match", "learnability"),
+)
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def vocabulary(seed=0):
+    """도메인 단어 뒤에 합성한 드문 단어를 붙인 어휘"""
+    rng = random.Random(seed)
+    tail = set()
+    while len(tail) < TAIL_WORDS:
+        tail.add("".join(rng.choices(SYLLABLES, k=rng.randint(3, 5))))
+    return DOMAIN_WORDS + sorted(tail)
+
+
+def populate(db, messages, words, seed=0):
+    """합성 대화와 메시지를 트리거로 색인하며 넣습니다."""
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+    conversations = max(1, messages // MESSAGES_PER_CONVERSATION)
+    with db._conn() as conn:
+        conn.executemany(
+            'INSERT INTO conversations (id, title) VALUES (?, ?)',
+            [(i + 1, " ".join(rng.choices(words, cum_weights=weights, k=5))) for i in range(conversations)],
+        )
+        conn.commit()
+        for start in range(0, messages, INSERT_BATCH):
+            rows = []
+            for i in range(start, min(messages, start + INSERT_BATCH)):
+                role = "system" if i % MESSAGES_PER_CONVERSATION == 0 else ("user", "assistant")[i % 2]
+                content = " ".join(rng.choices(words, cum_weights=weights, k=WORDS_PER_MESSAGE))
+                rows.append((i + 1, i // MESSAGES_PER_CONVERSATION + 1, role, content))
+            conn.executemany(
+                'INSERT INTO messages (id, conversation_id, role, content) VALUES (?, ?, ?, ?)', rows
+            )
+            conn.commit()
+        conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+        conn.commit()
+
+
+def time_calls(func, repeat):
+    """func를 repeat번 호출한 지연 시간 (초) 목록 (정렬됨)"""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return sorted(latencies)
+
+
+def like_search(db, term, limit):
+    """색인 없이 LIKE로 찾던 방식"""
+    with db._conn() as conn:
+        return conn.execute(
+            "SELECT conversation_id, id FROM messages WHERE role != 'system' AND content LIKE ? LIMIT ?",
+            (f"%{term}%", limit),
+        ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50, help="검색어마다 반복 횟수")
+    parser.add_argument("--limit", type=int, default=20, help="검색 결과 수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.db"))
+        start = time.perf_counter()
+        words = vocabulary()
+        populate(db, args.messages, words)
+        print(f"indexed {args.messages} messages in {time.perf_counter() - start:.1f}s")
+
+        print(f"{'query':<14} {'results':>8} {'p50 ms':>9} {'p95 ms':>9} {'LIKE p50 ms':>12}")
+        # 드문 단어는 합성 단어 중간 순위에서 고름
+        queries = QUERIES + (("rare word", words[len(DOMAIN_WORDS) + TAIL_WORDS // 2]),)
+        for name, query in queries:
+            results = len(db.search(query, limit=args.limit))
+            latencies = time_calls(lambda: db.search(query, limit=args.limit), args.repeat)
+            # LIKE는 느리므로 몇 번만 (여러 단어는 첫 단어로)
+            like = time_calls(lambda: like_search(db, query.split()[0], args.limit * 5), 3)
+            print(f"{name:<14} {results:>8} {percentile(latencies, 0.5) * 1000:>9.2f} "
+                  f"{percentile(latencies, 0.95) * 1000:>9.2f} {percentile(like, 0.5) * 1000:>12.2f}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
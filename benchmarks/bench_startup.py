@@ -0,0 +1,120 @@
+"""앱 콜드 스타트와 rerun 오버헤드 벤치마크
+
+- cold import: 새 프로세스에서 main.py가 쓰는 모듈을 가져오는 시간
+- first run: 프로세스에서 처음 main.py를 실행하는 시간 (DB 생성/마이그레이션, API 키 검증 포함)
+- rerun: 입력 없이 main.py를 다시 실행하는 시간 (위젯을 조작할 때마다 드는 고정 비용)
+- empty rerun: 제목만 있는 스크립트의 rerun 시간 (AppTest 자체 오버헤드 기준값)
+
+스크립트 실행은 streamlit.testing의 AppTest로 하며, API 키 검증은 별도 프로세스로 띄운
+로컬 대체 서버(mock_openai.py)에 연결합니다. AppTest는 실행마다 스크립트를 다시 컴파일하므로
+(실제 서버는 컴파일 결과를 캐시) 앱의 rerun 비용은 rerun과 empty rerun의 차이로 봅니다.
+
+    python benchmarks/bench_startup.py --reruns 50
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from functools import partial
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from openai import AsyncOpenAI, OpenAI  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import api_client  # noqa: E402
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_openai.py")
+
+# main.py가 가져오는 앱 모듈 (streamlit 자체는 실행 환경이므로 미리 가져온 뒤 측정)
+APP_MODULES = (
+    "utils", "sidebar", "database", "api_client", "llm_backend", "streaming", "ingest", "maintenance",
+    "tutor_engine", "tracing",
+)
+
+COLD_IMPORT = (
+    "import time, streamlit; start = time.perf_counter(); "
+    f"import {', '.join(APP_MODULES)}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def cold_import(repeat):
+    """새 프로세스에서 앱 모듈을 가져오는 시간 (초) 목록"""
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_IMPORT], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return sorted(times)
+
+
+EMPTY_APP = 'import streamlit as st\nst.title("AI Tutor")\n'
+
+
+def run_app(reruns, api_key=None, script=None):
+    """(첫 실행 시간, rerun 시간 목록)을 초 단위로 반환합니다. script가 있으면 main.py 대신 실행합니다."""
+    if script is not None:
+        app = AppTest.from_string(script, default_timeout=60)
+    else:
+        app = AppTest.from_file(os.path.join(ROOT, "main.py"), default_timeout=60)
+        app.secrets["openai"] = {"api_key": api_key}
+    start = time.perf_counter()
+    app.run()
+    first = time.perf_counter() - start
+    if app.exception:
+        sys.exit(f"app failed: {app.exception[0].message}")
+    times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        times.append(time.perf_counter() - start)
+    return first, sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reruns", type=int, default=50)
+    parser.add_argument("--imports", type=int, default=5, help="콜드 import 측정 횟수")
+    args = parser.parse_args()
+
+    imports = cold_import(args.imports)
+
+    process = subprocess.Popen([sys.executable, MOCK_SERVER, "--port", "0"], stdout=subprocess.PIPE, text=True)
+    base_url = process.stdout.readline().strip()
+    try:
+        api_client.client_factory = partial(OpenAI, base_url=base_url, max_retries=0)
+        api_client.async_client_factory = partial(AsyncOpenAI, base_url=base_url, max_retries=0)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            # conversations.db를 임시 디렉터리에 만들도록 작업 디렉터리 변경
+            os.chdir(tmp)
+            try:
+                first, reruns = run_app(args.reruns, "sk-bench")
+                _, empty = run_app(args.reruns, script=EMPTY_APP)
+            finally:
+                os.chdir(cwd)
+    finally:
+        process.terminate()
+        process.wait()
+
+    print(f"{'stage':<14} {'n':>4} {'p50 ms':>9} {'p95 ms':>9}")
+    print(f"{'cold import':<14} {len(imports):>4} {percentile(imports, 0.5) * 1000:>9.1f} "
+          f"{percentile(imports, 0.95) * 1000:>9.1f}")
+    print(f"{'first run':<14} {1:>4} {first * 1000:>9.1f} {first * 1000:>9.1f}")
+    for name, times in (("rerun", reruns), ("empty rerun", empty)):
+        print(f"{name:<14} {len(times):>4} {percentile(times, 0.5) * 1000:>9.1f} "
+              f"{percentile(times, 0.95) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
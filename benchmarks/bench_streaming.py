@@ -0,0 +1,88 @@
+"""스트리밍 렌더링 방식별 CPU 시간과 전송량 비교 벤치마크
+
+토큰마다 전체 텍스트를 변환/전송하던 기존 방식과 StreamRenderer를 비교합니다.
+토큰 도착 간격은 가상 시계로 흉내 냅니다.
+
+    python benchmarks/bench_streaming.py --chars 20000 --tokens-per-sec 80
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from streaming import StreamRenderer  # noqa: E402
+from utils import render_with_latex  # noqa: E402
+
+SAMPLE = (
+    "인지 부하 이론에서 작업 기억 용량은 제한적입니다. "
+    "예를 들어 정보량은 \\(H = \\log_2 N\\) 로 나타내며, "
+    "반응 시간은 Hick-Hyman 법칙에 따라\n\\[RT = a + b \\log_2 (N + 1)\\]\n로 표현됩니다.\n"
+)
+
+
+class CountingPlaceholder:
+    """st.empty() 대신 호출 횟수와 전송 바이트만 기록합니다."""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def markdown(self, body):
+        self.calls += 1
+        self.bytes += len(body.encode("utf-8"))
+
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_deltas(chars, size=4):
+    """약 size 글자 단위의 토큰 델타 목록을 만듭니다."""
+    text = (SAMPLE * (chars // len(SAMPLE) + 1))[:chars]
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def run_legacy(deltas, clock, step):
+    placeholder = CountingPlaceholder()
+    full_response = ""
+    for delta in deltas:
+        clock.now += step
+        full_response += delta
+        placeholder.markdown(render_with_latex(full_response + "▌"))
+    return placeholder.calls, placeholder.bytes
+
+
+def run_renderer(deltas, clock, step):
+    placeholder = CountingPlaceholder()
+    renderer = StreamRenderer(placeholder, clock=clock)
+    for delta in deltas:
+        clock.now += step
+        renderer.feed(delta)
+    renderer.finish()
+    return placeholder.calls, placeholder.bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chars", type=int, default=20000)
+    parser.add_argument("--tokens-per-sec", type=float, default=80)
+    args = parser.parse_args()
+
+    deltas = make_deltas(args.chars)
+    step = 1 / args.tokens_per_sec
+    print(f"{len(deltas)} deltas, {args.chars} chars")
+    for name, run in (("per-token", run_legacy), ("renderer", run_renderer)):
+        start = time.process_time()
+        frames, emitted = run(deltas, VirtualClock(), step)
+        cpu_ms = (time.process_time() - start) * 1000
+        print(f"{name:>10}: {cpu_ms:9.1f} ms CPU  {frames:6d} frames  {emitted / 1e6:9.2f} MB emitted")
+
+
+if __name__ == "__main__":
+    main()
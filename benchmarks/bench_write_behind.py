@@ -0,0 +1,97 @@
+"""메시지 쓰기 지연(write-behind)과 메시지마다 커밋하던 기존 방식 비교 벤치마크
+
+여러 세션 스레드가 동시에 대화 턴(사용자 메시지 저장, 최근 메시지 조회, 응답 저장)을 반복하며
+턴당 DB 처리 시간의 분위수와 초당 저장 메시지 수를 잽니다.
+쓰기 지연 쪽 처리량은 마지막 flush로 모두 기록될 때까지의 시간으로 계산합니다.
+
+    python benchmarks/bench_write_behind.py --sessions 8 --turns 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+from sidebar import MESSAGE_PAGE_SIZE  # noqa: E402
+
+QUESTION = "Explain the difference between working memory and long-term memory"
+ANSWER = "Working memory holds a few items for seconds; long-term memory is durable. " * 10
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+class PerMessageCommitDatabase(Database):
+    """메시지마다 INSERT, updated_at 갱신, 커밋을 바로 하던 기존 동작을 재현합니다."""
+
+    def save_message(self, conversation_id, role, content):
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute('INSERT INTO messages (conversation_id, role, content) VALUES (?, ?, ?)',
+                      (conversation_id, role, content))
+            message_id = c.lastrowid
+            c.execute('UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                      (conversation_id,))
+            conn.commit()
+        self._touch_history()
+        return message_id
+
+
+def run(db, sessions, turns):
+    """세션 스레드별로 턴을 반복하고 (턴 지연 시간 목록, 전체 소요 시간)을 반환합니다."""
+    conversation_ids = [db.create_conversation(f"bench {i}") for i in range(sessions)]
+    latencies = [[] for _ in conversation_ids]
+    barrier = threading.Barrier(sessions + 1)
+
+    def worker(index, conversation_id):
+        barrier.wait()
+        for i in range(turns):
+            start = time.perf_counter()
+            db.save_message(conversation_id, "user", f"{QUESTION} #{i}")
+            db.get_messages_page(conversation_id, limit=MESSAGE_PAGE_SIZE)
+            db.save_message(conversation_id, "assistant", ANSWER)
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i, cid)) for i, cid in enumerate(conversation_ids)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    db.flush()
+    elapsed = time.perf_counter() - start
+
+    # 모든 메시지가 실제로 기록되었는지 확인
+    with db._conn() as conn:
+        saved = conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+    if saved != sessions * turns * 2:
+        sys.exit(f"expected {sessions * turns * 2} messages, found {saved}")
+    return sorted(value for values in latencies for value in values), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=8, help="동시 세션 (스레드) 수")
+    parser.add_argument("--turns", type=int, default=200, help="세션당 턴 수")
+    args = parser.parse_args()
+
+    writes = args.sessions * args.turns * 2
+    print(f"{'mode':<20} {'turn p50 ms':>12} {'turn p95 ms':>12} {'writes/sec':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, factory in (("per-message commit", PerMessageCommitDatabase), ("write-behind", Database)):
+            db = factory(os.path.join(tmp, f"{name.replace(' ', '-')}.db"))
+            latencies, elapsed = run(db, args.sessions, args.turns)
+            db.close()
+            print(f"{name:<20} {percentile(latencies, 0.5) * 1000:>12.3f} "
+                  f"{percentile(latencies, 0.95) * 1000:>12.3f} {writes / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""로컬 OpenAI 호환 대체 서버 (네트워크 없이 벤치마크용)
+
+/v1/models와 /v1/chat/completions(스트리밍 포함)를 흉내 내며, 첫 응답까지의 지연,
+초당 토큰 수, 스트리밍 청크 크기를 설정할 수 있습니다. 응답 내용은 프롬프트 종류에 맞춰 고릅니다.
+
+    python benchmarks/mock_openai.py --port 8765 --latency 0.2 --tokens-per-sec 80
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL = "gpt-4o-mini"
+
+# 대략 4글자당 1토큰으로 계산
+CHARS_PER_TOKEN = 4
+
+ANSWER = (
+    "인지 부하 이론에서 작업 기억 용량은 제한적입니다. "
+    "예를 들어 정보량은 \\(H = \\log_2 N\\) 로 나타내며, "
+    "반응 시간은 Hick-Hyman 법칙에 따라\n\\[RT = a + b \\log_2 (N + 1)\\]\n로 표현됩니다.\n"
+) * 8
+
+FRAMEWORK = {
+    "analysis_content": "Learner: first-year master's student in Human Factors. " * 20,
+    "design_content": "Objectives, sequencing and strategies for a chatbot tutor. " * 20,
+}
+
+
+def reply_for(messages):
+    """프롬프트 종류에 맞는 응답 본문을 고릅니다."""
+    prompt = messages[-1]["content"]
+    if "Classify the intent" in prompt:
+        return json.dumps({"intent": "Learning", "confidence": 0.9, "reason": "Concept explanation request."})
+    if "Generate a system prompt" in prompt:
+        return json.dumps(FRAMEWORK)
+    if "Analyze the user's feedback" in prompt:
+        return json.dumps({
+            "status": "evaluation",
+            "reason": "The learner asked for easier explanations.",
+            "suggested_adjustment": "Use simpler examples\nCheck understanding more often",
+        })
+    if "supposed to be a single JSON object" in prompt:
+        return json.dumps(FRAMEWORK)
+    if "running summary" in prompt:
+        return "The learner is studying cognitive load and Hick-Hyman law."
+    return ANSWER
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, tokens_per_sec=0.0, chunk_chars=CHARS_PER_TOKEN,
+                 reject_stream_options=False):
+        super().__init__(address, MockOpenAIHandler)
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_chars = chunk_chars
+        # stream_options를 모르는 OpenAI 호환 서버처럼 400으로 거부
+        self.reject_stream_options = reject_stream_options
+        self.requests = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def generation_delay(self, chars):
+        """chars 글자를 생성하는 데 걸리는 시간"""
+        if not self.tokens_per_sec:
+            return 0.0
+        return chars / CHARS_PER_TOKEN / self.tokens_per_sec
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({
+                "object": "list",
+                "data": [{"id": MODEL, "object": "model", "created": 0, "owned_by": "mock"}],
+            })
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        server.requests += 1
+        if server.reject_stream_options and "stream_options" in request:
+            self._send_json({"error": {
+                "message": "Unrecognized request argument supplied: stream_options",
+                "type": "invalid_request_error",
+            }}, status=400)
+            return
+        content = reply_for(request["messages"])
+        model = request.get("model", MODEL)
+        time.sleep(server.latency)
+        if request.get("stream"):
+            self._stream(model, content)
+            return
+
+        time.sleep(server.generation_delay(len(content)))
+        prompt_chars = sum(len(m["content"]) for m in request["messages"])
+        self._send_json({
+            "id": f"chatcmpl-mock-{server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_chars // CHARS_PER_TOKEN,
+                "completion_tokens": len(content) // CHARS_PER_TOKEN,
+                "total_tokens": (prompt_chars + len(content)) // CHARS_PER_TOKEN,
+            },
+        })
+
+    def _stream(self, model, content):
+        server = self.server
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        created = int(time.time())
+
+        def event(delta, finish_reason=None):
+            chunk = {
+                "id": f"chatcmpl-mock-{server.requests}",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        step = server.chunk_chars
+        for i in range(0, len(content), step):
+            piece = content[i:i + step]
+            time.sleep(server.generation_delay(len(piece)))
+            event({"content": piece})
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def start_server(host="127.0.0.1", port=0, **options):
+    """백그라운드 스레드에서 서버를 시작하고 서버 객체를 반환합니다. (port=0이면 빈 포트 사용)"""
+    server = MockOpenAIServer((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="첫 응답까지의 지연 (초)")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="생성 속도 (0이면 지연 없음)")
+    parser.add_argument("--chunk-chars", type=int, default=CHARS_PER_TOKEN, help="스트리밍 청크당 글자 수")
+    parser.add_argument("--reject-stream-options", action="store_true",
+                        help="stream_options를 400으로 거부 (지원하지 않는 호환 서버 흉내)")
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(
+        (args.host, args.port),
+        latency=args.latency,
+        tokens_per_sec=args.tokens_per_sec,
+        chunk_chars=args.chunk_chars,
+        reject_stream_options=args.reject_stream_options,
+    )
+    # 벤치마크가 포트를 알 수 있도록 첫 줄에 주소 출력
+    print(server.base_url, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import asyncio
+import re
+from functools import lru_cache
+
+import tracing
+from prompts import conversation_summary_prompt
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# 요청 한 번에 보낼 대화 맥락의 토큰 예산
+CONTEXT_TOKEN_BUDGET = 8000
+
+# 예산과 무관하게 그대로 보낼 최근 메시지 수
+MIN_RECENT_MESSAGES = 6
+
+# 예산을 넘어 요약할 때 최근 메시지를 남길 비율 (남은 예산 대비)
+FOLD_TARGET_RATIO = 0.6
+
+# 요약 길이와 요약 요청 설정
+SUMMARY_MAX_WORDS = 250
+SUMMARY_MAX_TOKENS = 600
+
+# 메시지마다 붙는 role 등 고정 토큰
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_HEADER = "[Conversation Summary]\nEarlier parts of this conversation, summarized:\n"
+
+ASCII_PATTERN = re.compile(r"[\x00-\x7f]")
+
+
+@lru_cache(maxsize=1)
+def get_encoding():
+    """gpt-4o 계열 토크나이저를 한 번만 불러옵니다. 사용할 수 없으면 None"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text):
+    """텍스트의 토큰 수를 셉니다. 토크나이저가 없으면 추정치를 반환합니다."""
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # 영문은 약 4자당 1토큰, 한글 등 비ASCII 문자는 약 1자당 1토큰
+    ascii_chars = len(ASCII_PATTERN.findall(text))
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def message_tokens(message):
+    """메시지 하나의 토큰 수"""
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_pinned(messages):
+    """메시지를 (고정 시스템 프롬프트, 나머지)로 나눕니다."""
+    if messages and messages[0]["role"] == "system":
+        return messages[:1], messages[1:]
+    return [], messages
+
+
+def split_context(messages, through_id=None, summary="", budget=CONTEXT_TOKEN_BUDGET,
+                  min_recent=MIN_RECENT_MESSAGES, system_suffix=""):
+    """메시지를 (고정 시스템 프롬프트, 요약에 접을 메시지, 그대로 보낼 최근 메시지)로 나눕니다.
+
+    through_id 이하의 메시지는 이미 요약에 포함된 것으로 보고 제외하며,
+    system_suffix(시스템 프롬프트 뒤에 붙일 내용)도 예산에 포함합니다.
+    """
+    pinned, rest = split_pinned(messages)
+    if through_id is not None:
+        rest = [m for m in rest if m.get("id") is None or m["id"] > through_id]
+
+    available = budget - sum(message_tokens(m) for m in pinned)
+    if system_suffix:
+        available -= count_tokens(system_suffix)
+    if summary:
+        available -= count_tokens(SUMMARY_HEADER + summary) + MESSAGE_OVERHEAD_TOKENS
+
+    cut = _keep_recent(rest, available, min_recent)
+    if cut > 0:
+        # 접어야 할 때는 여유를 두고 접어서 매 턴마다 요약하지 않도록 함
+        cut = _keep_recent(rest, int(available * FOLD_TARGET_RATIO), min_recent)
+    return pinned, rest[:cut], rest[cut:]
+
+
+def _keep_recent(messages, available, min_recent):
+    """최신 메시지부터 예산 안에 들어가는 만큼 유지했을 때 잘리는 위치를 반환합니다."""
+    cut = len(messages)
+    used = 0
+    while cut > 0:
+        tokens = message_tokens(messages[cut - 1])
+        if len(messages) - cut >= min_recent and used + tokens > available:
+            break
+        used += tokens
+        cut -= 1
+    return cut
+
+
+def build_payload(pinned, summary, recent, system_suffix=""):
+    """API로 보낼 메시지 목록 (role, content만 포함)을 만듭니다."""
+    payload = [{"role": m["role"], "content": m["content"]} for m in pinned]
+    if system_suffix:
+        if payload:
+            payload[0]["content"] = payload[0]["content"].rstrip() + "\n\n" + system_suffix
+        else:
+            payload.append({"role": "system", "content": system_suffix})
+    if summary:
+        payload.append({"role": "system", "content": SUMMARY_HEADER + summary})
+    payload.extend({"role": m["role"], "content": m["content"]} for m in recent)
+    return payload
+
+
+async def summarize(client, previous_summary, messages):
+    """기존 요약에 새 메시지를 더해 갱신된 요약을 반환합니다.
+
+    client는 요약 단계의 라우트(llm_backend.StageRoute)이며 모델은 라우트 설정을 따릅니다.
+    """
+    new_messages = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = conversation_summary_prompt.format(
+        previous_summary=previous_summary or "(none)",
+        new_messages=new_messages,
+        max_words=SUMMARY_MAX_WORDS,
+    )
+    with tracing.span("llm.summary", messages=len(messages)) as span:
+        response = await client.chat.completions.create(
+            model=client.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=SUMMARY_MAX_TOKENS
+        )
+        if response.usage:
+            span.set(
+                prompt_tokens=response.usage.prompt_tokens,
+                completion_tokens=response.usage.completion_tokens
+            )
+    return response.choices[0].message.content.strip()
+
+
+def unloaded_messages(db, conversation_id, messages, through_id=None):
+    """세션에 불러오지 않은 이전 메시지 중 아직 요약에 포함되지 않은 메시지 목록
+
+    긴 대화를 다시 열면 화면에 표시할 최근 메시지만 세션에 불러오므로, 고정 시스템 프롬프트
+    (또는 요약된 위치)와 세션의 첫 메시지 사이의 메시지를 DB에서 가져와 맥락에 포함합니다.
+    """
+    pinned, rest = split_pinned(messages)
+    loaded_ids = [m["id"] for m in rest if m.get("id") is not None]
+    if not conversation_id or not loaded_ids:
+        return []
+    after_id = max(through_id or 0, pinned[0].get("id") or 0 if pinned else 0)
+    rows = db.get_messages_between(conversation_id, after_id, loaded_ids[0])
+    return [{"role": role, "content": content, "id": message_id} for message_id, role, content in rows]
+
+
+async def prepare_messages(client, db, conversation_id, messages, state, budget=CONTEXT_TOKEN_BUDGET,
+                           system_suffix=""):
+    """토큰 예산에 맞춘 요청용 메시지 목록을 반환합니다.
+
+    state는 세션별 요약 캐시(dict)이며, 예산을 넘는 오래된 메시지가 생길 때만
+    그 메시지들을 기존 요약에 더해 요약을 갱신하고 DB에 저장합니다.
+    세션에 최근 메시지만 불러온 경우 불러오지 않은 이전 메시지도 (처음 한 번 DB에서 읽어) 맥락에 포함합니다.
+    system_suffix는 첫 시스템 프롬프트 뒤에 붙여 보냅니다.
+    """
+    if state.get("conversation_id") != conversation_id:
+        stored = await asyncio.to_thread(db.get_summary, conversation_id) if conversation_id else None
+        through_id = stored[0] if stored else None
+        state.clear()
+        state.update(
+            conversation_id=conversation_id,
+            through_id=through_id,
+            summary=stored[1] if stored else "",
+            unloaded=await asyncio.to_thread(unloaded_messages, db, conversation_id, messages, through_id),
+        )
+
+    pinned, rest = split_pinned(messages)
+    pinned, to_fold, recent = split_context(
+        pinned + state["unloaded"] + rest, state["through_id"], state["summary"], budget,
+        system_suffix=system_suffix
+    )
+    folded_ids = [m["id"] for m in to_fold if m.get("id") is not None]
+    if to_fold and folded_ids:
+        state["summary"] = await summarize(client, state["summary"], to_fold)
+        state["through_id"] = max(folded_ids)
+        # 요약에 접힌 이전 메시지는 더 보관하지 않음
+        state["unloaded"] = [m for m in state["unloaded"] if m["id"] > state["through_id"]]
+        if conversation_id:
+            await asyncio.to_thread(db.save_summary, conversation_id, state["through_id"], state["summary"])
+    else:
+        # DB id가 없는 메시지는 요약 위치를 기록할 수 없으므로 그대로 보냄
+        recent = to_fold + recent
+    return build_payload(pinned, state["summary"], recent, system_suffix)
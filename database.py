@@ -1,134 +1,1603 @@
+import argparse
+import atexit
+import hashlib
+import heapq
 import sqlite3
 import json
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
+import tracing
+from tracing import traced
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 잠금 대기 시간 (밀리초)
+BUSY_TIMEOUT_MS = 5000
+
+# 풀에 보관할 최대 유휴 연결 수
+POOL_SIZE = 8
+
+# 메시지 쓰기 지연: 모아서 쓰는 간격 (초)과 한 트랜잭션에 쓰는 최대 메시지 수
+WRITE_BEHIND_INTERVAL = 0.2
+WRITE_BEHIND_BATCH = 200
+
+# 쓰기에 실패한 메시지를 다시 시도하는 최대 횟수 (넘으면 대기열에서 빼서 failed에 보관)
+WRITE_BEHIND_ATTEMPTS = 5
+
+# 내보내기 시 한 번에 읽어 오는 행 수
+EXPORT_FETCH_SIZE = 500
+
+# 전문 검색 토크나이저 (한글/영문 단어 단위, 발음 구별 기호 무시)와 접두어 색인 길이
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+FTS_PREFIX = "2 3 4"
+
+# 검색 색인 전체 재구성 (external content 테이블에서 다시 읽으며,
+# 'rebuild'는 시스템 프롬프트까지 색인하므로 재구성 후 다시 제외)
+SEARCH_BACKFILL = (
+    "INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')",
+    "INSERT INTO messages_fts (messages_fts, rowid, content) "
+    "SELECT 'delete', id, content FROM messages WHERE role = 'system'",
+    "INSERT INTO conversations_fts (conversations_fts) VALUES ('rebuild')",
+)
+
+# 검색어에서 단어를 뽑는 패턴
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+")
+
+# 점수를 매길 후보 메시지 수 (일치하는 메시지 중 최근 것부터)
+SEARCH_CANDIDATES = 200
+
+# 접두어 색인이 있는 최대 단어 길이 (FTS_PREFIX의 가장 긴 값)
+SEARCH_PREFIX_INDEXED = 4
+
+# 이보다 많은 메시지에 나오는 긴 단어는 접두어 검색 대신 색인된 앞부분으로 찾아 거름
+# (접두어 검색은 일치하는 문서 목록을 모두 읽으므로 흔한 단어에서만 느림)
+SEARCH_COMMON_DOCS = 5000
+
+# 긴 단어를 색인된 앞부분으로 찾을 때 걸러 볼 최대 메시지 수 (넘으면 단어 전체를 접두어로 다시 검색)
+SEARCH_SCAN_LIMIT = 2000
+
+# 점수 계산의 단어 빈도 포화/길이 보정 계수 (BM25와 같은 의미)
+SEARCH_K1 = 1.2
+SEARCH_B = 0.75
+
+# 스니펫 강조 표시 (마크다운 굵게)와 일치 위치 앞뒤로 보여 줄 글자 수
+SNIPPET_MARK = "**"
+SNIPPET_BEFORE = 30
+SNIPPET_AFTER = 90
+
+# 보관 대화 압축 방식 (zstandard가 있으면 zstd, 없으면 zlib)과 압축 수준
+ARCHIVE_CODEC = "zstd" if zstandard else "zlib"
+ARCHIVE_ZLIB_LEVEL = 9
+ARCHIVE_ZSTD_LEVEL = 10
+
+# 한 번에 보관하는 최대 대화 수 (대화마다 트랜잭션 하나)
+ARCHIVE_BATCH = 100
+
+# 내용 주소 방식(조각의 SHA-256으로 중복 제거)으로 저장할 메시지 역할과 최소 길이
+# (대화마다 반복되는 시스템 프롬프트만, 검색 색인 대상인 역할은 본문을 그대로 둠)
+BLOB_ROLES = ("system",)
+BLOB_MIN_CHARS = 256
+
+# 본문을 조각으로 나누는 위치 (줄 첫머리의 [섹션] 제목 앞)
+# 시스템 프롬프트의 고정된 [Teaching Guidelines] 등이 대화마다 같은 조각이 됨
+SEGMENT_PATTERN = re.compile(r"(?=\n\[)")
+
+# 읽은 본문 조각을 보관하는 LRU 캐시 크기 (조각 수, DB 경로마다)
+BLOB_CACHE_SIZE = 512
+
+# 시각 열의 형식 (UTC, CURRENT_TIMESTAMP와 같음)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 연결마다 적용할 PRAGMA 설정
+CONNECTION_PRAGMAS = (
+    # 새 DB는 빈 페이지를 조금씩 돌려줄 수 있게 만듦 (WAL 전환 등으로 파일이 만들어지기 전에만 적용되며,
+    # 기존 DB는 maintenance.py --enable-incremental-vacuum으로 전환)
+    "PRAGMA auto_vacuum = INCREMENTAL",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",
+)
+
+# 대화 목록과 대화 메시지를 읽는 자주 쓰는 쿼리 (tests/test_query_plans.py에서 인덱스 사용을 확인)
+CONVERSATIONS_PAGE_SQL = '''
+    SELECT id, title, created_at, updated_at
+    FROM conversations
+    ORDER BY updated_at DESC, id DESC
+    LIMIT ?
+'''
+CONVERSATIONS_PAGE_AFTER_SQL = '''
+    SELECT id, title, created_at, updated_at
+    FROM conversations
+    WHERE (updated_at, id) < (?, ?)
+    ORDER BY updated_at DESC, id DESC
+    LIMIT ?
+'''
+MESSAGES_SQL = '''
+    SELECT id, role, content, blob_ids
+    FROM messages
+    WHERE conversation_id = ?
+    ORDER BY id
+'''
+MESSAGES_PAGE_SQL = '''
+    SELECT id, role, content, blob_ids
+    FROM messages
+    WHERE conversation_id = ?
+    ORDER BY id DESC
+    LIMIT ?
+'''
+MESSAGES_PAGE_BEFORE_SQL = '''
+    SELECT id, role, content, blob_ids
+    FROM messages
+    WHERE conversation_id = ? AND id < ?
+    ORDER BY id DESC
+    LIMIT ?
+'''
+MESSAGES_BETWEEN_SQL = '''
+    SELECT id, role, content, blob_ids
+    FROM messages
+    WHERE conversation_id = ? AND id > ? AND id < ?
+    ORDER BY id
+'''
+FIRST_MESSAGE_SQL = '''
+    SELECT id, role, content, blob_ids
+    FROM messages
+    WHERE conversation_id = ?
+    ORDER BY id
+    LIMIT 1
+'''
+# 메시지 등 대화에 딸린 행은 ON DELETE CASCADE로 함께 삭제됨
+DELETE_CONVERSATION_SQL = 'DELETE FROM conversations WHERE id = ?'
+
+# 실행 계획을 확인할 (이름, 쿼리, 인자) 목록 (tests/test_query_plans.py, benchmarks/bench_database.py)
+HOT_QUERIES = (
+    ("get_conversations_page", CONVERSATIONS_PAGE_SQL, (20,)),
+    ("get_conversations_page (cursor)", CONVERSATIONS_PAGE_AFTER_SQL, ("2024-01-01 00:00:00", 1, 20)),
+    ("get_messages", MESSAGES_SQL, (1,)),
+    ("get_messages_page", MESSAGES_PAGE_SQL, (1, 50)),
+    ("get_messages_page (cursor)", MESSAGES_PAGE_BEFORE_SQL, (1, 100, 50)),
+    ("get_messages_between", MESSAGES_BETWEEN_SQL, (1, 1, 100)),
+    ("get_first_message", FIRST_MESSAGE_SQL, (1,)),
+    ("delete_conversation", DELETE_CONVERSATION_SQL, (1,)),
+)
+
+def split_segments(content):
+    """본문을 섹션 제목 앞에서 나눈 조각 목록 (이어 붙이면 원래 본문)"""
+    return [segment for segment in SEGMENT_PATTERN.split(content) if segment]
+
+
+def encode_body(conn, role, content):
+    """저장할 (content, blob_ids)를 반환합니다.
+
+    BLOB_ROLES의 긴 본문은 조각마다 message_blobs에 한 번만 저장하고 content를 비운 채
+    조각 id 목록(쉼표 구분)을 반환하며, 그 밖의 본문은 (content, None) 그대로입니다.
+    conn의 트랜잭션 안에서 호출해야 합니다.
+    """
+    if role not in BLOB_ROLES or len(content) < BLOB_MIN_CHARS:
+        return content, None
+    ids = []
+    for segment in split_segments(content):
+        digest = hashlib.sha256(segment.encode("utf-8")).digest()
+        # 이미 있는 조각이면 아무것도 쓰지 않음
+        conn.execute('INSERT OR IGNORE INTO message_blobs (hash, content) VALUES (?, ?)', (digest, segment))
+        ids.append(str(conn.execute('SELECT id FROM message_blobs WHERE hash = ?', (digest,)).fetchone()[0]))
+    return "", ",".join(ids)
+
+
+def _store_existing_bodies(conn):
+    """기존 메시지 중 BLOB_ROLES의 긴 본문을 조각 저장 방식으로 옮깁니다. (마이그레이션 13)"""
+    ids = [row[0] for row in conn.execute(f'''
+        SELECT id FROM messages
+        WHERE role IN ({",".join("?" * len(BLOB_ROLES))}) AND blob_ids IS NULL AND LENGTH(content) >= ?
+    ''', (*BLOB_ROLES, BLOB_MIN_CHARS))]
+    for message_id in ids:
+        role, content = conn.execute('SELECT role, content FROM messages WHERE id = ?', (message_id,)).fetchone()
+        conn.execute(
+            'UPDATE messages SET content = ?, blob_ids = ? WHERE id = ?',
+            (*encode_body(conn, role, content), message_id)
+        )
+
+
+# 스키마 마이그레이션 (버전, 실행할 SQL 목록)
+# 적용된 버전은 PRAGMA user_version에 기록됩니다. SQL로 할 수 없는 데이터 변환은 conn을 받는 함수로 넣습니다.
+MIGRATIONS = (
+    (1, (
+        # 대화 세션 테이블 생성
+        '''
+        CREATE TABLE IF NOT EXISTS conversations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # 메시지 테이블 생성
+        '''
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations (id)
+        )
+        ''',
+        # ADDIE 문서 테이블 생성
+        '''
+        CREATE TABLE IF NOT EXISTS addie_document (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+    )),
+    (2, (
+        # ON DELETE CASCADE 추가를 위해 messages 테이블 재생성 (id 유지)
+        '''
+        CREATE TABLE messages_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations (id) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        INSERT INTO messages_new (id, conversation_id, role, content, created_at)
+        SELECT id, conversation_id, role, content, created_at FROM messages
+        ''',
+        'DROP TABLE messages',
+        'ALTER TABLE messages_new RENAME TO messages',
+        # 대화별 메시지 조회/삭제용 인덱스
+        '''
+        CREATE INDEX IF NOT EXISTS idx_messages_conversation
+        ON messages (conversation_id, id)
+        ''',
+        # 최근 대화 목록 조회용 인덱스
+        '''
+        CREATE INDEX IF NOT EXISTS idx_conversations_updated
+        ON conversations (updated_at, id)
+        ''',
+    )),
+    (3, (
+        # 참조 문서 검색용 청크 테이블
+        '''
+        CREATE TABLE IF NOT EXISTS reference_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            page INTEGER,
+            section TEXT,
+            content TEXT NOT NULL
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_reference_chunks_source
+        ON reference_chunks (source, id)
+        ''',
+    )),
+    (4, (
+        # 수집된 참조 문서 (sha256은 수집이 끝난 뒤 기록)
+        '''
+        CREATE TABLE IF NOT EXISTS reference_documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL UNIQUE,
+            sha256 TEXT,
+            page_count INTEGER NOT NULL,
+            ingested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # 문서별 페이지 텍스트와 문서 전체 기준 문자 위치
+        '''
+        CREATE TABLE IF NOT EXISTS reference_pages (
+            document_id INTEGER NOT NULL,
+            page INTEGER NOT NULL,
+            start_offset INTEGER NOT NULL,
+            end_offset INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            PRIMARY KEY (document_id, page),
+            FOREIGN KEY (document_id) REFERENCES reference_documents (id) ON DELETE CASCADE
+        )
+        ''',
+        # 통째로 저장하던 ADDIE 문서는 수집 파이프라인으로 대체
+        'DROP TABLE IF EXISTS addie_document',
+    )),
+    (5, (
+        # 오래된 대화를 접어 둔 누적 요약 (through_id까지의 메시지를 포함)
+        '''
+        CREATE TABLE IF NOT EXISTS conversation_summaries (
+            conversation_id INTEGER PRIMARY KEY,
+            through_id INTEGER NOT NULL,
+            summary TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations (id) ON DELETE CASCADE
+        )
+        ''',
+    )),
+    (6, (
+        # 의도 분류/피드백 분석 등 구조화된 LLM 응답 캐시
+        '''
+        CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used
+        ON llm_cache (last_used)
+        ''',
+    )),
+    (7, (
+        # 의도 분류 기록 (source: llm = LLM 라벨, local = 로컬 분류기)
+        '''
+        CREATE TABLE IF NOT EXISTS intent_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_input TEXT NOT NULL,
+            intent TEXT NOT NULL,
+            confidence REAL,
+            source TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_intent_log_source
+        ON intent_log (source, id)
+        ''',
+    )),
+    (8, (
+        # 피드백 평가로 누적된 시스템 프롬프트 조정 사항 (대화별, id 순서가 오래된 순)
+        '''
+        CREATE TABLE IF NOT EXISTS prompt_adjustments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            conversation_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 1,
+            FOREIGN KEY (conversation_id) REFERENCES conversations (id) ON DELETE CASCADE
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_prompt_adjustments_conversation
+        ON prompt_adjustments (conversation_id, id)
+        ''',
+    )),
+    (9, (
+        # 단계별 소요 시간 기록 (attrs는 JSON)
+        '''
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            stage TEXT NOT NULL,
+            duration_ms REAL NOT NULL,
+            status TEXT NOT NULL,
+            attrs TEXT
+        )
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_metrics_ts
+        ON metrics (ts)
+        ''',
+    )),
+    (10, (
+        # 첫 입력의 의도 분류 결과와 대화 모드 (내보내기 필터용)
+        'ALTER TABLE conversations ADD COLUMN mode TEXT',
+        'ALTER TABLE conversations ADD COLUMN intent TEXT',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_conversations_created
+        ON conversations (created_at, id)
+        ''',
+    )),
+    (11, (
+        # 대화 기록 전문 검색 색인 (본문은 원래 테이블에서 읽는 external content 방식)
+        # 시스템 프롬프트는 검색 결과를 덮어 버리므로 색인하지 않음
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+            content, content='messages', content_rowid='id',
+            tokenize='{FTS_TOKENIZER}', prefix='{FTS_PREFIX}'
+        )
+        ''',
+        f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts USING fts5(
+            title, content='conversations', content_rowid='id',
+            tokenize='{FTS_TOKENIZER}', prefix='{FTS_PREFIX}'
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages
+        WHEN new.role != 'system' BEGIN
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages
+        WHEN old.role != 'system' BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS messages_fts_update AFTER UPDATE OF content ON messages
+        WHEN old.role != 'system' BEGIN
+            INSERT INTO messages_fts (messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            INSERT INTO messages_fts (rowid, content) VALUES (new.id, new.content);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_insert AFTER INSERT ON conversations BEGIN
+            INSERT INTO conversations_fts (rowid, title) VALUES (new.id, new.title);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_delete AFTER DELETE ON conversations BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, title) VALUES ('delete', old.id, old.title);
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS conversations_fts_update AFTER UPDATE OF title ON conversations BEGIN
+            INSERT INTO conversations_fts (conversations_fts, rowid, title) VALUES ('delete', old.id, old.title);
+            INSERT INTO conversations_fts (rowid, title) VALUES (new.id, new.title);
+        END
+        ''',
+        # 기존 대화 색인 (큰 DB는 배포 전에 python database.py --backfill-search로 미리 실행)
+        *SEARCH_BACKFILL,
+    )),
+    (12, (
+        # 오래된 대화의 메시지를 대화마다 압축해 보관 (payload는 [id, role, content, created_at] 목록의 JSON)
+        # 메시지를 옮기면 검색 색인에서도 빠지므로 보관 중에는 제목만 검색됨
+        '''
+        CREATE TABLE IF NOT EXISTS conversation_archives (
+            conversation_id INTEGER PRIMARY KEY,
+            codec TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            message_count INTEGER NOT NULL,
+            raw_bytes INTEGER NOT NULL,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (conversation_id) REFERENCES conversations (id) ON DELETE CASCADE
+        )
+        ''',
+        # 열어 보려고 복원한 대화가 바로 다시 보관되지 않도록 복원 시각 기록
+        'ALTER TABLE conversations ADD COLUMN restored_at TIMESTAMP',
+    )),
+    (13, (
+        # 반복되는 메시지 본문 조각 (내용의 SHA-256으로 중복 제거)
+        # 지운 조각의 id를 다시 쓰지 않도록 AUTOINCREMENT (읽기 캐시가 id로 조각을 보관하므로)
+        '''
+        CREATE TABLE IF NOT EXISTS message_blobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash BLOB NOT NULL UNIQUE,
+            content TEXT NOT NULL
+        )
+        ''',
+        # 조각으로 저장한 메시지는 content를 비우고 조각 id 목록(쉼표 구분)을 기록
+        # (시스템 메시지는 검색 색인 대상이 아니므로 색인과 트리거는 그대로)
+        'ALTER TABLE messages ADD COLUMN blob_ids TEXT',
+        # 기존 메시지 변환 (큰 DB는 배포 전에 python database.py로 미리 실행)
+        _store_existing_bodies,
+    )),
+)
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """스레드 간에 재사용되는 SQLite 연결 풀"""
+
+    def __init__(self, db_path, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.initialized = False
+        self.init_lock = threading.Lock()
+        # 대화 목록이 바뀔 때마다 증가 (사이드바 캐시 무효화용)
+        self.history_version = 0
+        self.writer = MessageWriter(self)
+        self.blobs = BlobCache()
+
+    def _open(self):
+        """새 연결을 열고 PRAGMA를 적용합니다."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """풀에서 연결을 빌려 사용 후 반납합니다."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close(self):
+        """유휴 연결을 모두 닫습니다."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class BlobCache:
+    """읽은 메시지 본문 조각 (id -> 내용)의 LRU 캐시
+
+    조각 id는 다시 쓰이지 않으므로 내용이 바뀌지 않으며, 삭제된 조각만 discard로 뺍니다.
+    """
+
+    def __init__(self, size=BLOB_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def decode(self, conn, content, blob_ids):
+        """저장된 (content, blob_ids)의 원래 본문 (캐시에 없는 조각만 conn으로 읽음)"""
+        if blob_ids is None:
+            return content
+        ids = [int(blob_id) for blob_id in blob_ids.split(",")]
+        found = {}
+        with self._lock:
+            for blob_id in ids:
+                segment = self._items.get(blob_id)
+                if segment is not None:
+                    self._items.move_to_end(blob_id)
+                    found[blob_id] = segment
+        missing = list({blob_id for blob_id in ids if blob_id not in found})
+        if missing:
+            rows = conn.execute(
+                f'SELECT id, content FROM message_blobs WHERE id IN ({",".join("?" * len(missing))})', missing
+            ).fetchall()
+            with self._lock:
+                for blob_id, segment in rows:
+                    found[blob_id] = self._items[blob_id] = segment
+                while len(self._items) > self.size:
+                    self._items.popitem(last=False)
+        return "".join(found[blob_id] for blob_id in ids)
+
+    def discard(self, blob_ids):
+        """삭제된 조각을 캐시에서 뺍니다."""
+        with self._lock:
+            for blob_id in blob_ids:
+                self._items.pop(blob_id, None)
+
+
+class MessageWriter:
+    """메시지 저장을 모아 백그라운드 스레드에서 한 트랜잭션으로 쓰는 쓰기 지연 큐
+
+    메시지 id는 큐에 넣을 때 미리 할당하므로 저장을 기다리지 않고 바로 반환할 수 있습니다.
+    (메시지를 쓰는 프로세스가 하나라고 가정)
+    아직 쓰지 않은 메시지는 pending_rows로 조회할 수 있습니다.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self._cond = threading.Condition()
+        # 저장 대기 중인 (id, conversation_id, role, content, created_at) 목록과 쓰는 중인 목록
+        self._pending = []
+        self._writing = []
+        self._next_id = None
+        self._thread = None
+        # 메시지 id별 실패 횟수와, 다시 시도해도 쓰지 못해 대기열에서 뺀 메시지
+        self._attempts = {}
+        self.failed = []
+        # 트랜잭션은 한 번에 하나만 (flush 호출과 백그라운드 스레드 사이)
+        self._flush_lock = threading.Lock()
+
+    def _last_id(self):
+        """지금까지 쓰인 가장 큰 메시지 id (삭제된 id도 재사용하지 않음)"""
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                SELECT MAX(
+                    COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'messages'), 0),
+                    COALESCE((SELECT MAX(id) FROM messages), 0)
+                )
+            ''').fetchone()
+        return row[0]
+
+    def enqueue(self, conversation_id, role, content):
+        """메시지를 저장 대기열에 넣고 할당한 id를 반환합니다."""
+        created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+        with self._cond:
+            if self._next_id is None:
+                self._next_id = max([self._last_id()] + [row[0] for row in self._writing + self._pending]) + 1
+            message_id = self._next_id
+            self._next_id += 1
+            self._pending.append((message_id, conversation_id, role, content, created_at))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="message-writer", daemon=True)
+                self._thread.start()
+            if len(self._pending) >= WRITE_BEHIND_BATCH:
+                self._cond.notify()
+        return message_id
+
+    def pending_rows(self, conversation_id):
+        """대화의 아직 쓰이지 않은 메시지 (id, role, content) 목록 (id 순)
+
+        DB 조회보다 먼저 호출해야 그 사이에 쓰인 메시지를 놓치지 않습니다.
+        """
+        with self._cond:
+            return [
+                (message_id, role, content)
+                for message_id, cid, role, content, _ in self._writing + self._pending
+                if cid == conversation_id
+            ]
+
+    def discard(self, conversation_id):
+        """대화의 저장 대기 메시지를 버립니다."""
+        with self._cond:
+            self._pending = [row for row in self._pending if row[1] != conversation_id]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._pending) >= WRITE_BEHIND_BATCH, timeout=WRITE_BEHIND_INTERVAL)
+            try:
+                if self.flush():
+                    # 다시 시도할 메시지가 남았으면 바로 반복하지 않음
+                    time.sleep(WRITE_BEHIND_INTERVAL)
+            except Exception as e:
+                tracing.event("db.writer_error", error=str(e))
+                time.sleep(WRITE_BEHIND_INTERVAL)
+
+    def flush(self):
+        """저장 대기 메시지를 지금 한 트랜잭션으로 쓰고, 쓰지 못해 다시 시도할 메시지 수를 반환합니다.
+
+        메시지 때문에 트랜잭션이 실패하면 메시지마다 따로 써서 실패한 메시지만 다음 flush에서 다시 시도하고,
+        WRITE_BEHIND_ATTEMPTS번 실패한 메시지는 대기열에서 빼서 failed에 보관합니다.
+        (메시지 하나 때문에 뒤의 메시지가 계속 쓰이지 않는 일이 없도록)
+        """
+        with self._flush_lock:
+            with self._cond:
+                rows = self._writing = self._pending
+                self._pending = []
+            if not rows:
+                return 0
+            try:
+                self._write(rows)
+                errors = []
+            except sqlite3.OperationalError:
+                # 잠금, 디스크 부족 등 DB 전체의 오류는 메시지 탓이 아니므로 실패 횟수를 세지 않고 모두 다시 시도
+                with self._cond:
+                    self._pending = rows + self._pending
+                    self._writing = []
+                raise
+            except Exception:
+                errors = self._write_each(rows)
+            retry = []
+            for row, error in errors:
+                attempts = self._attempts.get(row[0], 0) + 1
+                if attempts < WRITE_BEHIND_ATTEMPTS:
+                    self._attempts[row[0]] = attempts
+                    retry.append(row)
+                    continue
+                self._attempts.pop(row[0], None)
+                self.failed.append(row)
+                tracing.event(
+                    "db.write_failed",
+                    message_id=row[0],
+                    conversation_id=row[1],
+                    attempts=attempts,
+                    error=str(error)
+                )
+            with self._cond:
+                self._pending = retry + self._pending
+                self._writing = []
+                if errors:
+                    # 다른 프로세스가 같은 id를 먼저 썼을 수 있으므로 새 메시지 id를 다시 정함
+                    self._next_id = None
+            if errors:
+                tracing.event("db.write_retry", failed=len(errors), retry=len(retry))
+            if len(errors) < len(rows):
+                failed_ids = {row[0] for row, _ in errors}
+                for row in rows:
+                    if row[0] not in failed_ids:
+                        self._attempts.pop(row[0], None)
+                self.pool.history_version += 1
+            return len(retry)
+
+    def _write_each(self, rows):
+        """메시지를 하나씩 따로 쓰고 실패한 (메시지, 오류) 목록을 반환합니다."""
+        errors = []
+        for row in rows:
+            try:
+                self._write([row])
+            except Exception as e:
+                errors.append((row, e))
+        return errors
+
+    @staticmethod
+    def _insert(conn, rows):
+        conn.executemany('''
+            INSERT INTO messages (id, conversation_id, role, content, blob_ids, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (message_id, conversation_id, role, *encode_body(conn, role, content), created_at)
+            for message_id, conversation_id, role, content, created_at in rows
+        ])
+
+    def _write(self, rows):
+        # 대화마다 마지막 메시지 시각으로 updated_at 갱신
+        updated = {}
+        for _, conversation_id, _, _, created_at in rows:
+            updated[conversation_id] = created_at
+        with self.pool.connection() as conn:
+            try:
+                self._insert(conn, rows)
+            except sqlite3.IntegrityError:
+                # 그 사이 삭제된 대화의 메시지는 버림
+                conn.rollback()
+                existing = {
+                    row[0] for row in conn.execute(
+                        f'SELECT id FROM conversations WHERE id IN ({",".join("?" * len(updated))})',
+                        list(updated),
+                    )
+                }
+                self._insert(conn, [row for row in rows if row[1] in existing])
+            conn.executemany(
+                'UPDATE conversations SET updated_at = ? WHERE id = ?',
+                [(created_at, conversation_id) for conversation_id, created_at in updated.items()],
+            )
+            conn.commit()
+
+
+def flush_all():
+    """모든 풀의 저장 대기 메시지를 씁니다. (프로세스 종료 시 자동 호출)"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        try:
+            pool.writer.flush()
+        except Exception as e:
+            tracing.event("db.writer_error", error=str(e), on_exit=True)
+
+
+atexit.register(flush_all)
+
+
+def get_pool(db_path):
+    """경로별로 프로세스 전체에서 공유되는 연결 풀을 반환합니다."""
+    key = db_path if db_path == ":memory:" else os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_path)
+        return pool
+
+
+def migrate(conn):
+    """아직 적용되지 않은 마이그레이션을 순서대로 적용합니다."""
+    # 테이블 재생성 중 외래 키 검사를 끄며, 트랜잭션 밖에서만 변경 가능
+    conn.execute('PRAGMA foreign_keys = OFF')
+    try:
+        for version, statements in MIGRATIONS:
+            # 다른 프로세스와 동시에 마이그레이션하지 않도록 쓰기 잠금 후 버전 재확인
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                current = conn.execute('PRAGMA user_version').fetchone()[0]
+                if current < version:
+                    for statement in statements:
+                        if callable(statement):
+                            statement(conn)
+                        else:
+                            conn.execute(statement)
+                    conn.execute(f'PRAGMA user_version = {version}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+    finally:
+        conn.execute('PRAGMA foreign_keys = ON')
+
+
+def search_tokens(text):
+    """검색어의 단어 목록"""
+    return SEARCH_TOKEN_PATTERN.findall(text)
+
+
+def fts_query(tokens, indexed=False):
+    """검색어 단어를 FTS5 질의로 바꿉니다. 모든 단어를 포함해야 하며, 모든 단어를 접두어로 찾습니다.
+
+    unicode61은 공백으로만 나누므로 조사나 복수형이 붙은 단어 ("미분방정식은", "chloroplasts")도
+    찾으려면 접두어 검색이 필요합니다. 접두어 색인보다 긴 단어는 FTS5가 일치하는 단어의 문서 목록을
+    모두 읽어야 하므로, indexed이면 색인된 앞부분으로만 찾고 호출하는 쪽에서 단어 전체로 거릅니다.
+    """
+    return " ".join(f'"{token[:SEARCH_PREFIX_INDEXED] if indexed else token}"*' for token in tokens)
+
+
+def _token_patterns(tokens):
+    return [re.compile(rf"(?<!\w){re.escape(token)}\w*", re.IGNORECASE) for token in tokens]
+
+
+def _rank_candidates(candidates, patterns):
+    """후보 메시지를 검색어 빈도와 길이로 점수를 매겨 높은 순으로 정렬합니다.
+
+    BM25에서 idf를 뺀 형태이며, 후보는 모두 검색어를 포함하므로 idf 차이가 작습니다.
+    (FTS5의 bm25는 일치하는 모든 문서를 세야 해서 흔한 단어에서 느림)
+    """
+    lengths = [len(row[-1].split()) or 1 for row in candidates]
+    average = sum(lengths) / len(lengths) if lengths else 1
+    scored = []
+    for row, length in zip(candidates, lengths):
+        norm = SEARCH_K1 * (1 - SEARCH_B + SEARCH_B * length / average)
+        score = 0.0
+        for pattern in patterns:
+            tf = len(pattern.findall(row[-1]))
+            score += tf * (SEARCH_K1 + 1) / (tf + norm)
+        scored.append((score, row))
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [row for _, row in scored]
+
+
+def _highlight(text, tokens):
+    # 겹치는 단어가 두 번 강조되지 않도록 긴 단어부터 한 패턴으로
+    alternatives = "|".join(re.escape(token) for token in sorted(tokens, key=len, reverse=True))
+    pattern = re.compile(rf"(?<!\w)(?:{alternatives})\w*", re.IGNORECASE)
+    return pattern.sub(lambda m: f"{SNIPPET_MARK}{m.group(0)}{SNIPPET_MARK}", text)
+
+
+def make_snippet(content, tokens, patterns):
+    """첫 일치 위치 주변을 단어 단위로 잘라 일치한 단어를 강조한 한 줄 스니펫"""
+    text = " ".join(content.split())
+    starts = [m.start() for m in (pattern.search(text) for pattern in patterns) if m]
+    first = min(starts) if starts else 0
+    start = max(0, first - SNIPPET_BEFORE)
+    if start > 0:
+        start = text.find(" ", start, first) + 1 or first
+    end = first + SNIPPET_AFTER
+    if end < len(text):
+        space = text.rfind(" ", first, end)
+        end = space if space > first else end
+    snippet = _highlight(text[start:end], tokens)
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+def compress_archive(rows, codec=ARCHIVE_CODEC):
+    """메시지 행 목록을 JSON으로 직렬화해 압축하고 (payload, 원래 바이트 수)를 반환합니다."""
+    raw = json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if codec == "zstd":
+        payload = zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(raw)
+    elif codec == "zlib":
+        payload = zlib.compress(raw, ARCHIVE_ZLIB_LEVEL)
+    else:
+        raise ValueError(f"알 수 없는 압축 방식: {codec}")
+    return payload, len(raw)
+
+
+def decompress_archive(codec, payload):
+    """보관된 payload를 메시지 행 목록으로 되돌립니다."""
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd로 보관된 대화를 열려면 zstandard 패키지가 필요합니다")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    elif codec == "zlib":
+        raw = zlib.decompress(payload)
+    else:
+        raise ValueError(f"알 수 없는 압축 방식: {codec}")
+    return json.loads(raw)
+
+
+def _cutoff(days):
+    """지금부터 days일 전 시각 (TIMESTAMP_FORMAT)"""
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(time.time() - days * 86400))
+
+
+def _merge_pending(rows, pending):
+    """DB에서 읽은 (id, ...) 행과 저장 대기 행을 id 순으로 합칩니다. (이미 쓰인 행은 한 번만)"""
+    if not pending:
+        return rows
+    seen = {row[0] for row in rows}
+    return sorted(list(rows) + [row for row in pending if row[0] not in seen], key=lambda row: row[0])
+
+
 class Database:
     def __init__(self, db_path="conversations.db"):
         self.db_path = db_path
+        self.pool = get_pool(db_path)
         self.init_db()
 
+    def _conn(self):
+        """풀에서 연결을 빌려옵니다."""
+        return self.pool.connection()
+
+    def _decode_rows(self, conn, rows, index):
+        """index 위치에 (content, blob_ids) 열이 있는 행에서 본문을 되살려 blob_ids 열을 뺀 행 목록"""
+        decode = self.pool.blobs.decode
+        return [row[:index] + (decode(conn, row[index], row[index + 1]),) + row[index + 2:] for row in rows]
+
+    def flush(self):
+        """저장 대기 중인 메시지를 지금 씁니다. (체크포인트)"""
+        self.pool.writer.flush()
+
+    def close(self):
+        """저장 대기 메시지를 쓰고 이 데이터베이스의 풀 연결을 닫습니다."""
+        self.flush()
+        self.pool.close()
+
     def init_db(self):
-        """데이터베이스 초기화 및 테이블 생성"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # 대화 세션 테이블 생성
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS conversations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 메시지 테이블 생성
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                conversation_id INTEGER,
-                role TEXT NOT NULL,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (conversation_id) REFERENCES conversations (id)
-            )
-        ''')
-        
-        # ADDIE 문서 테이블 생성
-        c.execute('''
-            CREATE TABLE IF NOT EXISTS addie_document (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                content TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """데이터베이스 초기화 및 마이그레이션 적용 (프로세스당 한 번)"""
+        if self.pool.initialized:
+            return
+        with self.pool.init_lock:
+            if self.pool.initialized:
+                return
+            with self._conn() as conn:
+                migrate(conn)
+            self.pool.initialized = True
+
+    def schema_version(self):
+        """현재 스키마 버전 조회"""
+        with self._conn() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
 
+    def history_version(self):
+        """대화 목록 변경 카운터 조회"""
+        return self.pool.history_version
+
+    def _touch_history(self):
+        """대화 목록이 변경되었음을 기록합니다."""
+        self.pool.history_version += 1
+
+    @traced("db.create_conversation")
     def create_conversation(self, title):
         """새로운 대화 세션 생성"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('INSERT INTO conversations (title) VALUES (?)', (title,))
-        conversation_id = c.lastrowid
-        conn.commit()
-        conn.close()
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute('INSERT INTO conversations (title) VALUES (?)', (title,))
+            conversation_id = c.lastrowid
+            conn.commit()
+        self._touch_history()
         return conversation_id
 
+    @traced("db.set_conversation_mode")
+    def set_conversation_mode(self, conversation_id, mode, intent):
+        """대화 모드와 의도 분류 결과 저장"""
+        with self._conn() as conn:
+            conn.execute(
+                'UPDATE conversations SET mode = ?, intent = ? WHERE id = ?',
+                (mode, intent, conversation_id)
+            )
+            conn.commit()
+
+    @traced("db.save_message")
     def save_message(self, conversation_id, role, content):
-        """메시지 저장"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO messages (conversation_id, role, content)
-            VALUES (?, ?, ?)
-        ''', (conversation_id, role, content))
-        
-        # 대화 세션의 updated_at 업데이트
-        c.execute('''
-            UPDATE conversations 
-            SET updated_at = CURRENT_TIMESTAMP 
-            WHERE id = ?
-        ''', (conversation_id,))
-        
-        conn.commit()
-        conn.close()
+        """메시지를 저장 대기열에 넣고 메시지 id 반환
+
+        실제 INSERT와 대화 updated_at 갱신은 백그라운드에서 모아서 쓰며,
+        메시지 조회에는 저장 대기 중인 메시지도 포함됩니다.
+        """
+        return self.pool.writer.enqueue(conversation_id, role, content)
 
+    @traced("db.get_conversations")
     def get_conversations(self):
         """모든 대화 세션 목록 조회"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
-            SELECT id, title, created_at, updated_at 
-            FROM conversations 
-            ORDER BY updated_at DESC
-        ''')
-        conversations = c.fetchall()
-        conn.close()
-        return conversations
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute('''
+                SELECT id, title, created_at, updated_at
+                FROM conversations
+                ORDER BY updated_at DESC, id DESC
+            ''')
+            return c.fetchall()
 
+    @traced("db.get_conversations_page")
+    def get_conversations_page(self, limit=20, cursor=None):
+        """대화 세션 목록을 최신순으로 한 페이지 조회
+
+        cursor는 이전 페이지 마지막 항목의 (updated_at, id)이며,
+        (목록, 다음 cursor)를 반환합니다. 더 이상 없으면 다음 cursor는 None입니다.
+        """
+        with self._conn() as conn:
+            c = conn.cursor()
+            if cursor is None:
+                c.execute(CONVERSATIONS_PAGE_SQL, (limit + 1,))
+            else:
+                c.execute(CONVERSATIONS_PAGE_AFTER_SQL, (*cursor, limit + 1))
+            rows = c.fetchall()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, (rows[-1][3], rows[-1][0])
+        return rows, None
+
+    @traced("db.get_messages")
     def get_messages(self, conversation_id):
         """특정 대화 세션의 모든 메시지 조회"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('''
-            SELECT role, content 
-            FROM messages 
-            WHERE conversation_id = ? 
-            ORDER BY created_at
-        ''', (conversation_id,))
-        messages = c.fetchall()
-        conn.close()
-        return messages
+        pending = self.pool.writer.pending_rows(conversation_id)
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute(MESSAGES_SQL, (conversation_id,))
+            rows = self._decode_rows(conn, c.fetchall(), 2)
+        return [(role, content) for _, role, content in _merge_pending(rows, pending)]
+
+    @traced("db.get_messages_page")
+    def get_messages_page(self, conversation_id, before_id=None, limit=50):
+        """특정 대화 세션의 메시지를 최신 것부터 한 페이지 조회
+
+        before_id보다 오래된 메시지 중 최근 limit개를 시간순 (id, role, content)
+        목록으로 반환하며, 더 오래된 메시지가 있으면 다음 before_id도 함께 반환합니다.
+        """
+        pending = self.pool.writer.pending_rows(conversation_id)
+        with self._conn() as conn:
+            c = conn.cursor()
+            if before_id is None:
+                c.execute(MESSAGES_PAGE_SQL, (conversation_id, limit + 1))
+            else:
+                c.execute(MESSAGES_PAGE_BEFORE_SQL, (conversation_id, before_id, limit + 1))
+            rows = self._decode_rows(conn, c.fetchall(), 2)
+        if before_id is not None:
+            pending = [row for row in pending if row[0] < before_id]
+        if pending:
+            rows = _merge_pending(rows, pending)[::-1][:limit + 1]
+        cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            cursor = rows[-1][0]
+        return rows[::-1], cursor
+
+    @traced("db.get_messages_between")
+    def get_messages_between(self, conversation_id, after_id, before_id):
+        """특정 대화 세션에서 id가 after_id보다 크고 before_id보다 작은 메시지를 시간순 (id, role, content)로 조회"""
+        pending = [
+            row for row in self.pool.writer.pending_rows(conversation_id) if after_id < row[0] < before_id
+        ]
+        with self._conn() as conn:
+            rows = self._decode_rows(
+                conn, conn.execute(MESSAGES_BETWEEN_SQL, (conversation_id, after_id, before_id)).fetchall(), 2
+            )
+        return _merge_pending(rows, pending)
+
+    @traced("db.get_first_message")
+    def get_first_message(self, conversation_id):
+        """특정 대화 세션의 첫 메시지 (id, role, content) 조회"""
+        pending = self.pool.writer.pending_rows(conversation_id)
+        with self._conn() as conn:
+            rows = self._decode_rows(conn, conn.execute(FIRST_MESSAGE_SQL, (conversation_id,)).fetchall(), 2)
+        row = rows[0] if rows else None
+        if row is None and pending:
+            return pending[0]
+        return row
+
+    @traced("db.get_summary")
+    def get_summary(self, conversation_id):
+        """대화 누적 요약 (through_id, summary) 조회"""
+        with self._conn() as conn:
+            return conn.execute(
+                'SELECT through_id, summary FROM conversation_summaries WHERE conversation_id = ?',
+                (conversation_id,)
+            ).fetchone()
+
+    @traced("db.save_summary")
+    def save_summary(self, conversation_id, through_id, summary):
+        """대화 누적 요약 저장"""
+        with self._conn() as conn:
+            conn.execute('''
+                INSERT INTO conversation_summaries (conversation_id, through_id, summary)
+                VALUES (?, ?, ?)
+                ON CONFLICT (conversation_id) DO UPDATE SET
+                    through_id = excluded.through_id,
+                    summary = excluded.summary,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', (conversation_id, through_id, summary))
+            conn.commit()
+
+    @traced("db.get_prompt_adjustments")
+    def get_prompt_adjustments(self, conversation_id):
+        """대화의 시스템 프롬프트 조정 사항 (content, hits) 조회 (오래된 순)"""
+        with self._conn() as conn:
+            return conn.execute('''
+                SELECT content, hits
+                FROM prompt_adjustments
+                WHERE conversation_id = ?
+                ORDER BY id
+            ''', (conversation_id,)).fetchall()
 
+    @traced("db.save_prompt_adjustments")
+    def save_prompt_adjustments(self, conversation_id, adjustments):
+        """대화의 시스템 프롬프트 조정 사항 (content, hits) 목록을 통째로 교체"""
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM prompt_adjustments WHERE conversation_id = ?', (conversation_id,))
+            c.executemany('''
+                INSERT INTO prompt_adjustments (conversation_id, content, hits)
+                VALUES (?, ?, ?)
+            ''', [(conversation_id, content, hits) for content, hits in adjustments])
+            conn.commit()
+
+    @traced("db.delete_conversation")
     def delete_conversation(self, conversation_id):
         """대화 세션 삭제"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('DELETE FROM messages WHERE conversation_id = ?', (conversation_id,))
-        c.execute('DELETE FROM conversations WHERE id = ?', (conversation_id,))
-        conn.commit()
-        conn.close()
-
-    def save_addie_document(self, content):
-        """ADDIE 문서 저장"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        
-        # 기존 문서 삭제
-        c.execute('DELETE FROM addie_document')
-        
-        # 새 문서 저장
-        c.execute('INSERT INTO addie_document (content) VALUES (?)', (content,))
-        conn.commit()
-        conn.close()
-
-    def get_addie_document(self):
-        """ADDIE 문서 조회"""
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute('SELECT content FROM addie_document ORDER BY id DESC LIMIT 1')
-        result = c.fetchone()
-        conn.close()
-        return result[0] if result else None 
\ No newline at end of file
+        # 쓰는 중인 메시지가 삭제 뒤에 들어가지 않도록 먼저 쓰고 남은 대기 메시지는 버림
+        self.flush()
+        self.pool.writer.discard(conversation_id)
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute(DELETE_CONVERSATION_SQL, (conversation_id,))
+            conn.commit()
+        self._touch_history()
+
+    def iter_export_rows(self, since=None, until=None, mode=None, intent=None, conversation_id=None):
+        """내보내기용 메시지 행을 대화/메시지 순서로 하나씩 내보내는 제너레이터
+
+        각 행은 (conversation_id, title, mode, intent, conversation_created_at,
+        message_id, role, content, created_at)입니다. since(포함)와 until(미포함)은
+        대화 생성 시각 (UTC "%Y-%m-%d %H:%M:%S" 또는 날짜) 기준이며, None인 조건은 적용하지 않습니다.
+        결과를 한꺼번에 읽지 않고 EXPORT_FETCH_SIZE씩 읽으므로 메모리 사용량이 일정합니다.
+        보관된 대화는 복원하지 않고 보관본을 풀어 같은 순서에 끼워 넣습니다.
+        """
+        self.flush()
+        conditions, params = [], []
+        for sql, value in (
+            ('c.created_at >= ?', since),
+            ('c.created_at < ?', until),
+            ('c.mode = ?', mode),
+            ('c.intent = ?', intent),
+            ('c.id = ?', conversation_id),
+        ):
+            if value is not None:
+                conditions.append(sql)
+                params.append(value)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._conn() as conn:
+            cursor = conn.execute(f'''
+                SELECT c.id, c.title, c.mode, c.intent, c.created_at,
+                       m.id, m.role, m.content, m.blob_ids, m.created_at
+                FROM conversations c
+                JOIN messages m ON m.conversation_id = c.id
+                {where}
+                ORDER BY c.id, m.id
+            ''', params)
+            archives = conn.execute(f'''
+                SELECT c.id, c.title, c.mode, c.intent, c.created_at, a.codec, a.payload
+                FROM conversations c
+                JOIN conversation_archives a ON a.conversation_id = c.id
+                {where}
+                ORDER BY c.id
+            ''', params)
+
+            def live_rows():
+                while True:
+                    rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    yield from self._decode_rows(conn, rows, 7)
+
+            def archived_rows():
+                # 보관본은 대화 하나씩만 풀어서 내보냄
+                for *conversation, codec, payload in archives:
+                    for message in decompress_archive(codec, payload):
+                        yield (*conversation, *message)
+
+            try:
+                yield from heapq.merge(live_rows(), archived_rows(), key=lambda row: (row[0], row[5]))
+            finally:
+                cursor.close()
+                archives.close()
+
+    @traced("db.search")
+    def search(self, query, limit=20):
+        """대화 제목과 메시지 전문 검색
+
+        제목이 일치하는 대화 (최근 순) 뒤에, 일치하는 메시지 중 최근 SEARCH_CANDIDATES개를
+        점수 순으로 대화마다 하나씩 붙여 (conversation_id, title, updated_at, message_id, snippet)
+        목록을 반환합니다. 제목 일치 항목의 message_id는 None이고 snippet은 강조된 제목입니다.
+        """
+        tokens = search_tokens(query)
+        if not tokens:
+            return []
+        match = fts_query(tokens)
+        # 저장 대기 중인 메시지도 검색되도록 먼저 기록
+        self.flush()
+        with self._conn() as conn:
+            titles = conn.execute('''
+                SELECT c.id, c.title, c.updated_at
+                FROM (
+                    SELECT rowid FROM conversations_fts
+                    WHERE conversations_fts MATCH ?
+                    ORDER BY rowid DESC
+                    LIMIT ?
+                ) f
+                JOIN conversations c ON c.id = f.rowid
+                ORDER BY c.id DESC
+            ''', (match, limit)).fetchall()
+            patterns = _token_patterns(tokens)
+            candidates = self._search_candidates(conn, tokens, patterns)
+        results = [
+            (conversation_id, title, updated_at, None, _highlight(title, tokens))
+            for conversation_id, title, updated_at in titles
+        ]
+        seen = {row[0] for row in results}
+        for conversation_id, title, updated_at, message_id, content in _rank_candidates(candidates, patterns):
+            if len(results) >= limit:
+                break
+            if conversation_id not in seen:
+                seen.add(conversation_id)
+                results.append((conversation_id, title, updated_at, message_id, make_snippet(content, tokens, patterns)))
+        return results
+
+    def _search_candidates(self, conn, tokens, patterns):
+        """일치하는 메시지 중 최근 SEARCH_CANDIDATES개 (conversation_id, title, updated_at, message_id, content)
+
+        접두어 색인보다 긴 단어가 단어 그대로 SEARCH_COMMON_DOCS개 이상의 메시지에 나오면 색인된
+        앞부분으로 최근 메시지부터 읽으며 단어 전체로 거르고, 드문 단어이거나 SEARCH_SCAN_LIMIT개를
+        읽어도 모자라면 단어 전체를 접두어로 검색합니다.
+        """
+        sql = '''
+            SELECT m.conversation_id, c.title, c.updated_at, m.id, m.content
+            FROM (
+                SELECT rowid FROM messages_fts
+                WHERE messages_fts MATCH ?
+                ORDER BY rowid DESC
+                LIMIT ?
+            ) f
+            JOIN messages m ON m.id = f.rowid
+            JOIN conversations c ON c.id = m.conversation_id
+        '''
+        common = False
+        if any(len(token) > SEARCH_PREFIX_INDEXED for token in tokens):
+            exact = " ".join(f'"{token}"' if len(token) > SEARCH_PREFIX_INDEXED else f'"{token}"*' for token in tokens)
+            common = conn.execute(
+                'SELECT COUNT(*) FROM (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ? LIMIT ?)',
+                (exact, SEARCH_COMMON_DOCS)
+            ).fetchone()[0] == SEARCH_COMMON_DOCS
+        if not common:
+            return conn.execute(sql, (fts_query(tokens), SEARCH_CANDIDATES)).fetchall()
+        candidates = []
+        scanned = 0
+        cursor = conn.execute(sql, (fts_query(tokens, indexed=True), SEARCH_SCAN_LIMIT))
+        try:
+            for row in cursor:
+                scanned += 1
+                if all(pattern.search(row[-1]) for pattern in patterns):
+                    candidates.append(row)
+                    if len(candidates) == SEARCH_CANDIDATES:
+                        return candidates
+        finally:
+            cursor.close()
+        if scanned < SEARCH_SCAN_LIMIT:
+            return candidates
+        return conn.execute(sql, (fts_query(tokens), SEARCH_CANDIDATES)).fetchall()
+
+    def rebuild_search_index(self):
+        """전문 검색 색인을 처음부터 다시 만들고 정리한 뒤 색인된 메시지 수를 반환합니다."""
+        self.flush()
+        with self._conn() as conn:
+            for statement in SEARCH_BACKFILL:
+                conn.execute(statement)
+            conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('optimize')")
+            conn.execute("INSERT INTO conversations_fts (conversations_fts) VALUES ('optimize')")
+            conn.commit()
+            return conn.execute("SELECT COUNT(*) FROM messages WHERE role != 'system'").fetchone()[0]
+
+    @traced("db.archive_idle_conversations")
+    def archive_idle_conversations(self, idle_days, limit=ARCHIVE_BATCH, codec=ARCHIVE_CODEC):
+        """마지막 활동(또는 복원) 후 idle_days일이 지난 대화를 오래된 것부터 limit개까지 보관하고 개수를 반환합니다.
+
+        대화 행과 요약, 조정 사항은 그대로 두고 메시지만 압축한 blob 하나로 옮깁니다.
+        """
+        self.flush()
+        cutoff = _cutoff(idle_days)
+        with self._conn() as conn:
+            ids = [row[0] for row in conn.execute('''
+                SELECT c.id FROM conversations c
+                WHERE c.updated_at < ? AND (c.restored_at IS NULL OR c.restored_at < ?)
+                  AND NOT EXISTS (SELECT 1 FROM conversation_archives a WHERE a.conversation_id = c.id)
+                  AND EXISTS (SELECT 1 FROM messages m WHERE m.conversation_id = c.id)
+                ORDER BY c.updated_at, c.id
+                LIMIT ?
+            ''', (cutoff, cutoff, limit))]
+            for conversation_id in ids:
+                # 읽고 지우는 사이에 메시지가 추가되지 않도록 쓰기 잠금을 먼저 잡음
+                conn.execute('BEGIN IMMEDIATE')
+                rows = self._decode_rows(conn, conn.execute('''
+                    SELECT id, role, content, blob_ids, created_at FROM messages
+                    WHERE conversation_id = ?
+                    ORDER BY id
+                ''', (conversation_id,)).fetchall(), 2)
+                payload, raw_bytes = compress_archive(rows, codec)
+                conn.execute('''
+                    INSERT INTO conversation_archives (conversation_id, codec, payload, message_count, raw_bytes)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (conversation_id, codec, payload, len(rows), raw_bytes))
+                conn.execute('DELETE FROM messages WHERE conversation_id = ?', (conversation_id,))
+                conn.commit()
+        return len(ids)
+
+    @traced("db.restore_conversation")
+    def restore_conversation(self, conversation_id):
+        """보관된 대화의 메시지를 원래 id로 되돌리고 복원한 메시지 수를 반환합니다. (보관되지 않았으면 0)"""
+        with self._conn() as conn:
+            if conn.execute(
+                'SELECT 1 FROM conversation_archives WHERE conversation_id = ?', (conversation_id,)
+            ).fetchone() is None:
+                return 0
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT codec, payload FROM conversation_archives WHERE conversation_id = ?', (conversation_id,)
+            ).fetchone()
+            if row is None:
+                # 그 사이 다른 연결에서 복원됨
+                conn.rollback()
+                return 0
+            rows = decompress_archive(*row)
+            conn.executemany('''
+                INSERT OR IGNORE INTO messages (id, conversation_id, role, content, blob_ids, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(message_id, conversation_id, role, *encode_body(conn, role, content), created_at)
+                  for message_id, role, content, created_at in rows])
+            conn.execute('DELETE FROM conversation_archives WHERE conversation_id = ?', (conversation_id,))
+            conn.execute(
+                'UPDATE conversations SET restored_at = CURRENT_TIMESTAMP WHERE id = ?', (conversation_id,)
+            )
+            conn.commit()
+        return len(rows)
+
+    @traced("db.delete_archived_conversations")
+    def delete_archived_conversations(self, idle_days):
+        """보관된 대화 중 마지막 활동 후 idle_days일이 지난 대화를 삭제하고 개수를 반환합니다."""
+        cutoff = _cutoff(idle_days)
+        with self._conn() as conn:
+            deleted = conn.execute('''
+                DELETE FROM conversations
+                WHERE updated_at < ?
+                  AND id IN (SELECT conversation_id FROM conversation_archives)
+            ''', (cutoff,)).rowcount
+            conn.commit()
+        if deleted:
+            self._touch_history()
+        return deleted
+
+    @traced("db.delete_unused_blobs")
+    def delete_unused_blobs(self):
+        """어떤 메시지도 참조하지 않는 본문 조각 (삭제/보관된 대화의 조각)을 지우고 개수를 반환합니다."""
+        with self._conn() as conn:
+            # 조각을 참조하는 메시지 쓰기와 겹치지 않도록 쓰기 잠금을 먼저 잡음
+            conn.execute('BEGIN IMMEDIATE')
+            referenced = set()
+            for (blob_ids,) in conn.execute('SELECT blob_ids FROM messages WHERE blob_ids IS NOT NULL'):
+                referenced.update(int(blob_id) for blob_id in blob_ids.split(","))
+            unused = [
+                (blob_id,) for (blob_id,) in conn.execute('SELECT id FROM message_blobs')
+                if blob_id not in referenced
+            ]
+            conn.executemany('DELETE FROM message_blobs WHERE id = ?', unused)
+            conn.commit()
+        self.pool.blobs.discard(blob_id for (blob_id,) in unused)
+        return len(unused)
+
+    def enable_incremental_vacuum(self):
+        """기존 DB를 incremental vacuum 방식으로 바꿉니다. 이미 그렇다면 False를 반환합니다.
+
+        DB 전체를 다시 쓰는 VACUUM이 필요하므로 앱을 멈춘 상태에서 실행해야 합니다.
+        """
+        self.flush()
+        with self._conn() as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+                return False
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        return True
+
+    def incremental_vacuum(self, pages):
+        """빈 페이지를 최대 pages개까지 파일에서 돌려주고 돌려준 페이지 수를 반환합니다."""
+        with self._conn() as conn:
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            if before:
+                # execute는 결과 열이 없는 PRAGMA를 한 단계만 실행하므로 executescript로 끝까지 실행
+                conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+            return before - conn.execute('PRAGMA freelist_count').fetchone()[0]
+
+    def checkpoint(self):
+        """WAL 내용을 DB 파일에 옮기고 WAL 파일을 비웁니다. (회수한 페이지만큼 파일이 줄어듦)"""
+        with self._conn() as conn:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchall()
+
+    def storage_stats(self):
+        """DB 파일 크기 (WAL 포함), 페이지 수, 빈 페이지 수, 보관 현황, 본문 조각 현황을 dict로 반환합니다."""
+        with self._conn() as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            freelist = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            conversations = conn.execute('SELECT COUNT(*) FROM conversations').fetchone()[0]
+            messages = conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+            archived, archived_messages, archive_bytes, raw_bytes = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(message_count), 0),
+                       COALESCE(SUM(LENGTH(payload)), 0), COALESCE(SUM(raw_bytes), 0)
+                FROM conversation_archives
+            ''').fetchone()
+            blobs, blob_bytes = conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM message_blobs'
+            ).fetchone()
+        file_bytes = 0
+        if self.db_path != ":memory:":
+            for suffix in ("", "-wal"):
+                if os.path.exists(self.db_path + suffix):
+                    file_bytes += os.path.getsize(self.db_path + suffix)
+        return {
+            "file_bytes": file_bytes,
+            "page_size": page_size,
+            "page_count": page_count,
+            "freelist_count": freelist,
+            "incremental_vacuum": auto_vacuum == 2,
+            "conversations": conversations,
+            "messages": messages,
+            "archived_conversations": archived,
+            "archived_messages": archived_messages,
+            "archive_bytes": archive_bytes,
+            "archive_raw_bytes": raw_bytes,
+            "blobs": blobs,
+            "blob_bytes": blob_bytes,
+        }
+
+    def save_reference_chunks(self, source, chunks):
+        """참조 문서 청크 저장 (같은 출처의 기존 청크는 교체)"""
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM reference_chunks WHERE source = ?', (source,))
+            c.executemany('''
+                INSERT INTO reference_chunks (source, page, section, content)
+                VALUES (?, ?, ?, ?)
+            ''', [(source, chunk["page"], chunk["section"], chunk["content"]) for chunk in chunks])
+            conn.commit()
+
+    def get_reference_chunks(self):
+        """모든 참조 문서 청크 조회"""
+        with self._conn() as conn:
+            c = conn.cursor()
+            c.execute('''
+                SELECT id, source, page, section, content
+                FROM reference_chunks
+                ORDER BY id
+            ''')
+            return c.fetchall()
+
+    def reference_chunks_version(self):
+        """참조 청크 변경 여부 확인용 (개수, 최대 id) 조회"""
+        with self._conn() as conn:
+            return conn.execute('SELECT COUNT(*), MAX(id) FROM reference_chunks').fetchone()
+
+    def has_reference_chunks(self):
+        """참조 청크가 하나라도 있는지 확인"""
+        with self._conn() as conn:
+            return conn.execute('SELECT 1 FROM reference_chunks LIMIT 1').fetchone() is not None
+
+    def get_reference_document(self, path):
+        """수집된 참조 문서의 (id, sha256) 조회"""
+        with self._conn() as conn:
+            return conn.execute(
+                'SELECT id, sha256 FROM reference_documents WHERE path = ?', (path,)
+            ).fetchone()
+
+    def start_reference_document(self, path, page_count):
+        """참조 문서 수집 시작 (같은 경로의 기존 페이지와 청크는 삭제)"""
+        with self._conn() as conn:
+            c = conn.cursor()
+            # 페이지는 ON DELETE CASCADE로 함께 삭제됨
+            c.execute('DELETE FROM reference_documents WHERE path = ?', (path,))
+            c.execute('DELETE FROM reference_chunks WHERE source = ?', (path,))
+            c.execute('''
+                INSERT INTO reference_documents (path, page_count)
+                VALUES (?, ?)
+            ''', (path, page_count))
+            document_id = c.lastrowid
+            conn.commit()
+        return document_id
+
+    def save_reference_pages(self, document_id, pages):
+        """참조 문서 페이지 배치 저장 (page, start_offset, end_offset, content)"""
+        with self._conn() as conn:
+            conn.executemany('''
+                INSERT INTO reference_pages (document_id, page, start_offset, end_offset, content)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(document_id, *page) for page in pages])
+            conn.commit()
+
+    def finish_reference_document(self, document_id, sha256):
+        """참조 문서 수집 완료 기록"""
+        with self._conn() as conn:
+            conn.execute('''
+                UPDATE reference_documents
+                SET sha256 = ?, ingested_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (sha256, document_id))
+            conn.commit()
+
+    @traced("db.log_intent")
+    def log_intent(self, user_input, intent, confidence, source):
+        """의도 분류 결과 기록"""
+        with self._conn() as conn:
+            conn.execute('''
+                INSERT INTO intent_log (user_input, intent, confidence, source)
+                VALUES (?, ?, ?, ?)
+            ''', (user_input, intent, confidence, source))
+            conn.commit()
+
+    def get_intent_labels(self, source="llm"):
+        """기록된 의도 라벨 (user_input, intent) 조회"""
+        with self._conn() as conn:
+            return conn.execute('''
+                SELECT user_input, intent
+                FROM intent_log
+                WHERE source = ?
+                ORDER BY id
+            ''', (source,)).fetchall()
+
+    def intent_labels_version(self, source="llm"):
+        """의도 라벨 변경 여부 확인용 (개수, 최대 id) 조회"""
+        with self._conn() as conn:
+            return conn.execute(
+                'SELECT COUNT(*), MAX(id) FROM intent_log WHERE source = ?', (source,)
+            ).fetchone()
+
+    def save_metrics(self, records):
+        """지표 기록 (ts, stage, duration_ms, status, attrs) 일괄 저장"""
+        with self._conn() as conn:
+            conn.executemany('''
+                INSERT INTO metrics (ts, stage, duration_ms, status, attrs)
+                VALUES (?, ?, ?, ?, ?)
+            ''', records)
+            conn.commit()
+
+    def get_metrics(self, since):
+        """since 이후의 지표 (stage, duration_ms, status, attrs) 조회"""
+        with self._conn() as conn:
+            return conn.execute('''
+                SELECT stage, duration_ms, status, attrs
+                FROM metrics
+                WHERE ts >= ?
+            ''', (since,)).fetchall()
+
+    def delete_metrics_before(self, ts):
+        """ts 이전의 지표 삭제 후 삭제된 개수 반환"""
+        with self._conn() as conn:
+            deleted = conn.execute('DELETE FROM metrics WHERE ts < ?', (ts,)).rowcount
+            conn.commit()
+        return deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="스키마 마이그레이션을 적용하고 관리 작업을 실행합니다.")
+    parser.add_argument("--db", default="conversations.db", help="데이터베이스 경로")
+    parser.add_argument("--backfill-search", action="store_true", help="기존 대화로 전문 검색 색인을 다시 만듦")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = Database(args.db)
+    print(f"schema version {db.schema_version()} ({time.perf_counter() - started:.1f}s)")
+    if args.backfill_search:
+        started = time.perf_counter()
+        indexed = db.rebuild_search_index()
+        print(f"indexed {indexed} messages ({time.perf_counter() - started:.1f}s)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""대화 내보내기 (JSONL/CSV, 선택적으로 gzip)
+
+메시지 한 개를 한 행으로 하여 DB 커서에서 읽는 대로 바로 인코딩하므로,
+대화 수와 관계없이 메모리 사용량이 일정합니다. 사이드바 다운로드와 CLI에서 함께 사용합니다.
+
+    python export.py --format jsonl --gzip -o conversations.jsonl.gz
+    python export.py --format csv --since 2024-03-01 --until 2024-04-01 --mode educational -o march.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+
+from database import Database
+
+FORMATS = ("jsonl", "csv")
+
+# 내보내는 행의 열 (Database.iter_export_rows의 순서)
+EXPORT_FIELDS = (
+    "conversation_id", "title", "mode", "intent", "conversation_created_at",
+    "message_id", "role", "content", "created_at",
+)
+
+# 필터로 고를 수 있는 대화 모드와 의도 (INTENT_CLASSIFICATION_PROMPT 기준)
+MODES = ("educational", "casual")
+INTENTS = ("Information Retrieval", "Problem Solving", "Learning", "Content Creation", "Leisure")
+
+# 인코딩/압축 단위 (바이트)
+CHUNK_SIZE = 64 * 1024
+
+# Excel에서 한글이 깨지지 않도록 CSV 앞에 붙이는 BOM
+CSV_BOM = "\ufeff"
+
+MIME_TYPES = {"jsonl": "application/jsonl", "csv": "text/csv"}
+
+
+def jsonl_lines(rows):
+    """행마다 JSON 객체 한 줄"""
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows):
+    """머리글 뒤에 행마다 CSV 한 줄"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield CSV_BOM + buffer.getvalue()
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        yield buffer.getvalue()
+
+
+def iter_export(rows, fmt="jsonl", compress=False):
+    """행을 fmt 형식으로 인코딩한 바이트 조각을 CHUNK_SIZE 단위로 내보냅니다. compress이면 gzip으로 압축합니다."""
+    lines = jsonl_lines(rows) if fmt == "jsonl" else csv_lines(rows)
+    # wbits에 16을 더하면 gzip 헤더/트레일러가 붙음
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    parts, size = [], 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= CHUNK_SIZE:
+            chunk = "".join(parts).encode("utf-8")
+            parts, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = "".join(parts).encode("utf-8")
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def file_name(fmt, compress, conversation_id=None):
+    """내보내기 파일 이름"""
+    base = f"conversation_{conversation_id}" if conversation_id is not None else "conversations"
+    return f"{base}.{fmt}" + (".gz" if compress else "")
+
+
+def mime_type(fmt, compress):
+    """내보내기 파일의 MIME 타입"""
+    return "application/gzip" if compress else MIME_TYPES[fmt]
+
+
+def export_to_file(db, file, fmt="jsonl", compress=False, **filters):
+    """필터에 맞는 메시지를 바이너리 파일 객체에 쓰고 쓴 바이트 수를 반환합니다.
+
+    filters는 Database.iter_export_rows의 인자 (since, until, mode, intent, conversation_id)입니다.
+    """
+    written = 0
+    for chunk in iter_export(db.iter_export_rows(**filters), fmt, compress):
+        file.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화를 JSONL/CSV로 내보냅니다. (메시지 한 개가 한 행)")
+    parser.add_argument("--db", default="conversations.db", help="데이터베이스 경로")
+    parser.add_argument("-o", "--output", help="저장할 파일 경로 (없으면 표준 출력)")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--gzip", action="store_true", help="gzip으로 압축")
+    parser.add_argument("--since", help="이 시각 이후에 만든 대화 (UTC, 예: 2024-03-01)")
+    parser.add_argument("--until", help="이 시각 전에 만든 대화 (UTC, 미포함)")
+    parser.add_argument("--mode", choices=MODES)
+    parser.add_argument("--intent", help=f"의도 분류 결과 ({', '.join(INTENTS)})")
+    parser.add_argument("--conversation", type=int, help="대화 id 하나만 내보내기")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    filters = {
+        "since": args.since,
+        "until": args.until,
+        "mode": args.mode,
+        "intent": args.intent,
+        "conversation_id": args.conversation,
+    }
+    if args.output:
+        with open(args.output, "wb") as file:
+            written = export_to_file(db, file, args.format, args.gzip, **filters)
+        print(f"wrote {written} bytes to {args.output}", file=sys.stderr)
+    else:
+        export_to_file(db, sys.stdout.buffer, args.format, args.gzip, **filters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""참조 문서(PDF) 수집 파이프라인
+
+파일 내용의 해시로 변경 여부를 판단하여 바뀐 문서만 다시 파싱하고,
+페이지 텍스트를 배치 단위로 DB에 저장한 뒤 검색용 청크를 만듭니다.
+
+    python ingest.py ADDIE_Model_All_Stages_Detailed_Concepts_with_References.pdf
+    python ingest.py references/ --workers 4
+"""
+import argparse
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import tracing
+from database import Database
+from retrieval import split_into_chunks
+
+# 워커 하나가 한 번에 추출하고 DB에 한 번에 저장하는 페이지 수
+PAGE_BATCH = 16
+
+# 백그라운드 수집을 이미 시작한 (db 경로, 문서 경로) 목록
+_started = set()
+_started_lock = threading.Lock()
+
+
+def fingerprint(path, block_size=1 << 16):
+    """파일 내용의 SHA-256 해시를 반환합니다."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_pages(path):
+    """PDF 페이지 수를 반환합니다."""
+    # PDF 파서는 수집할 때만 필요하므로 앱 시작 시 가져오지 않음
+    import PyPDF2
+
+    with open(path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pages(path, start, stop):
+    """PDF의 [start, stop) 범위 페이지 텍스트를 추출합니다."""
+    import PyPDF2
+
+    with open(path, "rb") as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_page_batches(path, page_count, workers):
+    """(시작 페이지, 텍스트 목록) 배치를 페이지 순서대로 생성합니다."""
+    ranges = [(start, min(start + PAGE_BATCH, page_count)) for start in range(0, page_count, PAGE_BATCH)]
+    if workers <= 1 or len(ranges) <= 1:
+        for start, stop in ranges:
+            yield start, extract_pages(path, start, stop)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(extract_pages, path, start, stop) for start, stop in ranges]
+        for (start, _), future in zip(ranges, futures):
+            yield start, future.result()
+
+
+def ingest_file(db, path, workers=1):
+    """PDF 하나를 수집합니다. 내용이 바뀌지 않았으면 건너뛰고 False를 반환합니다."""
+    path = os.path.normpath(path)
+    sha256 = fingerprint(path)
+    existing = db.get_reference_document(path)
+    if existing and existing[1] == sha256:
+        return False
+
+    page_count = count_pages(path)
+    document_id = db.start_reference_document(path, page_count)
+
+    pages = []
+    offset = 0
+    for start, texts in iter_page_batches(path, page_count, workers):
+        rows = []
+        for page, text in enumerate(texts, start=start + 1):
+            rows.append((page, offset, offset + len(text), text))
+            offset += len(text)
+        db.save_reference_pages(document_id, rows)
+        pages.extend(texts)
+
+    db.save_reference_chunks(path, split_into_chunks(pages))
+    # 해시는 모든 페이지와 청크가 저장된 뒤에 기록 (중간 실패 시 다음에 다시 수집)
+    db.finish_reference_document(document_id, sha256)
+    return True
+
+
+def find_documents(path):
+    """파일 또는 디렉터리 경로에서 수집할 PDF 목록을 반환합니다."""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(".pdf")
+        )
+    return [path]
+
+
+def ingest(db, paths, workers=1):
+    """여러 파일/디렉터리를 수집하고 (새로 수집, 건너뜀) 경로 목록을 반환합니다."""
+    ingested, skipped = [], []
+    for path in paths:
+        for document in find_documents(path):
+            (ingested if ingest_file(db, document, workers) else skipped).append(document)
+    return ingested, skipped
+
+
+def ingest_in_background(db_path, paths):
+    """요청 처리 경로를 막지 않도록 별도 스레드에서 프로세스당 한 번 수집합니다."""
+    key = (os.path.abspath(db_path), tuple(paths))
+    with _started_lock:
+        if key in _started:
+            return
+        _started.add(key)
+
+    def run():
+        try:
+            with tracing.span("ingest") as span:
+                ingested, skipped = ingest(Database(db_path), paths)
+                span.set(ingested=len(ingested), skipped=len(skipped))
+        except Exception as e:
+            tracing.event("ingest.failed", error=str(e))
+            with _started_lock:
+                _started.discard(key)
+
+    threading.Thread(target=run, name="reference-ingest", daemon=True).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="참조 문서(PDF)를 수집합니다.")
+    parser.add_argument("paths", nargs="+", help="PDF 파일 또는 PDF가 들어 있는 디렉터리")
+    parser.add_argument("--db", default="conversations.db", help="데이터베이스 경로")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="페이지 추출 프로세스 수")
+    args = parser.parse_args()
+
+    ingested, skipped = ingest(Database(args.db), args.paths, args.workers)
+    for path in ingested:
+        print(f"ingested  {path}")
+    for path in skipped:
+        print(f"unchanged {path}")
+
+
+if __name__ == "__main__":
+    main()
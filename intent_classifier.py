@@ -0,0 +1,203 @@
+"""LLM 호출 없이 의도를 분류하는 로컬 나이브 베이즈 분류기
+
+INTENT_CLASSIFICATION_PROMPT의 예시와 intent_log에 기록된 LLM 라벨로 학습하며,
+충분히 학습되었고 확신도가 임계값 이상일 때만 결과를 사용합니다.
+
+    python intent_classifier.py --db conversations.db --threshold 0.9
+"""
+import argparse
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from database import Database
+from prompts import INTENT_CLASSIFICATION_PROMPT
+
+# 로컬 결과를 사용할 최소 확신도
+CONFIDENCE_THRESHOLD = 0.9
+
+# 로컬 분류기를 사용하기 위한 최소 LLM 라벨 수 (그 전에는 항상 LLM 사용)
+MIN_TRAINING_LABELS = 200
+
+# 새 LLM 라벨이 이만큼 쌓이면 다시 학습
+RETRAIN_EVERY = 50
+
+# 라벨 변경 여부를 확인하는 간격 (초)
+REFRESH_SECONDS = 60
+
+# 라플라스 평활 계수
+SMOOTHING = 0.5
+
+TOKEN_PATTERN = re.compile(r"[0-9a-z가-힣]+")
+SEED_PATTERN = re.compile(r"\*\*(?P<label>[^*]+)\*\*:[^\n]*\n\s*Examples: (?P<examples>[^\n]+)")
+QUOTED_PATTERN = re.compile(r'"([^"]+)"')
+
+# db 경로별 (다음 확인 시각, 분류기)
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def seed_examples():
+    """의도 분류 프롬프트에 있는 예시를 (text, label) 목록으로 반환합니다."""
+    return [
+        (text, match["label"])
+        for match in SEED_PATTERN.finditer(INTENT_CLASSIFICATION_PROMPT)
+        for text in QUOTED_PATTERN.findall(match["examples"])
+    ]
+
+
+def features(text):
+    """단어 토큰과, 조사가 붙는 한글 단어는 글자 바이그램까지 특징으로 사용합니다."""
+    result = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        result.append(token)
+        if not token.isascii() and len(token) > 1:
+            result.extend("~" + token[i:i + 2] for i in range(len(token) - 1))
+    return result
+
+
+class NaiveBayesIntentClassifier:
+    """다항 나이브 베이즈 의도 분류기"""
+
+    def __init__(self, alpha=SMOOTHING):
+        self.alpha = alpha
+        self.log_priors = {}
+        self.log_likelihoods = {}
+        self.unknown = {}
+        self.labeled_count = 0
+
+    def fit(self, examples, labeled_count=0):
+        """(text, label) 목록으로 학습합니다. labeled_count는 그중 LLM 라벨 수입니다."""
+        label_counts = Counter()
+        token_counts = defaultdict(Counter)
+        for text, label in examples:
+            label_counts[label] += 1
+            token_counts[label].update(features(text))
+        vocabulary = set()
+        for counts in token_counts.values():
+            vocabulary.update(counts)
+
+        total = sum(label_counts.values())
+        self.log_priors = {}
+        self.log_likelihoods = {}
+        self.unknown = {}
+        for label, count in label_counts.items():
+            counts = token_counts[label]
+            denominator = sum(counts.values()) + self.alpha * (len(vocabulary) + 1)
+            self.log_priors[label] = math.log(count / total)
+            self.log_likelihoods[label] = {
+                token: math.log((n + self.alpha) / denominator) for token, n in counts.items()
+            }
+            self.unknown[label] = math.log(self.alpha / denominator)
+        self.labeled_count = labeled_count
+        return self
+
+    def predict_proba(self, text):
+        """라벨별 확률을 반환합니다."""
+        tokens = features(text)
+        scores = {}
+        for label, log_prior in self.log_priors.items():
+            likelihoods = self.log_likelihoods[label]
+            unknown = self.unknown[label]
+            scores[label] = log_prior + sum(likelihoods.get(token, unknown) for token in tokens)
+        top = max(scores.values())
+        exps = {label: math.exp(score - top) for label, score in scores.items()}
+        norm = sum(exps.values())
+        return {label: value / norm for label, value in exps.items()}
+
+    def predict(self, text):
+        """(라벨, 확신도)를 반환합니다."""
+        proba = self.predict_proba(text)
+        label = max(proba, key=proba.get)
+        return label, proba[label]
+
+
+def train(db):
+    """프롬프트 예시와 기록된 LLM 라벨로 분류기를 학습합니다."""
+    labeled = [tuple(row) for row in db.get_intent_labels()]
+    return NaiveBayesIntentClassifier().fit(seed_examples() + labeled, len(labeled))
+
+
+def get_classifier(db):
+    """DB 경로별로 공유되는 분류기를 반환합니다. 새 라벨이 충분히 쌓이면 다시 학습합니다."""
+    now = time.monotonic()
+    with _classifiers_lock:
+        cached = _classifiers.get(db.db_path)
+        if cached and cached[0] > now:
+            return cached[1]
+        classifier = cached[1] if cached else None
+        count = db.intent_labels_version()[0]
+        if classifier is None or count - classifier.labeled_count >= RETRAIN_EVERY:
+            classifier = train(db)
+        _classifiers[db.db_path] = (now + REFRESH_SECONDS, classifier)
+        return classifier
+
+
+def classify_local(db, user_input, threshold=CONFIDENCE_THRESHOLD):
+    """확신할 수 있으면 로컬 분류 결과를, 아니면 None을 반환합니다."""
+    classifier = get_classifier(db)
+    if classifier.labeled_count < MIN_TRAINING_LABELS:
+        return None
+    label, confidence = classifier.predict(user_input)
+    if confidence < threshold:
+        return None
+    return {"intent": label, "confidence": round(confidence, 3), "reason": "로컬 분류기 결과"}
+
+
+def evaluate(examples, folds=5, seed=0):
+    """교차 검증으로 각 LLM 라벨에 대한 (실제 라벨, 예측 라벨, 확신도) 목록을 반환합니다."""
+    examples = list(examples)
+    random.Random(seed).shuffle(examples)
+    predictions = []
+    for fold in range(folds):
+        test = examples[fold::folds]
+        train_set = [example for i, example in enumerate(examples) if i % folds != fold]
+        classifier = NaiveBayesIntentClassifier().fit(seed_examples() + train_set, len(train_set))
+        for text, label in test:
+            predicted, confidence = classifier.predict(text)
+            predictions.append((label, predicted, confidence))
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 의도 분류기를 학습하고 LLM 라벨 대비 정확도를 평가합니다.")
+    parser.add_argument("--db", default="conversations.db", help="데이터베이스 경로")
+    parser.add_argument("--folds", type=int, default=5, help="교차 검증 분할 수")
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD, help="로컬 결과 사용 확신도")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    labeled = [tuple(row) for row in db.get_intent_labels()]
+    print(f"seed examples: {len(seed_examples())}, llm labels: {len(labeled)}")
+    for label, count in Counter(label for _, label in labeled).most_common():
+        print(f"  {label:<22} {count}")
+    if len(labeled) < args.folds:
+        print("not enough llm labels to evaluate")
+        return
+
+    predictions = evaluate(labeled, args.folds)
+    accuracy = sum(label == predicted for label, predicted, _ in predictions) / len(predictions)
+    print(f"accuracy (all): {accuracy:.3f}")
+    print(f"{'threshold':>9} {'avoided':>8} {'accuracy':>9}")
+    for threshold in sorted({0.5, 0.7, 0.8, 0.9, 0.95, 0.99, args.threshold}):
+        confident = [(label, predicted) for label, predicted, confidence in predictions if confidence >= threshold]
+        avoided = len(confident) / len(predictions)
+        correct = sum(label == predicted for label, predicted in confident) / len(confident) if confident else 0.0
+        print(f"{threshold:>9.2f} {avoided:>8.1%} {correct:>9.3f}")
+
+    classifier = train(db)
+    texts = [text for text, _ in labeled[:1000]]
+    started = time.perf_counter()
+    for text in texts:
+        classifier.predict(text)
+    elapsed = (time.perf_counter() - started) / len(texts)
+    print(f"predict: {elapsed * 1e6:.1f} us/call")
+    if len(labeled) < MIN_TRAINING_LABELS:
+        print(f"local fast path disabled until {MIN_TRAINING_LABELS} llm labels are logged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""LLM 백엔드와 파이프라인 단계별 모델 라우팅
+
+단계(의도 분류, 프레임워크 생성, 피드백 분석, 대화 요약, 응답 스트리밍)마다 백엔드, 모델,
+요청 파라미터, 시간 제한을 정하고, 시간 초과나 연결 오류가 나면 보조 백엔드로 다시 요청합니다.
+StageRoute는 AsyncOpenAI와 같은 route.chat.completions.create(...) 형태로 호출하므로
+request_json, LLM 캐시, 요약 등 기존 호출 코드를 그대로 사용합니다.
+
+설정은 secrets의 [llm]에서 읽습니다. (README의 Configuration 참고)
+
+    [llm.backends.local]
+    base_url = "http://localhost:11434/v1"
+
+    [llm.stages.intent]
+    backend = "local"
+    model = "qwen2.5:3b"
+    timeout = 5
+    fallback = "openai"
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import openai
+
+import api_client
+import tracing
+from context_window import count_tokens, message_tokens
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# 사이드바에서 입력한 API 키를 쓰는 기본 백엔드 이름
+DEFAULT_BACKEND = "openai"
+
+# 파이프라인 단계와 단계별 기본 시간 제한 (초, 스트리밍은 첫 응답까지)
+STAGE_TIMEOUTS = {
+    "intent": 10.0,
+    "feedback": 15.0,
+    "framework": 60.0,
+    "summary": 30.0,
+    "reply": 60.0,
+}
+STAGES = tuple(STAGE_TIMEOUTS)
+
+# 단계 설정 중 요청 파라미터가 아닌 키
+ROUTE_KEYS = ("backend", "model", "timeout", "fallback", "fallback_model", "fallback_timeout")
+
+# 보조 백엔드로 넘기는 오류 (시간 초과, 연결 실패, 요청 한도, 서버 오류)
+FALLBACK_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+# 가짜 백엔드가 JSON 모드 요청에 돌려주는 객체 (모든 단계의 필수 키 포함)
+FAKE_JSON = {
+    "intent": "Learning",
+    "confidence": 0.9,
+    "reason": "fake backend",
+    "status": "진행",
+    "feedback_type": "기타",
+    "analysis_content": "Fake analysis.",
+    "design_content": "Fake design.",
+}
+
+# 가짜 백엔드 스트리밍 청크 크기 (문자)
+FAKE_CHUNK_CHARS = 8
+
+
+def fake_reply(messages, json_mode=False):
+    """가짜 백엔드의 기본 응답: JSON 모드면 FAKE_JSON, 아니면 마지막 메시지를 되돌려 줍니다."""
+    if json_mode:
+        return json.dumps(FAKE_JSON, ensure_ascii=False)
+    return f"Fake reply: {messages[-1]['content'][:200]}"
+
+
+class _FakeStream:
+    """스트리밍 응답 청크를 내보내고 마지막에 사용량 청크를 보내는 비동기 이터레이터"""
+
+    def __init__(self, text, usage, chunk_chars=FAKE_CHUNK_CHARS):
+        chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text[i:i + chunk_chars]),
+                                                     finish_reason=None)], usage=None)
+            for i in range(0, len(text), chunk_chars)
+        ]
+        chunks.append(SimpleNamespace(choices=[], usage=usage))
+        self._chunks = iter(chunks)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._chunks)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+class FakeClient:
+    """네트워크 없이 프로세스 안에서 응답하는 AsyncOpenAI 호환 클라이언트 (테스트, 오프라인 실행용)
+
+    responder(messages, json_mode)가 응답 본문을 정하며, 받은 요청은 calls에 남습니다.
+    delay를 주면 응답 전에 기다리므로 시간 초과와 대체 경로도 확인할 수 있습니다.
+    """
+
+    def __init__(self, responder=fake_reply, delay=0.0):
+        self.responder = responder
+        self.delay = delay
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages, stream=False, **params):
+        self.calls.append(dict(params, model=model, messages=messages, stream=stream))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        text = self.responder(messages, json_mode="response_format" in params)
+        usage = SimpleNamespace(
+            prompt_tokens=sum(message_tokens(m) for m in messages),
+            completion_tokens=count_tokens(text)
+        )
+        if stream:
+            return _FakeStream(text, usage)
+        message = SimpleNamespace(role="assistant", content=text)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+
+class Target:
+    """단계 요청을 보낼 백엔드 하나 (클라이언트, 모델, 덮어쓸 파라미터, 시간 제한)"""
+
+    __slots__ = ("backend", "client", "model", "params", "timeout")
+
+    def __init__(self, backend, client, model, params=None, timeout=None):
+        self.backend = backend
+        self.client = client
+        self.model = model
+        self.params = params or {}
+        self.timeout = timeout
+
+
+class StageRoute:
+    """한 단계의 요청을 기본 백엔드로 보내고, 실패하면 다음 백엔드로 다시 보내는 클라이언트
+
+    AsyncOpenAI와 같은 형태로 호출하며, model 인자 대신 라우트의 모델을 쓰고
+    단계 설정의 파라미터(temperature 등)는 호출 코드의 값보다 우선합니다.
+    스트리밍 요청은 첫 응답을 받을 때까지만 시간 제한과 대체가 적용됩니다.
+    """
+
+    def __init__(self, stage, targets):
+        self.stage = stage
+        self.targets = targets
+        self.model = targets[0].model
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model=None, **request):
+        for i, target in enumerate(self.targets):
+            try:
+                return await asyncio.wait_for(
+                    target.client.chat.completions.create(model=target.model, **dict(request, **target.params)),
+                    target.timeout
+                )
+            except FALLBACK_ERRORS as e:
+                if i == len(self.targets) - 1:
+                    raise
+                tracing.event(
+                    f"llm.fallback.{self.stage}",
+                    backend=target.backend,
+                    fallback=self.targets[i + 1].backend,
+                    error=type(e).__name__
+                )
+
+
+class Router:
+    """단계 이름별 StageRoute"""
+
+    def __init__(self, routes):
+        self.routes = routes
+
+    def route(self, stage):
+        return self.routes[stage]
+
+    @classmethod
+    def single(cls, client, model=DEFAULT_MODEL):
+        """모든 단계를 클라이언트 하나와 모델 하나로 보내는 라우터 (시간 제한은 단계 기본값)"""
+        return cls({
+            stage: StageRoute(stage, [Target(DEFAULT_BACKEND, client, model, timeout=timeout)])
+            for stage, timeout in STAGE_TIMEOUTS.items()
+        })
+
+
+def backend_configs(config):
+    """백엔드 이름별 설정 (기본 백엔드는 설정이 없어도 포함)"""
+    backends = {DEFAULT_BACKEND: {}}
+    backends.update({name: dict(options) for name, options in config.get("backends", {}).items()})
+    return backends
+
+
+def make_client(options, api_key):
+    """백엔드 설정으로 클라이언트를 만듭니다. (type: "openai" 호환 서버 또는 "fake")
+
+    api_key가 설정에 없으면 사이드바에서 입력한 키를 사용합니다.
+    """
+    kind = options.get("type", "openai")
+    if kind == "fake":
+        return FakeClient(delay=options.get("delay", 0.0))
+    if kind != "openai":
+        raise ValueError(f"알 수 없는 LLM 백엔드 종류: {kind}")
+    return api_client.get_async_client(options.get("api_key", api_key), options.get("base_url"))
+
+
+def build_router(config, api_key):
+    """secrets의 [llm] 설정(dict)으로 라우터를 만듭니다. 설정이 없는 단계는 기본 백엔드의 기본 모델을 씁니다."""
+    backends = backend_configs(config)
+    clients = {}
+
+    def target(backend, model, params, timeout):
+        if backend not in backends:
+            raise ValueError(f"설정에 없는 LLM 백엔드: {backend}")
+        if backend not in clients:
+            clients[backend] = make_client(backends[backend], api_key)
+        model = model or backends[backend].get("model", DEFAULT_MODEL)
+        return Target(backend, clients[backend], model, params, timeout)
+
+    routes = {}
+    for stage, default_timeout in STAGE_TIMEOUTS.items():
+        options = config.get("stages", {}).get(stage, {})
+        params = {key: value for key, value in options.items() if key not in ROUTE_KEYS}
+        targets = [target(
+            options.get("backend", DEFAULT_BACKEND),
+            options.get("model"),
+            params,
+            options.get("timeout", default_timeout)
+        )]
+        if options.get("fallback"):
+            # 보조 백엔드에는 모델 고유 파라미터를 넘기지 않음
+            targets.append(target(
+                options["fallback"],
+                options.get("fallback_model"),
+                {},
+                options.get("fallback_timeout", default_timeout)
+            ))
+        routes[stage] = StageRoute(stage, targets)
+    return Router(routes)
+
+
+def validate_key(config, api_key):
+    """기본 백엔드에 대해 API 키를 검증합니다. 가짜 백엔드는 항상 유효합니다."""
+    options = backend_configs(config)[DEFAULT_BACKEND]
+    if options.get("type", "openai") == "fake":
+        return True
+    return api_client.validate_api_key(options.get("api_key", api_key), options.get("base_url"))
+
@@ -0,0 +1,145 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+
+import tracing
+from structured_output import parse_json, StructuredOutputError
+
+# 캐시 항목 유지 시간 (초)과 최대 항목 수
+CACHE_TTL = 7 * 24 * 3600
+CACHE_MAX_ENTRIES = 20000
+
+# 몇 번 저장할 때마다 만료/초과 항목을 정리할지
+EVICT_EVERY = 200
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def normalize_prompt(text):
+    """공백과 대소문자 차이를 무시하도록 프롬프트를 정규화합니다."""
+    return " ".join(text.split()).casefold()
+
+
+def make_key(model, messages, params):
+    """모델, 정규화된 메시지, 요청 파라미터로 캐시 키를 만듭니다."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": [[m["role"], normalize_prompt(m["content"])] for m in messages],
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """여러 세션이 공유하는 SQLite 기반 LLM 응답 캐시 (TTL + LRU)"""
+
+    def __init__(self, db, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.db = db
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """캐시된 응답을 반환합니다. 없거나 만료되었으면 None"""
+        now = time.time()
+        with self.db._conn() as conn:
+            row = conn.execute(
+                'SELECT response FROM llm_cache WHERE key = ? AND created_at > ?',
+                (key, now - self.ttl)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    'UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?',
+                    (now, key)
+                )
+                conn.commit()
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, key, response):
+        """응답을 저장하고 주기적으로 만료/초과 항목을 정리합니다."""
+        now = time.time()
+        with self.db._conn() as conn:
+            conn.execute('''
+                INSERT INTO llm_cache (key, response, created_at, last_used)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    response = excluded.response,
+                    created_at = excluded.created_at,
+                    last_used = excluded.last_used
+            ''', (key, response, now, now))
+            conn.commit()
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """만료된 항목과 최대 개수를 넘는 오래 안 쓴 항목을 삭제합니다."""
+        with self.db._conn() as conn:
+            conn.execute('DELETE FROM llm_cache WHERE created_at <= ?', (time.time() - self.ttl,))
+            conn.execute('''
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache
+                    ORDER BY last_used DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entries,))
+            conn.commit()
+
+    async def complete(self, request, model, messages, **params):
+        """캐시를 거쳐 request(model=, messages=, **params)의 JSON 결과(dict)를 반환합니다.
+
+        request는 AsyncOpenAI 호환 클라이언트로 요청하는 코루틴 함수이며, 실패한 요청은 캐시에 저장하지 않습니다.
+        """
+        key = make_key(model, messages, params)
+        content = await asyncio.to_thread(self.get, key)
+        if content is not None:
+            try:
+                result = parse_json(content)
+            except StructuredOutputError:
+                pass
+            else:
+                tracing.annotate(cache="hit")
+                return result
+        tracing.annotate(cache="miss")
+        result = await request(model=model, messages=messages, **params)
+        await asyncio.to_thread(self.put, key, json.dumps(result, ensure_ascii=False))
+        return result
+
+    def stats(self):
+        """적중/실패 횟수, 적중률, 저장된 항목 수를 반환합니다."""
+        with self.db._conn() as conn:
+            entries = conn.execute('SELECT COUNT(*) FROM llm_cache').fetchone()[0]
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": entries,
+            }
+
+
+def get_cache(db):
+    """DB 경로별로 프로세스 전체에서 공유되는 캐시를 반환합니다."""
+    with _caches_lock:
+        cache = _caches.get(db.db_path)
+        if cache is None:
+            cache = _caches[db.db_path] = LLMCache(db)
+        return cache
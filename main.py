@@ -1,55 +1,33 @@
 import streamlit as st
-from openai import OpenAI
-from utils import render_with_latex
-from prompts import (
-    for_system_prompt_with_reference,
-    for_system_prompt_without_reference,
-    system_prompt,
-    COMMON_INSTRUCTIONS,
-    feedback_analysis_prompt,
-    INTENT_CLASSIFICATION_PROMPT
-)
-from sidebar import render_sidebar
+from utils import render_with_latex, render_cached
+from sidebar import render_sidebar, MESSAGE_PAGE_SIZE
 from database import Database
+from llm_backend import build_router
+from streaming import StreamRenderer
+from ingest import ingest_in_background
+import maintenance
+from tutor_engine import TutorEngine, run_sync, iterate_sync
+import tracing
 import os
-import json
-import PyPDF2
-
-def read_pdf_content(pdf_path):
-    """PDF 파일의 내용을 읽어서 문자열로 반환합니다."""
-    content = ""
-    with open(pdf_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        for page in pdf_reader.pages:
-            content += page.extract_text()
-    return content
-
-def classify_user_intent(user_input, client):
-    """사용자 입력의 의도를 분류합니다."""
-    try:
-        prompt = INTENT_CLASSIFICATION_PROMPT.format(user_input=user_input)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.1,
-            max_tokens=200
-        )
-        
-        content = response.choices[0].message.content
-        content = content.replace("```json", "").replace("```", "").strip()
-        content = " ".join(line.strip() for line in content.splitlines())
-        result = json.loads(content)
-        
-        return result
-        
-    except Exception as e:
-        st.error(f"의도 분류 중 오류가 발생했습니다: {str(e)}")
-        return {"intent": "Learning", "confidence": 0.5, "reason": "오류로 인한 기본값"}
+import time
 
 # PDF 파일 경로 설정
 ADDIE_PDF_PATH = "ADDIE_Model_All_Stages_Detailed_Concepts_with_References.pdf"
 
+# 의도 분류와 프레임워크 생성을 동시에 시작하는 투기 실행 모드 (secrets의 [features]에서 설정)
+SPECULATIVE_FRAMEWORK = st.secrets.get("features", {}).get("speculative_framework", False)
+
+# 단계별 지표 기록 위치 ("sqlite", "jsonl", "off")와 콘솔 출력 여부 (secrets의 [features]에서 설정)
+METRICS_SINK = st.secrets.get("features", {}).get("metrics", "sqlite")
+METRICS_JSONL_PATH = "metrics.jsonl"
+TRACE_ECHO = st.secrets.get("features", {}).get("trace_echo", False)
+
+# 지표 정리와 DB 공간 회수, 설정한 경우 오래된 대화 보관 (secrets의 [maintenance], enabled = false로 끔)
+MAINTENANCE_CONFIG = st.secrets.get("maintenance", {})
+
+# 단계별 LLM 백엔드/모델 설정 (secrets의 [llm], 없으면 모든 단계가 OpenAI의 기본 모델 사용)
+LLM_CONFIG = st.secrets.get("llm", {})
+
 # 세션 상태 초기화
 
 # 메시지가 없으면 빈 리스트로 초기화
@@ -76,223 +54,228 @@ if "conversation_mode" not in st.session_state:
 if "history_loaded" not in st.session_state:
     st.session_state.history_loaded = False
 
-# 데이터베이스 초기화
-db = Database()
+# 화면에 표시할 최근 메시지 수
+if "display_window" not in st.session_state:
+    st.session_state.display_window = MESSAGE_PAGE_SIZE
+
+# DB에서 추가로 불러온 오래된 메시지 (표시 전용)와 다음 페이지 위치
+if "older_messages" not in st.session_state:
+    st.session_state.older_messages = []
+if "older_cursor" not in st.session_state:
+    st.session_state.older_cursor = None
+
+# 대화별 누적 요약 캐시
+if "context_summary" not in st.session_state:
+    st.session_state.context_summary = {}
+
+# 히스토리에서 불러올 때 맥락 유지를 위해 함께 불러온 시스템 프롬프트 id
+if "pinned_message_id" not in st.session_state:
+    st.session_state.pinned_message_id = None
+
+@st.cache_resource
+def get_database():
+    """프로세스 전체에서 공유하는 데이터베이스 (스키마 확인과 지표 기록 설정은 처음 한 번만)"""
+    db = Database()
+    tracing.configure(
+        db=db if METRICS_SINK == "sqlite" else None,
+        jsonl_path=METRICS_JSONL_PATH if METRICS_SINK == "jsonl" else None,
+        echo=TRACE_ECHO,
+    )
+    return db
+
+@st.cache_resource
+def start_reference_ingest(db_path):
+    """ADDIE 문서가 아직 수집되지 않았으면 백그라운드에서 수집을 시작합니다. (프로세스당 한 번 확인)
+
+    수집이 끝나기 전까지는 참조 문서 없이 LLM의 추론에 기반하여 진행합니다.
+    """
+    if os.path.exists(ADDIE_PDF_PATH) and not Database(db_path).has_reference_chunks():
+        ingest_in_background(db_path, [ADDIE_PDF_PATH])
+
+@st.cache_resource
+def start_maintenance(db_path):
+    """보존 정책을 주기적으로 적용하는 백그라운드 작업을 시작합니다. (프로세스당 한 번)"""
+    if MAINTENANCE_CONFIG.get("enabled", True):
+        maintenance.start_background(db_path, maintenance.load_policy(MAINTENANCE_CONFIG))
 
-# ADDIE 문서가 데이터베이스에 없으면 저장 시도
-if not db.get_addie_document():
-    try:
-        if os.path.exists(ADDIE_PDF_PATH):
-            addie_content = read_pdf_content(ADDIE_PDF_PATH)
-            db.save_addie_document(addie_content)
-    except Exception as e:
-        st.info("ADDIE 문서를 찾을 수 없습니다. LLM의 추론에 기반하여 진행합니다.")
+# 데이터베이스 초기화
+db = get_database()
+start_reference_ingest(db.db_path)
+start_maintenance(db.db_path)
 
 # Streamlit 기본 설정
 st.set_page_config(page_title="Dusan Baek", page_icon="🧑‍🏫")
 st.title("🧑‍🏫 AI Tutor")
 
 # 사이드바 렌더링
-render_sidebar()
+with tracing.span("render.sidebar"):
+    render_sidebar(db)
 
 # API 키 유효성 검증 상태 확인
 if not st.session_state.api_key_valid:
     st.warning("OpenAI API 키가 유효하지 않습니다. 사이드바에서 유효한 API 키를 입력해주세요.")
     st.stop()  # 여기서 실행을 중단하여 채팅 기능 제한
 
-# OpenAI 클라이언트 설정
+# 단계별 모델 라우터 설정 (키/서버별로 공유되는 클라이언트 재사용)
 api_key = st.session_state.get("openai_api_key", st.secrets.get("openai", {}).get("api_key", ""))
-client = OpenAI(api_key=api_key)
+engine = TutorEngine(build_router(LLM_CONFIG, api_key), db)
+
+# 세션 상태의 메시지/요약 객체를 공유하는 대화 세션
+tutor = engine.session(
+    conversation_id=st.session_state.current_conversation_id,
+    messages=st.session_state.messages,
+    mode=st.session_state.conversation_mode,
+    context_summary=st.session_state.context_summary,
+)
 
 # 히스토리에서 불러온 경우 답변 생성 로직을 건너뜀
 if st.session_state.get("history_loaded", False):
     st.session_state.history_loaded = False  # 한 번만 건너뜀
     # 메시지 렌더만 하고, 답변 생성/append는 하지 않음
 
-# 이전 대화 히스토리 출력 (첫 번째 메시지가 아닌 경우에만)
+def render_message(msg):
+    """메시지 하나를 렌더링합니다."""
+    with st.chat_message(msg["role"]):
+        if msg["role"] == "system":
+            if msg["content"] == "REFRESH":
+                return  # REFRESH 메시지는 표시하지 않음
+            # 교육 모드인 경우에만 시스템 프롬프트 표시
+            if st.session_state.conversation_mode == "educational":
+                with st.expander("시스템 프롬프트 보기"):
+                    st.markdown(render_cached(msg["content"]))
+            # 일반 대화 모드에서는 시스템 프롬프트 숨김
+        elif msg["role"] == "assistant":
+            st.markdown(render_cached(msg["content"]))
+        else:
+            st.markdown(msg["content"])
+
+def split_pinned(messages):
+    """맨 위에 고정 표시할 첫 시스템 프롬프트와 나머지 메시지로 나눕니다."""
+    if messages and messages[0]["role"] == "system":
+        return messages[:1], messages[1:]
+    return [], messages
+
+def show_more_messages():
+    """화면에 표시할 메시지 범위를 한 페이지 넓힙니다."""
+    _, rest = split_pinned(st.session_state.messages)
+    if len(rest) > st.session_state.display_window:
+        # 세션에 이미 있는 메시지부터 펼침
+        st.session_state.display_window += MESSAGE_PAGE_SIZE
+        return
+    # 그보다 오래된 메시지는 DB에서 페이지 단위로 가져옴
+    rows, cursor = db.get_messages_page(
+        st.session_state.current_conversation_id,
+        before_id=st.session_state.older_cursor,
+        limit=MESSAGE_PAGE_SIZE,
+    )
+    older = [
+        {"role": role, "content": content}
+        for message_id, role, content in rows
+        if message_id != st.session_state.pinned_message_id
+    ]
+    st.session_state.older_messages = older + st.session_state.older_messages
+    st.session_state.older_cursor = cursor
+
+# 이전 대화 히스토리 출력 (첫 번째 메시지가 아닌 경우에만, 최근 메시지만 표시)
 if st.session_state.messages and st.session_state.system_prompt_created:
-    for msg in st.session_state.messages:
-        with st.chat_message(msg["role"]):
-            if msg["role"] == "system":
-                if msg["content"] == "REFRESH":
-                    continue  # REFRESH 메시지는 표시하지 않음
-                # 교육 모드인 경우에만 시스템 프롬프트 표시
-                if st.session_state.conversation_mode == "educational":
-                    with st.expander("시스템 프롬프트 보기"):
-                        st.markdown(render_with_latex(msg["content"]))
-                # 일반 대화 모드에서는 시스템 프롬프트 숨김
-            elif msg["role"] == "assistant":
-                st.markdown(render_with_latex(msg["content"]))
-            else:
-                st.markdown(msg["content"])
+    with tracing.span("render.history", messages=len(st.session_state.messages)):
+        pinned, rest = split_pinned(st.session_state.messages)
+        window = st.session_state.display_window
+        hidden_in_session = len(rest) > window
+
+        # 시스템 프롬프트는 범위와 상관없이 항상 맨 위에 표시 (피드백 조정 사항 포함)
+        adjustment_section = run_sync(tutor.adjustment_section()) if pinned else ""
+        for msg in pinned:
+            if adjustment_section:
+                msg = dict(msg, content=msg["content"].rstrip() + "\n\n" + adjustment_section)
+            render_message(msg)
+
+        if hidden_in_session or st.session_state.older_cursor is not None:
+            if st.button("이전 메시지 더 보기", key="show_more_messages"):
+                show_more_messages()
+                st.rerun()
+
+        if not hidden_in_session:
+            for msg in st.session_state.older_messages:
+                render_message(msg)
+        for msg in rest[-window:]:
+            render_message(msg)
 
 # 사용자 입력
 user_input = st.chat_input("메시지를 입력하세요")
 
-def analyze_feedback(current_context, user_feedback):
-    """사용자의 피드백을 분석하여 학습 상태를 평가합니다."""
-    try:
-        # 피드백 분석 프롬프트 생성
-        prompt = feedback_analysis_prompt.format(
-            current_context=current_context,
-            user_feedback=user_feedback
-        )
-        
-        # 피드백 분석 요청
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=1000
-        )
-        
-        # JSON 응답 파싱
-        content = response.choices[0].message.content
-        content = content.replace("```json", "").replace("```", "").strip()
-        content = " ".join(line.strip() for line in content.splitlines())
-        result = json.loads(content)
-        
-        return result
-        
-    except Exception as e:
-        st.error(f"피드백 분석 중 오류가 발생했습니다: {str(e)}")
-        return {"status": "진행", "reason": "오류 발생", "feedback_type": "기타"}
+def sync_session_state():
+    """대화 세션에서 바뀐 대화 ID와 모드를 세션 상태에 반영합니다."""
+    st.session_state.current_conversation_id = tutor.conversation_id
+    st.session_state.conversation_mode = tutor.mode
+
+def stream_reply():
+    """응답을 스트리밍으로 출력하고 전체 응답을 반환합니다. (응답 저장은 대화 세션에서 처리)"""
+    with tracing.span("render.stream") as span:
+        stream_placeholder = st.empty()
+        renderer = StreamRenderer(stream_placeholder)
+
+        # 스트리밍 응답 받기 (일정 간격으로 모아서 화면 갱신)
+        for delta in iterate_sync(tutor.stream_reply()):
+            renderer.feed(delta)
+        full_response = renderer.finish()
+
+        # 스트리밍 끝난 후 수식 포함해서 다시 렌더링
+        stream_placeholder.empty()
+        st.markdown(render_with_latex(full_response))
+        span.set(frames=renderer.frames, bytes_emitted=renderer.bytes_emitted)
+    return full_response
+
+def record_turn(started, first):
+    """사용자 입력부터 응답 저장까지 걸린 시간을 기록합니다."""
+    tracing.record("turn", (time.perf_counter() - started) * 1000, {"first": first, "mode": tutor.mode})
 
 if user_input:
+    turn_started = time.perf_counter()
     # 첫 번째 메시지인 경우 의도 분류 및 처리
     if not st.session_state.messages:
         # 새로운 대화 세션 생성
-        if not st.session_state.current_conversation_id:
-            conversation_title = user_input[:50] + "..." if len(user_input) > 50 else user_input
-            st.session_state.current_conversation_id = db.create_conversation(conversation_title)
+        run_sync(tutor.ensure_conversation(user_input))
+        sync_session_state()
+        
+        # 투기 실행 모드에서는 의도 분류와 동시에 프레임워크 생성을 시작
+        if SPECULATIVE_FRAMEWORK:
+            run_sync(tutor.speculate_framework(user_input))
         
         # 의도 분류
         with st.spinner("사용자 의도를 분석하는 중..."):
-            intent_result = classify_user_intent(user_input, client)
+            intent_result = run_sync(tutor.classify(user_input))
+            if "error" in intent_result:
+                st.error(f"의도 분류 중 오류가 발생했습니다: {intent_result['error']}")
+            sync_session_state()
             
             # Learning인 경우에만 교육 모드로 설정
-            if intent_result["intent"] == "Learning":
-                st.session_state.conversation_mode = "educational"
+            if tutor.mode == "educational":
                 st.info(f"🎓 학습 모드로 전환되었습니다. (의도: {intent_result['intent']})")
                 
                 # 교육 모드: ADDIE 프레임워크 생성
                 with st.spinner("교수 설계 프레임워크를 생성하는 중 ..."):
-                    # 데이터베이스에서 ADDIE 문서 가져오기
-                    addie_reference_content = db.get_addie_document()
-                    
-                    # 프롬프트 생성
-                    if addie_reference_content:
-                        prompt = for_system_prompt_with_reference.format(
-                            user_input=user_input,
-                            addie_reference_content=addie_reference_content,
-                            common_instructions=COMMON_INSTRUCTIONS
-                        )
-                        
-                    else:
-                        prompt = for_system_prompt_without_reference.format(
-                            user_input=user_input,
-                            common_instructions=COMMON_INSTRUCTIONS
-                        )
-                    
-                    
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.7,
-                        max_tokens=2000
-                    )
-                    
-                    try:
-                        # JSON 응답 파싱
-                        content = response.choices[0].message.content
-                        
-                        # 마크다운 코드 블록 표시 제거
-                        content = content.replace("```json", "").replace("```", "").strip()
-                        
-                        # JSON 정규화 (여러 줄을 한 줄로)
-                        content = " ".join(line.strip() for line in content.splitlines())
-                        
-                        result = json.loads(content)
-                        
-                        # 시스템 프롬프트 생성
-                        system_prompt_content = system_prompt.format(
-                            analysis_content=result["analysis_content"],
-                            design_content=result["design_content"]
-                        )
-                        
-                        # 데이터베이스에 저장
-                        if st.session_state.current_conversation_id:
-                            db.save_message(st.session_state.current_conversation_id, "system", system_prompt_content)
-                        
-                        st.session_state.system_prompt_created = True
-                        st.session_state.messages.append({"role": "system", "content": system_prompt_content})
-                        
-                    except (json.JSONDecodeError, KeyError) as e:
-                        st.error(f"프레임워크 생성 중 오류가 발생했습니다: {str(e)}")
-                        st.info("잠시 후 다시 시도해주세요.")
-                        
-                        # 세션 상태 초기화
-                        st.session_state.messages = []
-                        st.session_state.system_prompt_created = False
-                        st.session_state.current_conversation_id = None
-                        st.session_state.conversation_mode = None
-                        
-                        # 재시도 버튼
-                        if st.button("다시 시도", key="retry_button"):
-                            st.rerun()
-                        
-                        st.stop()  # 여기서 실행 중단
+                    # 시스템 프롬프트 생성 및 데이터베이스에 저장
+                    # (JSON으로 받지 못하면 생성된 본문을 그대로 사용하여 대화를 이어감)
+                    if not run_sync(tutor.create_framework(user_input)):
+                        st.warning("프레임워크 형식을 해석하지 못해 생성된 내용을 그대로 사용합니다.")
+                    st.session_state.system_prompt_created = True
             else:
-                # 일반 대화 모드
-                st.session_state.conversation_mode = "casual"
+                # 일반 대화 모드 (미리 시작한 프레임워크 생성은 대화 세션에서 폐기)
                 st.info(f"💬 일반 대화 모드입니다. (의도: {intent_result['intent']})")
                 
                 # 간단한 시스템 프롬프트 생성
-                casual_system_prompt = """
-                당신은 친근하고 도움이 되는 AI 어시스턴트입니다.
-                사용자의 질문에 정확하고 유용한 답변을 제공하세요.
-                - 친근하고 자연스러운 톤을 유지하세요
-                - 필요한 경우 마크다운과 LaTeX를 사용하세요
-                - 사용자가 만족할 수 있도록 도움을 주세요
-                """
-                st.session_state.messages.append({"role": "system", "content": casual_system_prompt})
+                run_sync(tutor.use_casual_prompt())
                 st.session_state.system_prompt_created = True
 
             # 사용자의 첫 번째 질문을 메시지 히스토리에 추가
-            st.session_state.messages.append({"role": "user", "content": user_input})
-            db.save_message(st.session_state.current_conversation_id, "user", user_input)
+            run_sync(tutor.add_message("user", user_input))
 
             # AI 응답 출력 영역
             with st.chat_message("assistant"):
-                stream_placeholder = st.empty()
-                full_response = ""
-
                 try:
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=st.session_state.messages,
-                        stream=True
-                    )
-
-                    # 스트리밍 응답 받기
-                    for chunk in response:
-                        if chunk.choices and chunk.choices[0].delta.content:
-                            content = chunk.choices[0].delta.content
-                            full_response += content
-                            stream_placeholder.markdown(render_with_latex(full_response + "▌"))
-
-                    # 스트리밍 끝난 후 수식 포함해서 다시 렌더링
-                    stream_placeholder.empty()
-                    st.markdown(render_with_latex(full_response))
-
-                    # 응답 저장 (중복 방지)
-                    if not (st.session_state.messages and
-                            st.session_state.messages[-1]["role"] == "assistant" and
-                            st.session_state.messages[-1]["content"] == full_response):
-                        st.session_state.messages.append(
-                            {"role": "assistant", "content": full_response}
-                        )
-                        db.save_message(st.session_state.current_conversation_id, "assistant", full_response)
+                    stream_reply()
+                    record_turn(turn_started, first=True)
                     
                     # 화면 갱신을 위한 rerun
                     st.rerun()
@@ -306,81 +289,24 @@ if user_input:
         with st.chat_message("user"):
             st.markdown(user_input)
             # 사용자 메시지 추가
-            st.session_state.messages.append({"role": "user", "content": user_input})
-            db.save_message(st.session_state.current_conversation_id, "user", user_input)
+            run_sync(tutor.add_message("user", user_input))
         
         # 교육 모드인 경우에만 피드백 분석 수행
-        if st.session_state.conversation_mode == "educational":
+        if tutor.mode == "educational":
             # 두 번째 메시지부터는 피드백 분석
-            # 이전 메시지가 3개 미만인 경우는 있는 만큼만 사용
-            context_messages = st.session_state.messages[-3:] if len(st.session_state.messages) >= 3 else st.session_state.messages
-            current_context = "\n".join([msg["content"] for msg in context_messages])
-            
-            feedback_analysis = analyze_feedback(current_context, user_input)
-            print(f"[FEEDBACK ANALYSIS] {feedback_analysis}")  # 피드백 분석 결과 로그
+            feedback_analysis = run_sync(tutor.review_feedback(user_input))
+            if "error" in feedback_analysis:
+                st.error(f"피드백 분석 중 오류가 발생했습니다: {feedback_analysis['error']}")
             # 피드백이 "평가" 상태인 경우 새로운 분석과 설계 반영
-            if feedback_analysis["status"] == "evaluation" and "suggested_adjustment" in feedback_analysis:
-                print("[FEEDBACK] evaluation detected, updating system prompt...")  # 분류 로그
-                # 기존 system 메시지 찾기 (가장 첫 번째 system 메시지)
-                for idx, msg in enumerate(st.session_state.messages):
-                    if msg["role"] == "system" and msg["content"] != "REFRESH":
-                        system_idx = idx
-                        break
-                else:
-                    system_idx = None
-                
-                if system_idx is not None:
-                    # 기존 system prompt에 피드백 내용을 줄 단위 불릿포인트로 추가
-                    old_prompt = st.session_state.messages[system_idx]["content"]
-                    adjustment = feedback_analysis["suggested_adjustment"]
-                    feedback_lines = [line.strip() for line in str(adjustment).splitlines() if line.strip()]
-                    feedback_text = "\n" + "\n".join(f"- {line}" for line in feedback_lines)
-                    new_system_prompt = old_prompt.rstrip() + feedback_text
-                    st.session_state.messages[system_idx]["content"] = new_system_prompt
-                    print(f"[SYSTEM PROMPT UPDATED] {new_system_prompt}")  # system prompt 업데이트 로그
-                    # 업데이트된 system prompt와 메시지로 assistant 답변 생성
-                    response = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=st.session_state.messages,
-                        stream=False
-                    )
-                    full_response = response.choices[0].message.content
-                    st.session_state.messages.append({"role": "assistant", "content": full_response})
-                    db.save_message(st.session_state.current_conversation_id, "assistant", full_response)
-                    print(f"[LLM RESPONSE] {full_response}")
+            # (답변은 아래에서 업데이트된 system prompt로 한 번만 스트리밍)
+            if run_sync(tutor.apply_feedback(feedback_analysis)) is not None:
                 st.write("Feedback applied. Please wait for the new response.")
-                # st.rerun()
         
 
         with st.chat_message("assistant"):
-            stream_placeholder = st.empty()
-            full_response = ""
-
             try:
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=st.session_state.messages,
-                    stream=True
-                )
-
-                # 스트리밍 응답 받기
-                for chunk in response:
-                    if chunk.choices and chunk.choices[0].delta.content:
-                        content = chunk.choices[0].delta.content
-                        full_response += content
-                        stream_placeholder.markdown(render_with_latex(full_response + "▌"))
-
-                # 스트리밍 도중에도 마크다운으로 계속 갱신 (수식 포함)
-                stream_placeholder.empty()
-                st.markdown(render_with_latex(full_response))
-                # 응답 저장 (중복 방지)
-                if not (st.session_state.messages and
-                        st.session_state.messages[-1]["role"] == "assistant" and
-                        st.session_state.messages[-1]["content"] == full_response):
-                    st.session_state.messages.append(
-                        {"role": "assistant", "content": full_response}
-                    )
-                    db.save_message(st.session_state.current_conversation_id, "assistant", full_response)
+                stream_reply()
+                record_turn(turn_started, first=False)
                 
             except Exception as e:
                 st.error(f"응답 생성 중 오류가 발생했습니다: {str(e)}")
@@ -0,0 +1,201 @@
+"""오래된 대화 보관과 DB 공간 회수 (보존 정책)
+
+- 마지막 활동 후 archive_after_days일이 지난 대화의 메시지를 대화마다 압축한 blob 하나로 옮깁니다.
+  (0이면 보관하지 않으며 기본값도 0) 보관된 대화는 사이드바에서 열 때 자동으로 복원되며,
+  보관 중에는 제목만 검색됩니다.
+- 보관된 대화 중 delete_after_days일이 지난 대화는 삭제합니다. (0이면 삭제하지 않음)
+- metrics_retention_days일이 지난 지표 기록을 삭제합니다. (0이면 삭제하지 않음, 기본 30일)
+- 삭제되거나 보관된 대화만 쓰던 메시지 본문 조각을 지웁니다.
+- 삭제로 생긴 빈 페이지는 incremental vacuum으로 조금씩 나눠 파일에서 돌려줍니다.
+
+앱에서는 secrets의 [maintenance] 설정으로 백그라운드에서 주기적으로 실행하며, CLI로 한 번 실행하고
+DB 크기와 자주 쓰는 조회의 지연 시간을 실행 전후로 비교할 수 있습니다.
+
+    python maintenance.py --db conversations.db --archive-after-days 90 --report
+    python maintenance.py --db conversations.db --enable-incremental-vacuum
+"""
+import argparse
+import os
+import threading
+import time
+
+import tracing
+from database import Database, ARCHIVE_BATCH, search_tokens
+
+# 보관은 검색에서 메시지 본문을 빼므로 설정한 경우에만 하고, 지표 기록은 기본으로 정리
+DEFAULT_POLICY = {
+    "archive_after_days": 0,
+    "delete_after_days": 0,
+    "metrics_retention_days": 30,
+    "interval_minutes": 60,
+}
+
+# incremental vacuum 한 번에 돌려줄 페이지 수와 단계 사이 쉬는 시간 (초, 쓰기 잠금을 오래 잡지 않도록)
+VACUUM_STEP_PAGES = 512
+VACUUM_STEP_PAUSE = 0.05
+
+# 지연 시간 보고에 쓰는 대화 목록/메시지 페이지 크기 (사이드바와 같음)
+REPORT_HISTORY_PAGE = 20
+REPORT_MESSAGE_PAGE = 50
+
+# 백그라운드 유지 관리를 이미 시작한 DB 경로
+_started = set()
+_started_lock = threading.Lock()
+
+
+def load_policy(config):
+    """secrets의 [maintenance] 설정(dict)에 기본값을 채운 정책"""
+    return {**DEFAULT_POLICY, **{key: value for key, value in config.items() if key in DEFAULT_POLICY}}
+
+
+def vacuum(db, step_pages=VACUUM_STEP_PAGES, pause=VACUUM_STEP_PAUSE):
+    """빈 페이지가 없을 때까지 조금씩 돌려주고 돌려준 페이지 수를 반환합니다.
+
+    incremental vacuum 방식이 아닌 DB에서는 아무것도 하지 않습니다.
+    """
+    freed = 0
+    while True:
+        step = db.incremental_vacuum(step_pages)
+        freed += step
+        if step < step_pages:
+            break
+        time.sleep(pause)
+    if freed:
+        # WAL 모드에서는 체크포인트 후에 파일이 줄어듦
+        db.checkpoint()
+    return freed
+
+
+def run_maintenance(db, policy):
+    """보존 정책을 한 번 적용하고 (보관, 삭제, 지표 삭제, 조각 삭제, 회수한 페이지) 개수를 반환합니다."""
+    with tracing.span("maintenance") as span:
+        archived = 0
+        if policy["archive_after_days"]:
+            while True:
+                count = db.archive_idle_conversations(policy["archive_after_days"])
+                archived += count
+                if count < ARCHIVE_BATCH:
+                    break
+        deleted = 0
+        if policy["delete_after_days"]:
+            deleted = db.delete_archived_conversations(policy["delete_after_days"])
+        pruned = 0
+        if policy["metrics_retention_days"]:
+            pruned = db.delete_metrics_before(time.time() - policy["metrics_retention_days"] * 86400)
+        result = {
+            "archived": archived,
+            "deleted": deleted,
+            "metrics_pruned": pruned,
+            "blobs_deleted": db.delete_unused_blobs(),
+            "pages_freed": vacuum(db),
+        }
+        span.set(**result)
+    return result
+
+
+def start_background(db_path, policy):
+    """별도 스레드에서 interval_minutes마다 보존 정책을 적용합니다. (DB 경로마다 프로세스당 한 번)"""
+    key = os.path.abspath(db_path)
+    with _started_lock:
+        if key in _started:
+            return
+        _started.add(key)
+
+    def run():
+        db = Database(db_path)
+        while True:
+            try:
+                # 결과는 run_maintenance의 maintenance span에 기록됨
+                run_maintenance(db, policy)
+            except Exception as e:
+                tracing.event("maintenance.failed", error=str(e))
+            time.sleep(policy["interval_minutes"] * 60)
+
+    threading.Thread(target=run, name="db-maintenance", daemon=True).start()
+
+
+def hot_queries(db):
+    """사이드바와 대화 화면이 자주 실행하는 조회 (이름, 함수) 목록
+
+    메시지 조회는 가장 최근 대화, 검색은 그 제목의 첫 단어로 합니다.
+    """
+    rows, _ = db.get_conversations_page(limit=1)
+    queries = [("history page", lambda: db.get_conversations_page(limit=REPORT_HISTORY_PAGE))]
+    if rows:
+        conversation_id, title = rows[0][0], rows[0][1]
+        queries.append(("messages page", lambda: db.get_messages_page(conversation_id, limit=REPORT_MESSAGE_PAGE)))
+        words = search_tokens(title)
+        if words:
+            queries.append(("search", lambda: db.search(words[0])))
+    return queries
+
+
+def measure(db, repeat):
+    """자주 쓰는 조회마다 (이름, p50 ms, p95 ms)"""
+    results = []
+    for name, func in hot_queries(db):
+        latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+        results.append((name, tracing.percentile(latencies, 0.5), tracing.percentile(latencies, 0.95)))
+    return results
+
+
+def print_report(stats_before, stats_after, latency_before, latency_after):
+    """유지 관리 전후의 DB 크기와 조회 지연 시간을 표로 출력합니다."""
+    print(f"{'storage':<24} {'before':>14} {'after':>14}")
+    for key in ("file_bytes", "page_count", "freelist_count", "conversations", "messages",
+                "archived_conversations", "archived_messages", "archive_bytes", "archive_raw_bytes",
+                "blobs", "blob_bytes"):
+        print(f"{key:<24} {stats_before[key]:>14,} {stats_after[key]:>14,}")
+    print()
+    print(f"{'query':<24} {'p50 ms before':>14} {'p50 ms after':>14} {'p95 ms before':>14} {'p95 ms after':>14}")
+    after = {name: (p50, p95) for name, p50, p95 in latency_after}
+    for name, p50, p95 in latency_before:
+        if name in after:
+            print(f"{name:<24} {p50:>14.2f} {after[name][0]:>14.2f} {p95:>14.2f} {after[name][1]:>14.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 보존 정책을 한 번 적용하고 DB 공간을 회수합니다.")
+    parser.add_argument("--db", default="conversations.db", help="데이터베이스 경로")
+    parser.add_argument("--archive-after-days", type=float, default=DEFAULT_POLICY["archive_after_days"],
+                        help="마지막 활동 후 이 기간이 지난 대화를 보관 (0이면 보관하지 않음)")
+    parser.add_argument("--delete-after-days", type=float, default=DEFAULT_POLICY["delete_after_days"],
+                        help="보관된 대화 중 이 기간이 지난 대화를 삭제 (0이면 삭제하지 않음)")
+    parser.add_argument("--metrics-retention-days", type=float, default=DEFAULT_POLICY["metrics_retention_days"],
+                        help="이보다 오래된 지표 기록을 삭제 (0이면 삭제하지 않음)")
+    parser.add_argument("--enable-incremental-vacuum", action="store_true",
+                        help="기존 DB를 incremental vacuum 방식으로 전환 (VACUUM 전체 실행, 앱을 멈춘 상태에서)")
+    parser.add_argument("--report", action="store_true", help="실행 전후의 DB 크기와 조회 지연 시간 출력")
+    parser.add_argument("--repeat", type=int, default=20, help="보고용 조회 반복 횟수")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    if args.enable_incremental_vacuum:
+        started = time.perf_counter()
+        changed = db.enable_incremental_vacuum()
+        print(f"incremental vacuum {'enabled' if changed else 'already enabled'} "
+              f"({time.perf_counter() - started:.1f}s)")
+    policy = load_policy({
+        "archive_after_days": args.archive_after_days,
+        "delete_after_days": args.delete_after_days,
+        "metrics_retention_days": args.metrics_retention_days,
+    })
+    if args.report:
+        stats_before, latency_before = db.storage_stats(), measure(db, args.repeat)
+    started = time.perf_counter()
+    result = run_maintenance(db, policy)
+    print(f"{result} ({time.perf_counter() - started:.1f}s)")
+    if args.report:
+        db.flush()
+        print()
+        print_report(stats_before, db.storage_stats(), latency_before, measure(db, args.repeat))
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
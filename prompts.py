@@ -147,3 +147,36 @@ Important Notes:
 4. Include specific suggestions for improvement in suggested_adjustment
 5. Consider the user's engagement level when making recommendations
 """
+
+# 일반 대화 모드의 간단한 시스템 프롬프트
+casual_system_prompt = """
+                당신은 친근하고 도움이 되는 AI 어시스턴트입니다.
+                사용자의 질문에 정확하고 유용한 답변을 제공하세요.
+                - 친근하고 자연스러운 톤을 유지하세요
+                - 필요한 경우 마크다운과 LaTeX를 사용하세요
+                - 사용자가 만족할 수 있도록 도움을 주세요
+                """
+
+# 대화 요약 프롬프트 (토큰 예산을 넘는 오래된 대화를 접을 때 사용)
+conversation_summary_prompt = """
+Update the running summary of a tutoring conversation between a learner and an AI tutor.
+
+Previous Summary: {previous_summary}
+
+New Messages:
+{new_messages}
+
+Keep what the tutor needs to continue teaching: the learner's goal and background, topics already covered, misconceptions or difficulties, and agreed next steps.
+Write the updated summary in the same language as the conversation, in at most {max_words} words. Respond with the summary only.
+"""
+
+# JSON 수정 프롬프트 (파싱에 실패한 응답 부분만 다시 보낼 때 사용)
+json_repair_prompt = """
+The following text was supposed to be a single JSON object with the keys: {required_keys}.
+It could not be used as is ({error}).
+
+Text:
+{fragment}
+
+Return only the corrected JSON object. Keep the original values and wording; only fix the JSON syntax and fill in missing keys.
+"""
@@ -0,0 +1,140 @@
+import math
+import re
+import threading
+from collections import Counter
+
+# 청크 최대 길이 (문자 수)
+CHUNK_CHARS = 1200
+
+# 프롬프트에 넣을 청크 수
+TOP_K = 4
+
+# BM25 파라미터
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# "1. Analysis Stage", "2.3 Evaluation" 같은 섹션 제목 줄
+SECTION_PATTERN = re.compile(r"^(\d+(\.\d+)*\.?|[IVX]+\.)\s+\S.{0,80}$")
+TOKEN_PATTERN = re.compile(r"[0-9a-z가-힣]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the to with "
+    "what how why about this these those into can do does explain".split()
+)
+
+# db 경로별 (청크 버전, 인덱스)
+_index_cache = {}
+_index_lock = threading.Lock()
+
+
+def tokenize(text):
+    """검색용 토큰 목록을 반환합니다."""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+def split_into_chunks(pages, max_chars=CHUNK_CHARS):
+    """페이지 목록을 페이지/섹션 경계를 지키는 청크로 나눕니다.
+
+    각 청크는 {"page", "section", "content"} 딕셔너리이며 page는 1부터 시작합니다.
+    """
+    chunks = []
+    section = None
+    for page, text in enumerate(pages, start=1):
+        lines = []
+        size = 0
+        for line in text.splitlines():
+            line = " ".join(line.split())
+            if not line:
+                continue
+            is_heading = SECTION_PATTERN.match(line) is not None
+            # 새 섹션이 시작되거나 길이를 넘으면 지금까지의 줄을 청크로 확정
+            if lines and (is_heading or size + len(line) > max_chars):
+                chunks.append({"page": page, "section": section, "content": "\n".join(lines)})
+                lines = []
+                size = 0
+            if is_heading:
+                section = line
+            lines.append(line)
+            size += len(line) + 1
+        if lines:
+            chunks.append({"page": page, "section": section, "content": "\n".join(lines)})
+    return chunks
+
+
+class BM25Index:
+    """청크 목록에 대한 메모리 내 BM25 인덱스"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.term_freqs = []
+        self.lengths = []
+        doc_freq = Counter()
+        for chunk in chunks:
+            # 섹션 제목도 검색 대상에 포함
+            tokens = tokenize(f"{chunk['section'] or ''} {chunk['content']}")
+            freqs = Counter(tokens)
+            self.term_freqs.append(freqs)
+            self.lengths.append(len(tokens))
+            doc_freq.update(freqs.keys())
+        n = len(chunks)
+        self.avg_length = sum(self.lengths) / n if n else 0
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def search(self, query, k=TOP_K):
+        """질의와 관련도가 높은 순으로 (점수, 청크) 목록을 반환합니다."""
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        if not terms:
+            return []
+        scored = []
+        for freqs, length, chunk in zip(self.term_freqs, self.lengths, self.chunks):
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length)
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (BM25_K1 + 1) / (tf + norm)
+            if score > 0:
+                scored.append((score, chunk))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:k]
+
+
+def get_index(db):
+    """DB의 참조 청크로 만든 인덱스를 반환하며, 청크가 바뀐 경우에만 다시 만듭니다."""
+    version = db.reference_chunks_version()
+    with _index_lock:
+        cached = _index_cache.get(db.db_path)
+        if cached and cached[0] == version:
+            return cached[1]
+    chunks = [
+        {"id": chunk_id, "source": source, "page": page, "section": section, "content": content}
+        for chunk_id, source, page, section, content in db.get_reference_chunks()
+    ]
+    index = BM25Index(chunks)
+    with _index_lock:
+        _index_cache[db.db_path] = (version, index)
+    return index
+
+
+def retrieve(db, query, k=TOP_K):
+    """질의와 관련된 참조 청크를 최대 k개 반환합니다.
+
+    어휘가 겹치는 청크가 없으면(예: 한국어 질문) 문서 앞부분의 청크를 대신 사용합니다.
+    """
+    index = get_index(db)
+    results = [chunk for score, chunk in index.search(query, k)]
+    if not results:
+        results = index.chunks[:k]
+    # 원문 순서대로 정렬하여 문맥 유지
+    return sorted(results, key=lambda chunk: chunk["id"])
+
+
+def format_reference(chunks):
+    """검색된 청크를 프롬프트에 넣을 참조 문서 텍스트로 만듭니다."""
+    parts = []
+    for chunk in chunks:
+        header = f"[p.{chunk['page']}" + (f" · {chunk['section']}]" if chunk["section"] else "]")
+        parts.append(f"{header}\n{chunk['content']}")
+    return "\n\n".join(parts)
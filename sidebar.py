@@ -1,22 +1,117 @@
+import io
 import streamlit as st
 from database import Database
-from datetime import datetime
-import openai
-from openai import OpenAI
+from llm_backend import validate_key
+from export import FORMATS, export_to_file, file_name, mime_type
 
-def validate_api_key(api_key):
-    """OpenAI API 키의 유효성을 검증합니다."""
-    try:
-        client = OpenAI(api_key=api_key)
-        # 간단한 API 호출로 키 유효성 검증
-        client.models.list()
-        return True
-    except Exception as e:
-        return False
+# History에 한 번에 불러올 대화 수
+HISTORY_PAGE_SIZE = 20
 
-def render_sidebar():
+# 대화를 불러오거나 화면에 표시할 때 한 번에 다루는 메시지 수
+MESSAGE_PAGE_SIZE = 50
+
+# 대화 검색 결과 최대 개수
+SEARCH_RESULT_LIMIT = 20
+
+def format_conversations(rows):
+    """대화 목록 행을 사이드바 표시용 (id, 제목, 수정 시각)으로 변환합니다."""
+    # updated_at은 "%Y-%m-%d %H:%M:%S" 형식이므로 분 단위까지 잘라서 사용
+    return [(conv_id, title, updated_at[:16]) for conv_id, title, created_at, updated_at in rows]
+
+def get_history(db):
+    """세션에 캐시된 대화 목록을 반환하며, 대화가 생성/수정/삭제된 경우에만 다시 불러옵니다."""
+    version = db.history_version()
+    cache = st.session_state.get("history_cache")
+    if cache is None or cache["version"] != version:
+        # 이미 펼쳐 본 만큼은 유지한 채로 첫 페이지부터 다시 조회
+        limit = max(len(cache["items"]), HISTORY_PAGE_SIZE) if cache else HISTORY_PAGE_SIZE
+        rows, cursor = db.get_conversations_page(limit=limit)
+        cache = {"version": version, "items": format_conversations(rows), "cursor": cursor}
+        st.session_state.history_cache = cache
+    return cache
+
+def load_more_history(db):
+    """캐시된 대화 목록에 다음 페이지를 이어 붙입니다."""
+    cache = st.session_state.history_cache
+    rows, cursor = db.get_conversations_page(limit=HISTORY_PAGE_SIZE, cursor=cache["cursor"])
+    cache["items"].extend(format_conversations(rows))
+    cache["cursor"] = cursor
+
+def reset_message_window():
+    """메시지 표시 범위와 DB 페이지 위치를 초기화합니다."""
+    st.session_state.display_window = MESSAGE_PAGE_SIZE
+    st.session_state.older_messages = []
+    st.session_state.older_cursor = None
+    st.session_state.pinned_message_id = None
+
+def load_conversation(db, conv_id):
+    """대화의 최근 메시지 한 페이지만 불러와 세션에 설정합니다. (보관된 대화는 먼저 복원)"""
+    db.restore_conversation(conv_id)
+    rows, cursor = db.get_messages_page(conv_id, limit=MESSAGE_PAGE_SIZE)
+    reset_message_window()
+    if cursor is not None:
+        # 잘린 경우에도 첫 시스템 프롬프트는 대화 맥락으로 유지
+        first = db.get_first_message(conv_id)
+        if first and first[1] == "system":
+            rows = [first] + rows
+            st.session_state.pinned_message_id = first[0]
+    st.session_state.older_cursor = cursor
+    st.session_state.current_conversation_id = conv_id
+    # 불러오지 않은 이전 메시지는 다음 요청 때 요약 상태와 함께 다시 읽어 맥락에 포함
+    st.session_state.context_summary.clear()
+    st.session_state.messages = [
+        {"role": role, "content": content, "id": message_id} for message_id, role, content in rows
+    ]
+
+def open_conversation(db, conv_id):
+    """히스토리에서 고른 대화를 불러와 화면을 다시 그립니다."""
+    load_conversation(db, conv_id)
+    st.session_state.system_prompt_created = True
+    st.session_state.history_loaded = True  # 히스토리에서 불러왔음을 표시
+    st.rerun()
+
+def render_search_results(db, query):
+    """검색 결과를 관련도 순으로 표시합니다. (대화마다 일치한 부분 하나)"""
+    results = db.search(query, limit=SEARCH_RESULT_LIMIT)
+    if not results:
+        st.caption("검색 결과가 없습니다.")
+    for conv_id, title, updated_at, message_id, snippet in results:
+        if st.button(f"{title}", key=f"search_{conv_id}", help=updated_at[:16], use_container_width=True):
+            open_conversation(db, conv_id)
+        if message_id is not None:
+            st.caption(snippet)
+
+def render_export(db):
+    """현재 대화의 내보내기 옵션과 다운로드 버튼
+
+    옵션 위젯은 rerun마다 비용이 들므로 내보내기를 켠 경우에만 표시합니다.
+    다운로드 데이터는 메모리에 올려 넘기므로 현재 대화만 내보내고,
+    전체나 조건별 내보내기는 export.py CLI로 안내합니다.
+    """
+    if not st.checkbox("대화 내보내기", key="export_open"):
+        return
+    st.caption("전체 대화나 기간/모드/의도별 내보내기는 CLI를 사용하세요.")
+    st.code("python export.py --format csv --since 2024-03-01 --until 2024-04-01 --mode educational -o march.csv", language="bash")
+    current_id = st.session_state.get("current_conversation_id")
+    if not current_id:
+        return
+    fmt = st.selectbox("형식", FORMATS, key="export_format")
+    compress = st.checkbox("gzip 압축", key="export_gzip")
+
+    if st.button("현재 대화 내보내기 준비", use_container_width=True):
+        buffer = io.BytesIO()
+        export_to_file(db, buffer, fmt, compress, conversation_id=current_id)
+        st.download_button(
+            label="다운로드",
+            data=buffer.getvalue(),
+            file_name=file_name(fmt, compress, current_id),
+            mime=mime_type(fmt, compress),
+            use_container_width=True
+        )
+
+def render_sidebar(db=None):
     """사이드바 UI 렌더링"""
-    db = Database()
+    db = db or Database()
     
     with st.sidebar:
         # OpenAI API 키 입력
@@ -24,7 +119,7 @@ def render_sidebar():
         api_key = st.text_input("API Key", type="password", value=st.secrets.get("openai", {}).get("api_key", ""))
         
         if api_key:
-            if validate_api_key(api_key):
+            if validate_key(st.secrets.get("llm", {}), api_key):
                 st.success("API 키가 유효합니다.")
                 # API 키를 세션 상태에 저장
                 st.session_state.openai_api_key = api_key
@@ -50,52 +145,39 @@ def render_sidebar():
                     st.session_state.current_conversation_id = None
                     st.session_state.conversation_mode = None
                     st.session_state.history_loaded = False
+                    reset_message_window()
                     st.rerun()
             
             st.divider()
             st.markdown("### History")
             
-            # 이전 대화 목록 표시
-            conversations = db.get_conversations()
-            for conv in conversations:
-                conv_id, title, created_at, updated_at = conv
-                formatted_date = datetime.strptime(updated_at, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d %H:%M")
-                
-                col1, col2 = st.columns([3, 1])
-                with col1:
-                    if st.button(f"{title}", key=f"conv_{conv_id}", use_container_width=True):
-                        st.session_state.current_conversation_id = conv_id
-                        st.session_state.messages = []
-                        for role, content in db.get_messages(conv_id):
-                            st.session_state.messages.append({"role": role, "content": content})
-                        st.session_state.system_prompt_created = True
-                        st.session_state.history_loaded = True  # 히스토리에서 불러왔음을 표시
-                        st.rerun()
+            # 대화 제목/내용 검색 (검색어가 있으면 목록 대신 검색 결과 표시)
+            query = st.text_input("대화 검색", key="history_search", placeholder="검색어를 입력하세요")
+            if query.strip():
+                render_search_results(db, query)
+            else:
+                # 이전 대화 목록 표시 (페이지 단위로 캐시)
+                history = get_history(db)
+                for conv_id, title, formatted_date in history["items"]:
+                    col1, col2 = st.columns([3, 1])
+                    with col1:
+                        if st.button(f"{title}", key=f"conv_{conv_id}", help=formatted_date, use_container_width=True):
+                            open_conversation(db, conv_id)
                 
-                with col2:
-                    if st.button("Delete", key=f"delete_{conv_id}", use_container_width=True):
-                        db.delete_conversation(conv_id)
+                    with col2:
+                        if st.button("Delete", key=f"delete_{conv_id}", use_container_width=True):
+                            db.delete_conversation(conv_id)
+                            st.rerun()
+            
+                # 다음 페이지 불러오기
+                if history["cursor"] is not None:
+                    if st.button("더 보기", key="load_more_history", use_container_width=True):
+                        load_more_history(db)
                         st.rerun()
             
             st.divider()
             
-            # 현재 대화 내보내기
-            if st.session_state.get("current_conversation_id"):
-                if st.button("현재 대화 내보내기", use_container_width=True):
-                    messages = db.get_messages(st.session_state.current_conversation_id)
-                    conversation = ""
-                    for role, content in messages:
-                        if role == "user":
-                            conversation += f"사용자: {content}\n"
-                        elif role == "assistant":
-                            conversation += f"챗봇: {content}\n"
-                    
-                    st.download_button(
-                        label="대화 내용 다운로드",
-                        data=conversation,
-                        file_name=f"conversation_{st.session_state.current_conversation_id}.txt",
-                        mime="text/plain",
-                        use_container_width=True
-                    )
+            # 대화 내보내기 (현재 대화, 필터, 전체)
+            render_export(db)
         else:
             st.warning("유효한 API 키를 입력하여 채팅 기능을 사용할 수 있습니다.") 
\ No newline at end of file
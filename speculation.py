@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import time
+
+import tracing
+
+_stats = {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def get_stats():
+    """투기 실행 적중/낭비 횟수와 절약된 누적 시간을 반환합니다."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _record(hit, saved_seconds=0.0):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+        _stats["saved_seconds"] += saved_seconds
+    tracing.event("speculation", hit=hit, saved_ms=saved_seconds * 1000)
+
+
+class SpeculativeTask:
+    """결과가 필요할지 확정되기 전에 미리 시작하는 작업 (실행 중인 이벤트 루프에서 생성)"""
+
+    def __init__(self, coro):
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.task = asyncio.ensure_future(self._run(coro))
+
+    async def _run(self, coro):
+        try:
+            return await coro
+        finally:
+            self.finished_at = time.monotonic()
+
+    async def result(self):
+        """결과를 기다려 반환하고, 미리 시작해서 줄어든 대기 시간을 기록합니다."""
+        waiting_since = time.monotonic()
+        try:
+            return await self.task
+        finally:
+            # 순차 실행이었다면 지금부터 작업 시간 전체를 기다려야 했음
+            waited = time.monotonic() - waiting_since
+            duration = (self.finished_at or time.monotonic()) - self.started_at
+            _record(True, max(duration - waited, 0.0))
+
+    def discard(self):
+        """결과가 필요 없어졌을 때 호출합니다. 진행 중인 요청은 취소됩니다."""
+        self.task.cancel()
+        _record(False)
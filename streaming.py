@@ -0,0 +1,95 @@
+import time
+
+# 화면 갱신 간격 (초)와 간격과 무관하게 갱신할 누적 문자 수
+FRAME_INTERVAL = 0.05
+FRAME_MAX_CHARS = 2000
+
+STREAM_CURSOR = "▌"
+
+# 변환할 LaTeX 구분자 ( \[ \] → $$, \( \) → $ )
+LATEX_DELIMITERS = {"[": "$$", "]": "$$", "(": "$", ")": "$"}
+
+
+class LatexStreamConverter:
+    """스트리밍 델타에서 LaTeX 구분자를 새로 들어온 부분만 변환합니다.
+
+    청크 끝에 걸친 백슬래시는 다음 청크가 올 때까지 보류합니다.
+    """
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, delta):
+        """델타를 변환하여 확정된 부분만 반환합니다."""
+        text = self._pending + delta
+        self._pending = ""
+        if text.endswith("\\"):
+            # 다음 글자가 구분자인지 알 수 없으므로 보류
+            text, self._pending = text[:-1], "\\"
+        if "\\" not in text:
+            return text
+
+        parts = []
+        start = 0
+        index = text.find("\\")
+        while index != -1 and index + 1 < len(text):
+            replacement = LATEX_DELIMITERS.get(text[index + 1])
+            if replacement:
+                parts.append(text[start:index])
+                parts.append(replacement)
+                start = index + 2
+                index = text.find("\\", start)
+            else:
+                index = text.find("\\", index + 1)
+        parts.append(text[start:])
+        return "".join(parts)
+
+    def flush(self):
+        """보류 중인 글자를 반환합니다."""
+        pending, self._pending = self._pending, ""
+        return pending
+
+
+class StreamRenderer:
+    """토큰 델타를 모아 일정 간격으로만 화면을 갱신하는 스트리밍 렌더러"""
+
+    def __init__(self, placeholder, interval=FRAME_INTERVAL, max_chars=FRAME_MAX_CHARS, clock=time.monotonic):
+        self.placeholder = placeholder
+        self.interval = interval
+        self.max_chars = max_chars
+        self.clock = clock
+        self.converter = LatexStreamConverter()
+        self._raw = []
+        self._rendered = []
+        self._unflushed = 0
+        self._last_frame = clock()
+        # 통계
+        self.frames = 0
+        self.bytes_emitted = 0
+
+    @property
+    def text(self):
+        """지금까지 받은 원문 전체"""
+        return "".join(self._raw)
+
+    def feed(self, delta):
+        """델타를 추가하고 갱신 주기가 되었으면 화면을 갱신합니다."""
+        self._raw.append(delta)
+        self._rendered.append(self.converter.feed(delta))
+        self._unflushed += len(delta)
+        if self._unflushed >= self.max_chars or self.clock() - self._last_frame >= self.interval:
+            self._emit("".join(self._rendered) + STREAM_CURSOR)
+
+    def finish(self):
+        """남은 내용을 마지막으로 갱신하고 원문 전체를 반환합니다."""
+        self._rendered.append(self.converter.flush())
+        if self._unflushed:
+            self._emit("".join(self._rendered) + STREAM_CURSOR)
+        return self.text
+
+    def _emit(self, body):
+        self.placeholder.markdown(body)
+        self.frames += 1
+        self.bytes_emitted += len(body.encode("utf-8"))
+        self._unflushed = 0
+        self._last_frame = self.clock()
@@ -0,0 +1,135 @@
+"""LLM의 JSON 응답 요청과 파싱
+
+JSON 모드로 요청하고, 코드 블록이나 앞뒤 설명이 붙은 응답도 관대하게 파싱합니다.
+파싱에 실패하면 원래 프롬프트 대신 잘못된 JSON 부분만 보내 한 번 고쳐 받습니다.
+"""
+import json
+import re
+import threading
+import time
+from collections import defaultdict
+
+import tracing
+from prompts import json_repair_prompt
+
+# 응답을 JSON 객체로 제한하는 요청 옵션
+JSON_MODE = {"type": "json_object"}
+
+# 파싱 실패 시 수정 요청 횟수
+REPAIR_ATTEMPTS = 1
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+# 문자열 안의 줄바꿈 등 제어 문자를 허용하는 디코더
+_decoder = json.JSONDecoder(strict=False)
+
+_stats = defaultdict(lambda: {"calls": 0, "repairs": 0, "failures": 0, "seconds": 0.0})
+_stats_lock = threading.Lock()
+
+
+class StructuredOutputError(ValueError):
+    """응답에서 필요한 JSON 객체를 얻지 못했을 때 발생합니다. content는 원래 응답입니다."""
+
+    def __init__(self, message, content, fragment=None):
+        super().__init__(message)
+        self.content = content
+        self.fragment = fragment if fragment is not None else content
+
+
+def get_stats():
+    """요청 이름별 호출/수정/실패 횟수와 누적 소요 시간을 반환합니다."""
+    with _stats_lock:
+        return {name: dict(stats) for name, stats in _stats.items()}
+
+
+def _record(name, repairs, failed, seconds):
+    with _stats_lock:
+        stats = _stats[name]
+        stats["calls"] += 1
+        stats["repairs"] += repairs
+        stats["failures"] += failed
+        stats["seconds"] += seconds
+
+
+def parse_json(content, required=()):
+    """응답에서 JSON 객체를 파싱하고 required 키가 모두 있는지 확인합니다.
+
+    코드 블록 표시나 JSON 뒤에 붙은 설명은 무시합니다.
+    """
+    text = (content or "").strip()
+    try:
+        result = _decoder.decode(text)
+    except json.JSONDecodeError:
+        fenced = FENCE_PATTERN.search(text)
+        if fenced:
+            text = fenced.group(1).strip()
+        start = text.find("{")
+        if start < 0:
+            raise StructuredOutputError("JSON 객체가 없습니다", content)
+        try:
+            # 객체가 끝난 뒤의 텍스트는 무시
+            result, _ = _decoder.raw_decode(text, start)
+        except json.JSONDecodeError as e:
+            raise StructuredOutputError(f"JSON 파싱 실패: {e}", content, text[start:]) from e
+    if not isinstance(result, dict):
+        raise StructuredOutputError("JSON 객체가 아닙니다", content)
+    missing = [key for key in required if key not in result]
+    if missing:
+        raise StructuredOutputError(f"필수 키 누락: {', '.join(missing)}", content, text)
+    return result
+
+
+async def _repair(client, model, error, required, max_tokens=None):
+    """잘못된 JSON 부분만 보내 고친 응답을 받습니다."""
+    prompt = json_repair_prompt.format(
+        required_keys=", ".join(required) or "(any)",
+        error=str(error),
+        fragment=error.fragment,
+    )
+    params = {"max_tokens": max_tokens} if max_tokens else {}
+    response = await client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        response_format=JSON_MODE,
+        temperature=0,
+        **params
+    )
+    return response.choices[0].message.content
+
+
+async def request_json(client, model, messages, required=(), name="json", **params):
+    """JSON 모드로 completion을 요청해 파싱한 dict를 반환합니다.
+
+    수정 요청 후에도 파싱에 실패하면 원래 응답을 담은 StructuredOutputError가 발생합니다.
+    """
+    started = time.monotonic()
+    repairs = 0
+    failed = True
+    with tracing.span(f"llm.{name}") as span:
+        try:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format=JSON_MODE,
+                **params
+            )
+            if response.usage:
+                span.set(
+                    prompt_tokens=response.usage.prompt_tokens,
+                    completion_tokens=response.usage.completion_tokens
+                )
+            original = content = response.choices[0].message.content
+            while True:
+                try:
+                    result = parse_json(content, required)
+                except StructuredOutputError as e:
+                    if repairs >= REPAIR_ATTEMPTS:
+                        raise StructuredOutputError(str(e), original) from e
+                    repairs += 1
+                    content = await _repair(client, model, e, required, params.get("max_tokens"))
+                else:
+                    failed = False
+                    return result
+        finally:
+            span.set(repairs=repairs)
+            _record(name, repairs, failed, time.monotonic() - started)
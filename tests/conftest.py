@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path):
+    """테스트마다 새로 만드는 임시 DB"""
+    database = Database(str(tmp_path / "test.db"))
+    yield database
+    database.close()
@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+import api_client
+
+
+class StubClient:
+    """models.list 호출 횟수를 세는 OpenAI 대체 클라이언트 (rejected 키는 인증 실패)"""
+
+    rejected = {"sk-bad"}
+    created = []
+    list_calls = 0
+
+    def __init__(self, api_key, base_url=None):
+        self.api_key = api_key
+        self.models = SimpleNamespace(list=self.list_models)
+        StubClient.created.append(self)
+
+    def list_models(self):
+        StubClient.list_calls += 1
+        if self.api_key in self.rejected:
+            raise PermissionError("invalid api key")
+        return []
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """api_client가 보는 단조 시계 (now[0]을 바꿔 시간을 흐르게 함)"""
+    now = [1000.0]
+    monkeypatch.setattr(api_client, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture(autouse=True)
+def stub_client(monkeypatch):
+    monkeypatch.setattr(api_client, "client_factory", StubClient)
+    monkeypatch.setattr(StubClient, "created", [])
+    monkeypatch.setattr(StubClient, "list_calls", 0)
+    api_client.clear_cache()
+    yield
+    api_client.clear_cache()
+
+
+def test_validation_is_cached_within_ttl(clock):
+    assert api_client.validate_api_key("sk-good")
+    clock[0] += api_client.VALID_KEY_TTL - 1
+    assert api_client.validate_api_key("sk-good")
+    assert StubClient.list_calls == 1
+
+    clock[0] += 2
+    assert api_client.validate_api_key("sk-good")
+    assert StubClient.list_calls == 2
+
+
+def test_invalid_key_is_negatively_cached(clock):
+    assert not api_client.validate_api_key("sk-bad")
+    clock[0] += api_client.INVALID_KEY_TTL - 1
+    assert not api_client.validate_api_key("sk-bad")
+    assert StubClient.list_calls == 1
+
+    clock[0] += 2
+    assert not api_client.validate_api_key("sk-bad")
+    assert StubClient.list_calls == 2
+
+
+def test_get_client_is_shared_per_key():
+    client = api_client.get_client("sk-good")
+    assert api_client.get_client("sk-good") is client
+    assert api_client.get_client("sk-other") is not client
+    assert api_client.get_client("sk-good", "http://localhost:8000/v1") is not client
+    assert len(StubClient.created) == 3
+
+    # 검증은 같은 클라이언트를 재사용
+    api_client.validate_api_key("sk-good")
+    assert len(StubClient.created) == 3
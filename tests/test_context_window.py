@@ -0,0 +1,55 @@
+import asyncio
+
+from context_window import prepare_messages, SUMMARY_HEADER
+from llm_backend import FakeClient, Router
+
+MESSAGES = 120
+PAGE_SIZE = 50
+
+
+def reopen(db, conversation_id):
+    """sidebar.load_conversation처럼 첫 시스템 프롬프트와 최근 한 페이지만 불러온 세션 메시지"""
+    rows, cursor = db.get_messages_page(conversation_id, limit=PAGE_SIZE)
+    assert cursor is not None
+    first = db.get_first_message(conversation_id)
+    return [{"role": role, "content": content, "id": message_id} for message_id, role, content in [first] + rows]
+
+
+def populate(db):
+    conversation_id = db.create_conversation("long")
+    db.save_message(conversation_id, "system", "You are a tutor.")
+    for i in range(MESSAGES):
+        db.save_message(conversation_id, ("user", "assistant")[i % 2], f"turn {i}")
+    db.flush()
+    return conversation_id
+
+
+def test_reopened_conversation_keeps_unloaded_history(db):
+    conversation_id = populate(db)
+    client = FakeClient()
+    messages = reopen(db, conversation_id)
+
+    payload = asyncio.run(prepare_messages(Router.single(client).route("summary"), db, conversation_id, messages, {}))
+
+    assert [m["content"] for m in payload] == ["You are a tutor."] + [f"turn {i}" for i in range(MESSAGES)]
+    assert client.calls == []
+
+
+def test_unloaded_history_is_folded_into_summary(db):
+    conversation_id = populate(db)
+    client = FakeClient()
+    messages = reopen(db, conversation_id)
+    state = {}
+
+    payload = asyncio.run(prepare_messages(
+        Router.single(client).route("summary"), db, conversation_id, messages, state, budget=300
+    ))
+
+    # 불러오지 않은 메시지부터 요약에 접힘
+    assert len(client.calls) == 1
+    assert "user: turn 0" in client.calls[0]["messages"][0]["content"]
+    assert payload[1]["content"].startswith(SUMMARY_HEADER)
+    through_id, _ = db.get_summary(conversation_id)
+    assert through_id == state["through_id"]
+    assert all(m["id"] > through_id for m in state["unloaded"])
+    assert payload[-1]["content"] == f"turn {MESSAGES - 1}"
@@ -0,0 +1,80 @@
+import pytest
+
+import database
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def manual_flush(monkeypatch):
+    """백그라운드 쓰기 스레드가 끼어들지 않도록 flush를 직접 호출할 때만 씀"""
+    monkeypatch.setattr(database, "WRITE_BEHIND_INTERVAL", 3600)
+
+
+def test_failing_message_does_not_block_later_writes(db, monkeypatch):
+    events = []
+    monkeypatch.setattr(tracing, "record", lambda stage, duration_ms, attrs=None, status="ok":
+                        events.append((stage, attrs)))
+    conversation_id = db.create_conversation("writer")
+    writer = db.pool.writer
+    stuck = db.save_message(conversation_id, "user", "first")
+    # 다른 프로세스가 같은 id를 먼저 쓴 경우
+    with db._conn() as conn:
+        conn.execute("INSERT INTO messages (id, conversation_id, role, content) VALUES (?, ?, 'user', 'other')",
+                     (stuck, conversation_id))
+        conn.commit()
+    db.save_message(conversation_id, "assistant", "second")
+
+    for _ in range(database.WRITE_BEHIND_ATTEMPTS - 1):
+        assert writer.flush() == 1
+    # 실패한 메시지 뒤의 메시지는 첫 flush에서 이미 쓰임
+    assert db.get_messages(conversation_id)[-1] == ("assistant", "second")
+    assert writer.flush() == 0
+
+    assert [row[0] for row in writer.failed] == [stuck]
+    assert [attrs["message_id"] for stage, attrs in events if stage == "db.write_failed"] == [stuck]
+    # 새 메시지는 이미 쓰인 id와 겹치지 않게 다시 할당
+    db.save_message(conversation_id, "user", "third")
+    db.flush()
+    assert [content for _, content in db.get_messages(conversation_id)] == ["other", "second", "third"]
+
+
+def test_messages_of_deleted_conversation_are_dropped(db):
+    kept = db.create_conversation("kept")
+    deleted = db.create_conversation("deleted")
+    db.save_message(kept, "user", "hello")
+    db.save_message(deleted, "user", "bye")
+    with db._conn() as conn:
+        conn.execute("DELETE FROM conversations WHERE id = ?", (deleted,))
+        conn.commit()
+
+    assert db.pool.writer.flush() == 0
+    assert db.get_messages(kept) == [("user", "hello")]
+    assert db.pool.writer.failed == []
+
+
+def test_message_reads_record_their_own_spans(db, monkeypatch):
+    stages = []
+    monkeypatch.setattr(tracing, "record", lambda stage, duration_ms, attrs=None, status="ok": stages.append(stage))
+    conversation_id = db.create_conversation("spans")
+    stages.clear()
+
+    db.get_messages_between(conversation_id, 0, 10)
+    db.get_first_message(conversation_id)
+    assert stages == ["db.get_messages_between", "db.get_first_message"]
+
+
+def test_deleted_blobs_are_evicted_from_cache(db):
+    prompt = "You are a tutor.\n[Teaching Guidelines]\n" + "Explain step by step. " * 20
+    kept = db.create_conversation("kept")
+    deleted = db.create_conversation("deleted")
+    db.save_message(kept, "system", prompt)
+    db.save_message(deleted, "system", prompt + "\n[Learning Framework]\nFitts law")
+    db.flush()
+    assert db.get_messages(deleted) == [("system", prompt + "\n[Learning Framework]\nFitts law")]
+    cached = set(db.pool.blobs._items)
+
+    db.delete_conversation(deleted)
+    assert db.delete_unused_blobs() == 1
+    # 다른 대화와 공유하는 조각은 캐시에 남음
+    assert len(set(db.pool.blobs._items)) == len(cached) - 1
+    assert db.get_messages(kept) == [("system", prompt)]
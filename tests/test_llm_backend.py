@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+import llm_backend
+from llm_backend import FakeClient, Router, StageRoute, Target, build_router
+
+
+def ask(route, **params):
+    """라우트로 요청 하나를 보내고 응답 본문을 반환합니다."""
+    response = asyncio.run(route.chat.completions.create(
+        model="ignored",
+        messages=[{"role": "user", "content": "hello"}],
+        **params
+    ))
+    return response.choices[0].message.content
+
+
+def test_slow_primary_falls_back_after_timeout(monkeypatch):
+    events = []
+    monkeypatch.setattr(llm_backend.tracing, "event", lambda stage, **attrs: events.append((stage, attrs)))
+    slow, fast = FakeClient(delay=1.0), FakeClient()
+    route = StageRoute("intent", [
+        Target("local", slow, "small", timeout=0.05),
+        Target("openai", fast, "gpt-4o-mini", timeout=1.0),
+    ])
+
+    assert ask(route) == "Fake reply: hello"
+    assert len(slow.calls) == 1 and len(fast.calls) == 1
+    assert fast.calls[0]["model"] == "gpt-4o-mini"
+    assert events == [("llm.fallback.intent", {"backend": "local", "fallback": "openai", "error": "TimeoutError"})]
+
+
+def test_last_target_error_is_raised():
+    route = StageRoute("intent", [Target("local", FakeClient(delay=1.0), "small", timeout=0.05)])
+    with pytest.raises(asyncio.TimeoutError):
+        ask(route)
+
+
+def test_stage_params_override_caller_params():
+    router = build_router({
+        "backends": {"openai": {"type": "fake"}},
+        "stages": {"intent": {"model": "small", "temperature": 0, "max_tokens": 50}},
+    }, "sk-test")
+    client = router.route("intent").targets[0].client
+
+    ask(router.route("intent"), temperature=0.7, max_tokens=500, top_p=0.9)
+    assert client.calls[-1]["model"] == "small"
+    assert client.calls[-1]["temperature"] == 0
+    assert client.calls[-1]["max_tokens"] == 50
+    assert client.calls[-1]["top_p"] == 0.9
+
+    # 설정이 없는 단계는 호출 코드의 값을 그대로 보냄
+    ask(router.route("reply"), temperature=0.7)
+    assert client.calls[-1]["model"] == llm_backend.DEFAULT_MODEL
+    assert client.calls[-1]["temperature"] == 0.7
+
+
+def test_fallback_route_uses_its_own_model_without_stage_params():
+    router = build_router({
+        "backends": {"openai": {"type": "fake"}, "local": {"type": "fake", "model": "qwen"}},
+        "stages": {"intent": {"backend": "local", "fallback": "openai", "temperature": 0}},
+    }, "sk-test")
+    primary, fallback = router.route("intent").targets
+    assert (primary.backend, primary.model, primary.params) == ("local", "qwen", {"temperature": 0})
+    assert (fallback.backend, fallback.model, fallback.params) == ("openai", llm_backend.DEFAULT_MODEL, {})
+
+
+@pytest.mark.parametrize("config", [
+    {"stages": {"intent": {"backend": "missing"}}},
+    {"stages": {"intent": {"fallback": "missing"}}, "backends": {"openai": {"type": "fake"}}},
+    {"backends": {"openai": {"type": "grpc"}}},
+])
+def test_build_router_rejects_unknown_backend(config):
+    with pytest.raises(ValueError):
+        build_router(config, "sk-test")
+
+
+def test_single_router_routes_every_stage_to_one_client():
+    client = FakeClient()
+    router = Router.single(client, "gpt-4o")
+    for stage in llm_backend.STAGES:
+        assert router.route(stage).targets[0].client is client
+        assert router.route(stage).model == "gpt-4o"
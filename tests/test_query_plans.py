@@ -0,0 +1,23 @@
+import pytest
+
+from database import HOT_QUERIES
+
+
+def query_plan(db, sql, params):
+    """EXPLAIN QUERY PLAN 결과의 단계 설명 목록을 반환합니다."""
+    with db._conn() as conn:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def assert_uses_index(plan):
+    for step in plan:
+        # SEARCH는 인덱스(또는 rowid)로 범위를 좁히고, SCAN은 인덱스 순서로 읽을 때만 허용
+        assert not (step.startswith("SCAN") and "INDEX" not in step), plan
+        assert "TEMP B-TREE" not in step, plan
+
+
+@pytest.mark.parametrize("name, sql, params", HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_index(db, name, sql, params):
+    # delete_conversation의 계획에는 ON DELETE CASCADE로 지우는 테이블의 단계도 포함됨
+    assert_uses_index(query_plan(db, sql, params))
+
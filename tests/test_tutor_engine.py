@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+
+from openai import AsyncOpenAI
+
+import tracing
+import tutor_engine
+from benchmarks.mock_openai import start_server, ANSWER
+from llm_backend import FakeClient, Router, FAKE_JSON, fake_reply
+from tutor_engine import TutorEngine
+
+EVALUATION = dict(FAKE_JSON, status="evaluation", suggested_adjustment="- Use simpler examples.")
+
+
+def evaluation_reply(messages, json_mode=False):
+    """피드백 분석이 항상 "evaluation"을 돌려주는 가짜 응답"""
+    if json_mode:
+        return json.dumps(EVALUATION, ensure_ascii=False)
+    return fake_reply(messages)
+
+
+async def evaluation_turn(session, user_input):
+    """main.py와 같은 순서로 기존 대화에 피드백 턴 하나를 처리하고 응답 본문을 반환합니다."""
+    feedback = await session.review_feedback(user_input)
+    await session.add_message("user", user_input)
+    await session.apply_feedback(feedback)
+    return "".join([delta async for delta in session.stream_reply()])
+
+
+def test_evaluation_turn_streams_one_reply(db):
+    client = FakeClient(responder=evaluation_reply)
+    engine = TutorEngine(Router.single(client), db)
+    conversation_id = db.create_conversation("Fitts")
+    session = engine.session(conversation_id=conversation_id, mode="educational", messages=[
+        {"role": "system", "content": "You are a tutor."},
+        {"role": "user", "content": "Explain Fitts law"},
+        {"role": "assistant", "content": "Movement time grows with distance."},
+    ])
+
+    reply = asyncio.run(evaluation_turn(session, "I don't get it"))
+
+    # 피드백 분석 한 번과 스트리밍 응답 한 번
+    assert len(client.calls) == 2
+    feedback_call, reply_call = client.calls
+    assert not feedback_call["stream"] and "response_format" in feedback_call
+    assert reply_call["stream"]
+    # 스트리밍 응답은 갱신된 조정 사항이 붙은 시스템 프롬프트로 요청
+    assert "Use simpler examples." in reply_call["messages"][0]["content"]
+    assert session.messages[-1]["content"] == reply
+    assert db.get_messages(conversation_id)[-1] == ("assistant", reply)
+
+
+async def first_turn(engine, user_input):
+    """main.py와 같은 순서로 새 대화의 첫 턴을 처리하고 (세션, 응답 본문)을 반환합니다."""
+    session = engine.session()
+    await session.ensure_conversation(user_input)
+    await session.add_message("user", user_input)
+    intent = await session.classify(user_input)
+    if intent["intent"] == "Learning":
+        await session.create_framework(user_input)
+    else:
+        await session.use_casual_prompt()
+    reply = "".join([delta async for delta in session.stream_reply()])
+    return session, reply
+
+
+def test_concurrent_sessions_against_mock_server(db):
+    server = start_server(latency=0.2)
+
+    async def run(count):
+        client = AsyncOpenAI(api_key="sk-test", base_url=server.base_url)
+        engine = TutorEngine(Router.single(client), db)
+        try:
+            return await asyncio.gather(*(
+                first_turn(engine, f"Explain the difference between working memory and long-term memory #{i}")
+                for i in range(count)
+            ))
+        finally:
+            await client.close()
+
+    try:
+        started = time.perf_counter()
+        turns = asyncio.run(run(10))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    for session, reply in turns:
+        assert session.mode == "educational"
+        assert reply == ANSWER
+        assert [role for role, _ in db.get_messages(session.conversation_id)] == ["user", "system", "assistant"]
+    # 한 프로세스에서 세션들이 서버 지연을 기다리는 동안 함께 진행 (차례로 요청하면 requests * latency)
+    assert elapsed < server.requests * server.latency / 2
+
+
+def test_stream_without_usage_support(db, monkeypatch):
+    records = []
+    monkeypatch.setattr(tracing, "record", lambda stage, duration_ms, attrs=None, status="ok":
+                        records.append((stage, attrs, status)))
+    monkeypatch.setattr(tutor_engine, "_stream_usage_rejected", set())
+    server = start_server(reject_stream_options=True)
+    messages = [{"role": "user", "content": "Explain Fitts law"}]
+
+    async def reply():
+        # main.py처럼 턴마다 엔진과 라우터를 새로 만듦
+        client = AsyncOpenAI(api_key="sk-test", base_url=server.base_url, max_retries=0)
+        try:
+            engine = TutorEngine(Router.single(client), db)
+            return "".join([delta async for delta in engine.stream(messages)])
+        finally:
+            await client.close()
+
+    try:
+        assert asyncio.run(reply()) == ANSWER
+        assert asyncio.run(reply()) == ANSWER
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # 거부된 뒤에는 새 엔진에서도 stream_options 없이 한 번만 요청
+    assert server.requests == 3
+    assert [stage for stage, _, _ in records].count("llm.stream_options_rejected") == 1
+    streams = [(attrs, status) for stage, attrs, status in records if stage == "llm.stream"]
+    assert len(streams) == 2
+    assert all(status == "ok" and attrs["completion_tokens"] > 0 for attrs, status in streams)
@@ -0,0 +1,281 @@
+"""단계별 소요 시간 측정(span)과 지표 기록
+
+LLM 호출, DB 호출, 화면 렌더링 단계를 span으로 감싸 소요 시간과 속성(첫 토큰까지의 시간,
+초당 토큰 수, 토큰 수, 캐시 적중 등)을 기록합니다. 기록은 큐에 넣기만 하고
+백그라운드 스레드가 모아서 SQLite metrics 테이블이나 JSONL 파일에 씁니다.
+
+    python tracing.py --db conversations.db --hours 24
+    python tracing.py --jsonl metrics.jsonl
+"""
+import argparse
+import atexit
+import contextvars
+import functools
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# 모아서 쓰는 간격 (초)과 한 번에 쓰는 최대 개수
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 500
+
+# JSONL 파일 회전 기준 크기와 보관 개수
+JSONL_MAX_BYTES = 10 * 1024 * 1024
+JSONL_BACKUPS = 3
+
+_current = contextvars.ContextVar("tracing_span", default=None)
+_queue = queue.Queue()
+_sink = None
+_echo = False
+_writer = None
+_configure_lock = threading.Lock()
+_write_lock = threading.Lock()
+
+
+class SqliteSink:
+    """Database의 metrics 테이블에 기록합니다."""
+
+    def __init__(self, db):
+        self.db = db
+        self.key = ("sqlite", db.db_path)
+
+    def write(self, records):
+        self.db.save_metrics([
+            (ts, stage, duration_ms, status, json.dumps(attrs, ensure_ascii=False, default=str))
+            for ts, stage, duration_ms, status, attrs in records
+        ])
+
+
+class JsonlSink:
+    """크기가 커지면 회전하는 JSONL 파일에 기록합니다."""
+
+    def __init__(self, path, max_bytes=JSONL_MAX_BYTES, backups=JSONL_BACKUPS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.key = ("jsonl", os.path.abspath(path))
+
+    def _rotate(self):
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def write(self, records):
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as file:
+            for ts, stage, duration_ms, status, attrs in records:
+                file.write(json.dumps(
+                    {"ts": ts, "stage": stage, "duration_ms": duration_ms, "status": status, "attrs": attrs},
+                    ensure_ascii=False,
+                    default=str,
+                ) + "\n")
+
+
+def configure(db=None, jsonl_path=None, echo=False):
+    """기록 위치를 정합니다. db와 jsonl_path가 모두 없으면 기록하지 않으며, 같은 설정으로 다시 호출하면 무시합니다.
+
+    echo이면 기록마다 콘솔에도 출력합니다.
+    """
+    global _sink, _echo, _writer
+    sink = SqliteSink(db) if db is not None else JsonlSink(jsonl_path) if jsonl_path else None
+    with _configure_lock:
+        _echo = echo
+        if getattr(_sink, "key", None) == getattr(sink, "key", None):
+            return
+        flush()
+        _sink = sink
+        if _sink is not None and _writer is None:
+            _writer = threading.Thread(target=_write_loop, name="tracing-writer", daemon=True)
+            _writer.start()
+
+
+def _drain(block):
+    records = []
+    try:
+        records.append(_queue.get(timeout=FLUSH_INTERVAL) if block else _queue.get_nowait())
+        while len(records) < FLUSH_BATCH:
+            records.append(_queue.get_nowait())
+    except queue.Empty:
+        pass
+    return records
+
+
+def _write(records):
+    sink = _sink
+    if records and sink is not None:
+        try:
+            with _write_lock:
+                sink.write(records)
+        except Exception as e:
+            print(f"[TRACE] failed to write {len(records)} records: {e}")
+
+
+def _write_loop():
+    while True:
+        _write(_drain(block=True))
+
+
+def flush():
+    """큐에 남은 기록을 지금 씁니다."""
+    while True:
+        records = _drain(block=False)
+        if not records:
+            return
+        _write(records)
+
+
+atexit.register(flush)
+
+
+def record(stage, duration_ms, attrs=None, status="ok"):
+    """완료된 단계 하나를 기록합니다."""
+    attrs = attrs or {}
+    if _echo:
+        print(f"[TRACE] {stage} {duration_ms:.1f}ms {status} {attrs}")
+    if _sink is not None:
+        _queue.put((time.time(), stage, duration_ms, status, attrs))
+
+
+def event(stage, **attrs):
+    """소요 시간 없는 사건을 기록합니다."""
+    record(stage, 0.0, attrs)
+
+
+class Span:
+    __slots__ = ("stage", "attrs")
+
+    def __init__(self, stage, attrs):
+        self.stage = stage
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+@contextmanager
+def span(stage, **attrs):
+    """감싼 구간의 소요 시간을 기록합니다.
+
+    예외가 나면 status가 error로, 취소나 Streamlit rerun처럼 Exception이 아닌 중단은 interrupted로 기록됩니다.
+    같은 태스크/스레드 안에서만 사용합니다. (비동기 제너레이터의 yield를 걸치면 안 됨)
+    """
+    current = Span(stage, attrs)
+    token = _current.set(current)
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        status = "error"
+        current.attrs["error"] = type(e).__name__
+        raise
+    except BaseException:
+        status = "interrupted"
+        raise
+    finally:
+        _current.reset(token)
+        record(stage, (time.perf_counter() - start) * 1000, current.attrs, status)
+
+
+def annotate(**attrs):
+    """현재 span에 속성을 추가합니다. span 밖이면 무시합니다."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def traced(stage):
+    """함수 호출 전체를 span으로 감싸는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (가장 가까운 순위)"""
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+def load_jsonl(path, since):
+    """회전된 파일까지 포함해 since 이후의 기록 (stage, duration_ms, status, attrs)을 읽습니다."""
+    rows = []
+    for name in sorted(glob.glob(f"{glob.escape(path)}*")):
+        with open(name, encoding="utf-8") as file:
+            for line in file:
+                item = json.loads(line)
+                if item["ts"] >= since:
+                    rows.append((item["stage"], item["duration_ms"], item["status"], item["attrs"]))
+    return rows
+
+
+def summarize(rows):
+    """단계별 지연 시간 분위수와 TTFT, 초당 토큰 수, 캐시 적중률을 집계합니다."""
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[0]].append(row[1:])
+    summary = []
+    for stage, items in sorted(groups.items()):
+        durations = sorted(duration for duration, _, _ in items)
+        attrs = [a for _, _, a in items]
+        ttft = sorted(a["ttft_ms"] for a in attrs if "ttft_ms" in a)
+        rates = sorted(a["tokens_per_sec"] for a in attrs if "tokens_per_sec" in a)
+        cache = [a["cache"] for a in attrs if "cache" in a]
+        summary.append({
+            "stage": stage,
+            "n": len(items),
+            "errors": sum(status != "ok" for _, status, _ in items),
+            "p50_ms": percentile(durations, 0.5),
+            "p95_ms": percentile(durations, 0.95),
+            "p99_ms": percentile(durations, 0.99),
+            "ttft_p50_ms": percentile(ttft, 0.5) if ttft else None,
+            "ttft_p95_ms": percentile(ttft, 0.95) if ttft else None,
+            "tokens_per_sec_p50": percentile(rates, 0.5) if rates else None,
+            "cache_hit_rate": cache.count("hit") / len(cache) if cache else None,
+        })
+    return summary
+
+
+def main():
+    from database import Database
+
+    parser = argparse.ArgumentParser(description="기록된 지표를 단계별 지연 시간 분위수로 집계합니다.")
+    parser.add_argument("--db", default="conversations.db", help="데이터베이스 경로")
+    parser.add_argument("--jsonl", help="DB 대신 읽을 JSONL 파일 경로")
+    parser.add_argument("--hours", type=float, default=24, help="최근 몇 시간의 기록을 집계할지")
+    parser.add_argument("--prune-days", type=float, help="이보다 오래된 기록을 DB에서 삭제")
+    args = parser.parse_args()
+
+    since = time.time() - args.hours * 3600
+    if args.jsonl:
+        rows = load_jsonl(args.jsonl, since)
+    else:
+        db = Database(args.db)
+        if args.prune_days is not None:
+            deleted = db.delete_metrics_before(time.time() - args.prune_days * 86400)
+            print(f"pruned {deleted} records")
+        rows = [(stage, duration, status, json.loads(attrs)) for stage, duration, status, attrs in db.get_metrics(since)]
+
+    def fmt(value, spec):
+        return format(value, spec) if value is not None else "-"
+
+    print(f"{'stage':<28} {'n':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'ttft p50':>9} {'ttft p95':>9} {'tok/s':>7} {'cache':>6}")
+    for s in summarize(rows):
+        print(f"{s['stage']:<28} {s['n']:>6} {s['errors']:>4} {s['p50_ms']:>9.1f} {s['p95_ms']:>9.1f} "
+              f"{s['p99_ms']:>9.1f} {fmt(s['ttft_p50_ms'], '9.1f'):>9} {fmt(s['ttft_p95_ms'], '9.1f'):>9} "
+              f"{fmt(s['tokens_per_sec_p50'], '7.1f'):>7} {fmt(s['cache_hit_rate'], '6.0%'):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+"""Streamlit과 분리된 튜터 파이프라인
+
+TutorEngine은 여러 세션이 공유하는 단계별 비동기 API(의도 분류, ADDIE 프레임워크 생성,
+피드백 분석, 응답 스트리밍)를 제공하고, TutorSession은 대화 하나의 상태와 턴 처리를 담당합니다.
+Streamlit처럼 동기 코드에서 사용할 때는 run_sync / iterate_sync로 공유 이벤트 루프에서 실행합니다.
+"""
+import asyncio
+import threading
+import time
+from functools import partial
+
+import openai
+
+import tracing
+from prompts import (
+    for_system_prompt_with_reference,
+    for_system_prompt_without_reference,
+    system_prompt,
+    casual_system_prompt,
+    COMMON_INSTRUCTIONS,
+    feedback_analysis_prompt,
+    INTENT_CLASSIFICATION_PROMPT
+)
+from retrieval import retrieve, format_reference
+from llm_cache import get_cache
+from intent_classifier import classify_local, CONFIDENCE_THRESHOLD
+from speculation import SpeculativeTask
+from structured_output import request_json, StructuredOutputError
+from adjustments import split_adjustment, merge_adjustments, render_section
+from context_window import prepare_messages, count_tokens, message_tokens
+
+# 오류 시 사용할 기본 결과
+DEFAULT_INTENT = {"intent": "Learning", "confidence": 0.5, "reason": "오류로 인한 기본값"}
+DEFAULT_FEEDBACK = {"status": "진행", "reason": "오류 발생", "feedback_type": "기타"}
+
+# 피드백 분석에 사용할 최근 메시지 수
+FEEDBACK_CONTEXT_MESSAGES = 3
+
+# 스트리밍 응답의 마지막 청크로 토큰 사용량을 받는 옵션과, 이를 지원하지 않는 OpenAI 호환 서버의 오류 (400/422)
+STREAM_USAGE_OPTIONS = {"include_usage": True}
+STREAM_OPTIONS_ERRORS = (openai.BadRequestError, openai.UnprocessableEntityError)
+
+# stream_options를 거부한 (백엔드, 모델) 목록
+# (Streamlit은 rerun마다 엔진을 새로 만들므로 프로세스 단위로 기억해 턴마다 다시 실패하지 않도록)
+_stream_usage_rejected = set()
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """엔진 전용 이벤트 루프를 반환합니다. 처음 호출 시 백그라운드 스레드에서 시작합니다."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="tutor-engine", daemon=True).start()
+        return _loop
+
+
+def run_sync(coro):
+    """동기 코드에서 코루틴을 엔진 이벤트 루프에 실행하고 결과를 기다립니다."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def iterate_sync(agen):
+    """동기 코드에서 비동기 제너레이터를 순회합니다."""
+    while True:
+        try:
+            yield run_sync(agen.__anext__())
+        except StopAsyncIteration:
+            return
+
+
+# 구조화된 응답의 필수 키
+INTENT_FIELDS = ("intent",)
+FEEDBACK_FIELDS = ("status",)
+FRAMEWORK_FIELDS = ("analysis_content", "design_content")
+
+# 프레임워크 응답을 JSON으로 얻지 못했을 때 설계 단계 자리에 넣는 문구
+UNPARSED_DESIGN_NOTE = "(Included in the analysis above.)"
+
+
+def build_system_prompt(framework):
+    """프레임워크 결과(dict)로 시스템 프롬프트를 만듭니다."""
+    return system_prompt.format(
+        analysis_content=framework["analysis_content"],
+        design_content=framework["design_content"]
+    )
+
+
+class TutorEngine:
+    """여러 세션이 공유하는 튜터 파이프라인 단계
+
+    llm은 단계별 모델 라우터(llm_backend.Router)이며, 단계마다 설정된 백엔드와 모델로 요청합니다.
+    """
+
+    def __init__(self, llm, db, intent_threshold=CONFIDENCE_THRESHOLD):
+        self.llm = llm
+        self.db = db
+        self.intent_threshold = intent_threshold
+        self.cache = get_cache(db)
+
+    def session(self, **state):
+        """대화 세션을 만듭니다."""
+        return TutorSession(self, **state)
+
+    async def classify_intent(self, user_input):
+        """사용자 입력의 의도를 분류합니다. 실패하면 기본값에 "error"를 담아 반환합니다."""
+        try:
+            with tracing.span("intent") as span:
+                # 로컬 분류기가 확신하면 LLM 호출을 건너뜀
+                result = await asyncio.to_thread(classify_local, self.db, user_input, self.intent_threshold)
+                source = "local"
+                if result is None:
+                    prompt = INTENT_CLASSIFICATION_PROMPT.format(user_input=user_input)
+                    route = self.llm.route("intent")
+                    # 같은 입력이 반복되는 경우가 많으므로 공유 캐시를 거쳐 요청
+                    result = await self.cache.complete(
+                        partial(request_json, route, required=INTENT_FIELDS, name="intent"),
+                        model=route.model,
+                        messages=[{"role": "user", "content": prompt}],
+                        temperature=0.1,
+                        max_tokens=200
+                    )
+                    source = "llm"
+                span.set(source=source, intent=result["intent"], confidence=result.get("confidence"))
+                # LLM 라벨은 로컬 분류기의 학습 데이터로 사용
+                await asyncio.to_thread(
+                    self.db.log_intent, user_input, result["intent"], result.get("confidence"), source
+                )
+            return result
+        except Exception as e:
+            return dict(DEFAULT_INTENT, error=str(e))
+
+    async def request_framework(self, user_input):
+        """ADDIE 분석/설계 프레임워크 생성을 요청하고 결과(dict)를 반환합니다.
+
+        JSON을 얻지 못하면 원래 응답을 담은 StructuredOutputError가 발생합니다.
+        """
+        # 데이터베이스에서 질문과 관련된 ADDIE 문서 청크만 가져오기
+        with tracing.span("retrieval") as span:
+            reference_chunks = await asyncio.to_thread(retrieve, self.db, user_input)
+            span.set(chunks=len(reference_chunks))
+
+        # 프롬프트 생성
+        if reference_chunks:
+            prompt = for_system_prompt_with_reference.format(
+                user_input=user_input,
+                addie_reference_content=format_reference(reference_chunks),
+                common_instructions=COMMON_INSTRUCTIONS
+            )
+        else:
+            prompt = for_system_prompt_without_reference.format(
+                user_input=user_input,
+                common_instructions=COMMON_INSTRUCTIONS
+            )
+
+        route = self.llm.route("framework")
+        return await request_json(
+            route,
+            model=route.model,
+            messages=[{"role": "user", "content": prompt}],
+            required=FRAMEWORK_FIELDS,
+            name="framework",
+            temperature=0.7,
+            max_tokens=2000
+        )
+
+    async def analyze_feedback(self, current_context, user_feedback):
+        """사용자의 피드백을 분석합니다. 실패하면 기본값에 "error"를 담아 반환합니다."""
+        try:
+            with tracing.span("feedback") as span:
+                prompt = feedback_analysis_prompt.format(
+                    current_context=current_context,
+                    user_feedback=user_feedback
+                )
+                route = self.llm.route("feedback")
+                result = await self.cache.complete(
+                    partial(request_json, route, required=FEEDBACK_FIELDS, name="feedback"),
+                    model=route.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.3,
+                    max_tokens=1000
+                )
+                span.set(status=result["status"], feedback_type=result.get("feedback_type"))
+            return result
+        except Exception as e:
+            return dict(DEFAULT_FEEDBACK, error=str(e))
+
+    async def stream(self, messages):
+        """응답 토큰 델타를 비동기 제너레이터로 내보냅니다.
+
+        끝나면 첫 토큰까지의 시간(TTFT), 초당 토큰 수, 토큰 수를 llm.stream으로 기록합니다.
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        parts = []
+        usage = None
+        status = "error"
+        route = self.llm.route("reply")
+        try:
+            response = await self._open_stream(route, messages)
+            async for chunk in response:
+                # 사용량은 마지막 청크에 choices 없이 옴
+                usage = getattr(chunk, "usage", None) or usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+            status = "ok"
+        finally:
+            finished = time.perf_counter()
+            completion_tokens = usage.completion_tokens if usage else count_tokens("".join(parts))
+            attrs = {
+                "prompt_tokens": usage.prompt_tokens if usage else sum(message_tokens(m) for m in messages),
+                "completion_tokens": completion_tokens,
+            }
+            if first_token_at is not None:
+                attrs["ttft_ms"] = (first_token_at - started) * 1000
+                if finished > first_token_at:
+                    attrs["tokens_per_sec"] = completion_tokens / (finished - first_token_at)
+            attrs["model"] = route.model
+            tracing.record("llm.stream", (finished - started) * 1000, attrs, status)
+
+    async def _open_stream(self, route, messages):
+        """스트리밍 요청을 시작합니다.
+
+        stream_options가 거부되면 빼고 다시 요청하며, 같은 백엔드와 모델에는 이후 보내지 않고
+        토큰 수는 로컬에서 추정합니다.
+        """
+        key = (route.targets[0].backend, route.model)
+        if key not in _stream_usage_rejected:
+            try:
+                return await route.chat.completions.create(
+                    model=route.model,
+                    messages=messages,
+                    stream=True,
+                    stream_options=STREAM_USAGE_OPTIONS
+                )
+            except STREAM_OPTIONS_ERRORS as e:
+                if "stream_options" not in str(e):
+                    raise
+                _stream_usage_rejected.add(key)
+                tracing.event("llm.stream_options_rejected", model=route.model, error=type(e).__name__)
+        return await route.chat.completions.create(model=route.model, messages=messages, stream=True)
+
+
+class TutorSession:
+    """대화 세션 하나의 상태와 턴 처리 단계
+
+    messages와 context_summary는 전달된 객체를 그대로 갱신하므로
+    호출하는 쪽(예: Streamlit 세션 상태)과 공유할 수 있습니다.
+    """
+
+    def __init__(self, engine, conversation_id=None, messages=None, mode=None, context_summary=None):
+        self.engine = engine
+        self.conversation_id = conversation_id
+        self.messages = messages if messages is not None else []
+        self.mode = mode
+        self.context_summary = context_summary if context_summary is not None else {}
+        self._framework_task = None
+        self._adjustments = None
+
+    @property
+    def db(self):
+        return self.engine.db
+
+    async def ensure_conversation(self, user_input):
+        """대화 세션이 없으면 첫 입력을 제목으로 새로 만듭니다."""
+        if not self.conversation_id:
+            title = user_input[:50] + "..." if len(user_input) > 50 else user_input
+            self.conversation_id = await asyncio.to_thread(self.db.create_conversation, title)
+        return self.conversation_id
+
+    async def add_message(self, role, content, save=True):
+        """메시지를 세션에 추가하고 (save이면) DB에 저장합니다."""
+        message = {"role": role, "content": content}
+        if save and self.conversation_id:
+            message["id"] = await asyncio.to_thread(self.db.save_message, self.conversation_id, role, content)
+        self.messages.append(message)
+        return message
+
+    async def speculate_framework(self, user_input):
+        """의도 분류 결과를 기다리지 않고 프레임워크 생성을 미리 시작합니다."""
+        self._framework_task = SpeculativeTask(self.engine.request_framework(user_input))
+
+    async def classify(self, user_input):
+        """의도를 분류하고 대화 모드를 정합니다. Learning이 아니면 미리 시작한 프레임워크 생성은 폐기합니다."""
+        intent_result = await self.engine.classify_intent(user_input)
+        if intent_result["intent"] == "Learning":
+            self.mode = "educational"
+        else:
+            self.mode = "casual"
+            if self._framework_task:
+                self._framework_task.discard()
+                self._framework_task = None
+        if self.conversation_id:
+            await asyncio.to_thread(
+                self.db.set_conversation_mode, self.conversation_id, self.mode, intent_result["intent"]
+            )
+        return intent_result
+
+    async def create_framework(self, user_input):
+        """ADDIE 프레임워크로 시스템 프롬프트를 만들어 추가합니다.
+
+        응답을 JSON으로 얻지 못해도 생성된 본문을 그대로 시스템 프롬프트에 넣어 대화를 이어가며,
+        이 경우 False를 반환합니다.
+        """
+        try:
+            if self._framework_task:
+                framework = await self._framework_task.result()
+            else:
+                framework = await self.engine.request_framework(user_input)
+            content = build_system_prompt(framework)
+            parsed = True
+        except StructuredOutputError as e:
+            tracing.event("framework.unparsed", error=str(e))
+            content = system_prompt.format(
+                analysis_content=(e.content or "").strip(),
+                design_content=UNPARSED_DESIGN_NOTE
+            )
+            parsed = False
+        finally:
+            self._framework_task = None
+        await self.add_message("system", content)
+        return parsed
+
+    async def use_casual_prompt(self):
+        """일반 대화 모드의 시스템 프롬프트를 추가합니다."""
+        return await self.add_message("system", casual_system_prompt, save=False)
+
+    async def review_feedback(self, user_feedback):
+        """최근 대화 맥락에서 사용자의 피드백을 분석합니다."""
+        # 이전 메시지가 3개 미만인 경우는 있는 만큼만 사용
+        context_messages = self.messages[-FEEDBACK_CONTEXT_MESSAGES:]
+        current_context = "\n".join([msg["content"] for msg in context_messages])
+        return await self.engine.analyze_feedback(current_context, user_feedback)
+
+    async def load_adjustments(self):
+        """대화에 누적된 시스템 프롬프트 조정 사항을 (한 번만) 불러옵니다."""
+        if self._adjustments is None:
+            rows = []
+            if self.conversation_id:
+                rows = await asyncio.to_thread(self.db.get_prompt_adjustments, self.conversation_id)
+            self._adjustments = [{"content": content, "hits": hits} for content, hits in rows]
+        return self._adjustments
+
+    async def adjustment_section(self):
+        """시스템 프롬프트 뒤에 붙는 조정 사항 섹션"""
+        return render_section(await self.load_adjustments())
+
+    async def apply_feedback(self, feedback_analysis):
+        """"evaluation" 결과의 조정 사항을 저장하고 갱신된 조정 사항 섹션을 반환합니다.
+
+        조정 사항은 시스템 프롬프트에 직접 덧붙이지 않고, 중복을 합치고 토큰 예산으로 제한한 뒤
+        요청할 때 시스템 프롬프트 뒤에 붙입니다.
+        """
+        if feedback_analysis["status"] != "evaluation" or "suggested_adjustment" not in feedback_analysis:
+            return None
+        lines = split_adjustment(feedback_analysis["suggested_adjustment"])
+        adjustments = merge_adjustments(await self.load_adjustments(), lines)
+        if self.conversation_id:
+            await asyncio.to_thread(
+                self.db.save_prompt_adjustments,
+                self.conversation_id,
+                [(item["content"], item["hits"]) for item in adjustments]
+            )
+        self._adjustments = adjustments
+        section = render_section(adjustments)
+        tracing.event(
+            "prompt.adjusted",
+            conversation_id=self.conversation_id,
+            adjustments=len(adjustments),
+            tokens=count_tokens(section)
+        )
+        return section
+
+    async def request_messages(self):
+        """토큰 예산에 맞춰 오래된 대화를 요약으로 접은 요청용 메시지 목록을 반환합니다."""
+        with tracing.span("context") as span:
+            payload = await prepare_messages(
+                self.engine.llm.route("summary"),
+                self.db,
+                self.conversation_id,
+                self.messages,
+                self.context_summary,
+                system_suffix=await self.adjustment_section(),
+            )
+            span.set(messages=len(payload))
+        return payload
+
+    async def stream_reply(self):
+        """응답을 스트리밍하며 델타를 내보내고, 끝나면 응답을 저장합니다."""
+        parts = []
+        async for delta in self.engine.stream(await self.request_messages()):
+            parts.append(delta)
+            yield delta
+        full_response = "".join(parts)
+        # 응답 저장 (중복 방지)
+        if not (self.messages and
+                self.messages[-1]["role"] == "assistant" and
+                self.messages[-1]["content"] == full_response):
+            await self.add_message("assistant", full_response)
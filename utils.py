@@ -1,5 +1,13 @@
 import streamlit as st
 import re
+from functools import lru_cache
+
+# 렌더링 결과를 보관할 메시지 수
+RENDER_CACHE_SIZE = 2048
+
+# LaTeX 구분자 변환 패턴
+BLOCK_MATH_PATTERN = re.compile(r"\\\[(.*?)\\\]", re.DOTALL)
+INLINE_MATH_PATTERN = re.compile(r"\\\((.*?)\\\)")
 
 def get_latex_css():
     """LaTeX 렌더링을 위한 CSS 스타일을 반환합니다."""
@@ -28,9 +36,14 @@ def render_with_latex(text: str) -> str:
     - 마크다운 문법(###, -, **)은 그대로 유지됨
     """
     # block 수식 변환 ( \[...\] → $$...$$ )
-    text = re.sub(r"\\\[(.*?)\\\]", r"$$\1$$", text, flags=re.DOTALL)
+    text = BLOCK_MATH_PATTERN.sub(r"$$\1$$", text)
     
     # inline 수식 변환 ( \(...\) → $...$ )
-    text = re.sub(r"\\\((.*?)\\\)", r"$\1$", text)
+    text = INLINE_MATH_PATTERN.sub(r"$\1$", text)
     
     return text
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_cached(text: str) -> str:
+    """render_with_latex 결과를 메시지 내용 기준으로 캐시합니다."""
+    return render_with_latex(text)